@@ -0,0 +1,364 @@
+import gzip
+import json
+import marshal
+import os
+import sys
+import threading
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from task import Task
+
+ARCHIVE_CHUNK = 1000 # Записей в одном элементе gzip: точечное чтение распаковывает только свой элемент
+INDEX_VERSION = 2 # Версия формата файла индекса; индекс другой версии строится заново
+
+
+class TaskArchive:
+    """
+        Холодное хранилище выполненных задач: сжатый файл JSON-lines (gzip), который только дописывается.
+        Записи в формате журнала DataHandler: {"op": "put", "task": {...}} и {"op": "delete", "ids": [...]}.
+        Каждая запись в архив - отдельные элементы gzip не больше ARCHIVE_CHUNK записей (gzip допускает
+        склеенные элементы), поэтому задачу по ID можно прочитать, распаковав только ее элемент.
+        Индекс по ID (смещение элемента), по сроку выполнения и по категории хранится рядом с архивом (файл .idx);
+        если архив дописал другой процесс, индекс дочитывает только новые элементы.
+    """
+
+    def __init__(self, path: str):
+        """
+            Инициализация архива. Файлы архива и индекса читаются при первом обращении.
+
+            Args:
+                path (str): Путь к файлу архива.
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self._lock = threading.RLock() # Индекс дочитывается и изменяется и при параллельных поисках
+        self._index_loaded = False # Файл индекса прочитан
+        self._reset()
+
+    def _reset(self, inode: Optional[int] = None) -> None:
+        """
+            Сбрасывает индекс к пустому архиву.
+        """
+        self._inode = inode # inode архива, по которому построен индекс
+        self._size = 0 # Размер проиндексированной части архива
+        self._offsets: Dict[int, int] = {} # ID -> смещение элемента gzip с последней записью задачи
+        self._dates: Dict[int, str] = {} # ID -> срок выполнения
+        self._categories: Dict[int, str] = {} # ID -> категория
+        self._by_date: Optional[List[Tuple[str, int]]] = None # Пары (срок, ID) по возрастанию (строятся по запросу)
+        self._by_category: Optional[Dict[str, Set[int]]] = None # Категория -> ID задач (строится по запросу)
+        self._max_id = 0 # Наибольший ID, когда-либо записанный в архив
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """
+            Возвращает inode и размер файла архива или None, если архива еще нет.
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size
+
+    def _link(self, task_id: int, offset: int, due_date: str, category: str) -> None:
+        """
+            Добавляет в индекс запись задачи из элемента по указанному смещению.
+        """
+        self._unlink(task_id)
+        self._offsets[task_id] = offset
+        self._dates[task_id] = sys.intern(due_date) # Одна строка на дату: marshal запишет ее в индекс один раз
+        self._categories[task_id] = sys.intern(category)
+        if self._by_date is not None:
+            insort(self._by_date, (due_date, task_id))
+        if self._by_category is not None:
+            self._by_category.setdefault(category, set()).add(task_id)
+        self._max_id = max(self._max_id, task_id)
+
+    def _unlink(self, task_id: int) -> None:
+        """
+            Убирает задачу из индекса.
+        """
+        if self._offsets.pop(task_id, None) is None:
+            return
+        due_date, category = self._dates.pop(task_id), self._categories.pop(task_id)
+        if self._by_date is not None:
+            position = bisect_left(self._by_date, (due_date, task_id))
+            del self._by_date[position]
+        if self._by_category is not None:
+            bucket = self._by_category[category]
+            bucket.discard(task_id)
+            if not bucket:
+                del self._by_category[category]
+
+    def _apply(self, offset: int, records: Iterable[Dict]) -> None:
+        """
+            Применяет к индексу записи элемента по указанному смещению.
+        """
+        for record in records:
+            if record["op"] == "put":
+                task = record["task"]
+                self._link(task["id"], offset, task["due_date"], task["category"])
+            elif record["op"] == "delete":
+                for task_id in record["ids"]:
+                    self._unlink(task_id)
+
+    def _members(self, start: int, end: Optional[int] = None) -> Iterator[Tuple[int, int, List[bytes]]]:
+        """
+            Потоково читает элементы gzip архива начиная со смещения start.
+            Недописанный последний элемент (его дописывает другой процесс) не выдается.
+
+            Args:
+                start (int): Смещение первого элемента.
+                end (Optional[int]): Смещение, на котором чтение останавливается (по умолчанию - конец файла).
+
+            Yields:
+                Tuple[int, int, List[bytes]]: Смещение элемента, смещение следующего элемента и строки записей элемента.
+        """
+        try:
+            file = self.path.open("rb")
+        except FileNotFoundError:
+            return
+        with file:
+            file.seek(start)
+            offset, pending = start, b""
+            while end is None or offset < end:
+                decompressor = zlib.decompressobj(wbits=31) # 31 - формат gzip; объект распаковывает один элемент
+                parts, consumed = [], 0
+                while not decompressor.eof:
+                    chunk = pending or file.read(64 * 1024)
+                    pending = b""
+                    if not chunk:
+                        return # Конец файла внутри элемента
+                    parts.append(decompressor.decompress(chunk))
+                    consumed += len(chunk)
+                pending = decompressor.unused_data # Начало следующего элемента
+                next_offset = offset + consumed - len(pending)
+                yield offset, next_offset, b"".join(parts).splitlines()
+                offset = next_offset
+
+    def _load_index(self) -> None:
+        """
+            Читает файл индекса. Поврежденный индекс или индекс другой версии не используется.
+        """
+        self._index_loaded = True
+        try:
+            version, inode, size, max_id, entries = marshal.loads(self.index_path.read_bytes())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if version != INDEX_VERSION:
+            return
+        self._reset(inode)
+        self._size, self._max_id = size, max_id
+        for task_id, offset, due_date, category in entries:
+            self._offsets[task_id] = offset
+            self._dates[task_id] = due_date
+            self._categories[task_id] = category
+
+    def _save_index(self) -> None:
+        """
+            Записывает файл индекса. Индекс только ускоряет открытие архива, поэтому ошибка записи не прерывает работу.
+        """
+        entries = [
+            (task_id, offset, self._dates[task_id], self._categories[task_id]) for task_id, offset in self._offsets.items()
+        ]
+        # Индекс могут записывать несколько процессов, поэтому у каждого свой временный файл
+        temp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_bytes(marshal.dumps((INDEX_VERSION, self._inode, self._size, self._max_id, entries)))
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _refresh(self) -> None:
+        """
+            Приводит индекс в соответствие с файлом архива: загружает файл индекса при первом обращении
+            и дочитывает элементы, дописанные после построения индекса. Вызывается под блокировкой.
+        """
+        if not self._index_loaded:
+            self._load_index()
+        stat = self._stat()
+        if stat is None: # Архива нет (еще не создан или удален)
+            if self._size:
+                self._reset()
+            return
+        inode, size = stat
+        if inode != self._inode or size < self._size: # Архив заменен другим файлом - индекс строится заново
+            self._reset(inode)
+        if size == self._size:
+            return
+        for offset, next_offset, lines in self._members(self._size):
+            self._apply(offset, map(json.loads, lines))
+            self._size = next_offset
+        self._save_index()
+
+    def _write(self, records: List[Dict]) -> None:
+        """
+            Дописывает записи в архив элементами по ARCHIVE_CHUNK записей и обновляет индекс.
+            Если архив после построения индекса дописал другой процесс, индекс дочитывается из файла.
+        """
+        with self._lock:
+            self._refresh()
+            with self.path.open("ab") as file:
+                offset = file.tell()
+                current = offset == self._size and os.fstat(file.fileno()).st_ino in (self._inode, None)
+                if self._inode is None:
+                    self._inode = os.fstat(file.fileno()).st_ino # Архив создан этой записью
+                records = iter(records)
+                while chunk := list(islice(records, ARCHIVE_CHUNK)):
+                    data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in chunk).encode("utf-8")
+                    file.write(gzip.compress(data, compresslevel=6, mtime=0))
+                    if current: # Записанные элементы индексируются без повторного чтения файла
+                        self._apply(offset, chunk)
+                        offset = self._size = file.tell()
+                file.flush()
+                os.fsync(file.fileno())
+            if current:
+                self._save_index()
+            else:
+                self._refresh()
+
+    def append(self, tasks: Iterable[Task]) -> int:
+        """
+            Записывает задачи в архив. Задача, уже находящаяся в архиве, заменяется новой записью.
+
+            Args:
+                tasks (Iterable[Task]): Задачи для архивирования.
+
+            Returns:
+                int: Количество записанных задач.
+        """
+        records = [{"op": "put", "task": task.to_dict()} for task in tasks]
+        if records:
+            self._write(records)
+        return len(records)
+
+    def delete(self, task_ids: Iterable[int]) -> int:
+        """
+            Удаляет задачи из архива (дописывает запись об удалении).
+
+            Args:
+                task_ids (Iterable[int]): ID задач.
+
+            Returns:
+                int: Количество удаленных задач, которые были в архиве.
+        """
+        with self._lock:
+            self._refresh()
+            deleted = [task_id for task_id in dict.fromkeys(task_ids) if task_id in self._offsets]
+            if deleted:
+                self._write([{"op": "delete", "ids": deleted}])
+            return len(deleted)
+
+    def _read(self, task_ids: Iterable[int]) -> Dict[int, Task]:
+        """
+            Читает задачи по ID, распаковывая каждый нужный элемент архива один раз.
+        """
+        with self._lock:
+            self._refresh()
+            wanted: Dict[int, set] = {} # Смещение элемента -> ID задач в нем
+            for task_id in task_ids:
+                offset = self._offsets.get(task_id)
+                if offset is not None:
+                    wanted.setdefault(offset, set()).add(task_id)
+        found = {}
+        for offset, ids in wanted.items():
+            # Записи пишет только _write, поэтому запись задачи узнается по началу строки без разбора всего элемента
+            prefixes = tuple(b'{"op": "put", "task": {"id": %d,' % task_id for task_id in ids)
+            for _, _, lines in islice(self._members(offset), 1):
+                for line in lines:
+                    if line.startswith(prefixes):
+                        task = json.loads(line)["task"]
+                        found[task["id"]] = Task.from_dict(task, lazy=True)
+        return found
+
+    def get(self, task_id: int) -> Optional[Task]:
+        """
+            Получает задачу из архива по ID.
+
+            Args:
+                task_id (int): ID задачи.
+
+            Returns:
+                Optional[Task]: Задача или None, если ее нет в архиве.
+        """
+        return self._read([task_id]).get(task_id)
+
+    def due_between(self, start: str, end: str) -> List[Task]:
+        """
+            Возвращает задачи архива со сроком выполнения в диапазоне [start, end].
+
+            Args:
+                start (str): Начало диапазона в формате YYYY-MM-DD.
+                end (str): Конец диапазона в формате YYYY-MM-DD.
+
+            Returns:
+                List[Task]: Задачи, упорядоченные по сроку выполнения.
+        """
+        with self._lock:
+            self._refresh()
+            if self._by_date is None:
+                self._by_date = sorted((due_date, task_id) for task_id, due_date in self._dates.items())
+            low = bisect_left(self._by_date, (start,))
+            high = bisect_right(self._by_date, (end, float("inf")))
+            ids = [task_id for _, task_id in self._by_date[low:high]]
+        tasks = self._read(ids)
+        return [tasks[task_id] for task_id in ids if task_id in tasks]
+
+    def ids_in_category(self, category: str) -> List[int]:
+        """
+            Возвращает ID задач архива категории с точным совпадением названия (по индексу, без чтения архива).
+
+            Args:
+                category (str): Категория.
+
+            Returns:
+                List[int]: ID задач категории.
+        """
+        with self._lock:
+            self._refresh()
+            if self._by_category is None:
+                self._by_category = {}
+                for task_id, name in self._categories.items():
+                    self._by_category.setdefault(name, set()).add(task_id)
+            return sorted(self._by_category.get(category, ()))
+
+    def iter_tasks(self) -> Iterator[Task]:
+        """
+            Потоково читает все задачи архива в порядке архивирования, распаковывая элементы по одному.
+            Замененные и удаленные записи пропускаются.
+
+            Yields:
+                Task: Очередная задача архива.
+        """
+        with self._lock:
+            self._refresh()
+            offsets, end = dict(self._offsets), self._size
+        if not offsets:
+            return
+        for offset, _, lines in self._members(0, end):
+            for record in map(json.loads, lines):
+                if record["op"] == "put" and offsets.get(record["task"]["id"]) == offset:
+                    yield Task.from_dict(record["task"], lazy=True)
+
+    def max_id(self) -> int:
+        """
+            Наибольший ID, записанный в архив (ID архивных задач не выдаются повторно).
+
+            Returns:
+                int: Наибольший ID или 0 для пустого архива.
+        """
+        with self._lock:
+            self._refresh()
+            return self._max_id
+
+    def __contains__(self, task_id: int) -> bool:
+        with self._lock:
+            self._refresh()
+            return task_id in self._offsets
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
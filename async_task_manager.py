@@ -0,0 +1,419 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Union
+
+from task import Task, Priority, Status
+from data_handler import DataHandler
+from task_manager import TaskManager
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTaskManager:
+    """
+        Асинхронный интерфейс менеджера задач для приложений на asyncio.
+        Операции над задачами в памяти выполняются сразу в цикле событий, а сериализация и запись файла -
+        в пуле потоков. Изменения накапливаются и сохраняются одной записью: серия изменений,
+        сделанных, пока предыдущая запись не началась, сохраняется один раз.
+        Для SQLite каждая операция обращается к базе данных, а с архивом выполненных задач чтение, изменение
+        и удаление могут распаковывать и дописывать файл архива, поэтому операции целиком выполняются в пуле потоков.
+    """
+    def __init__(
+        self,
+        data_file: str = "data.json",
+        data_handler: Optional[DataHandler] = None,
+        executor: Optional[Executor] = None,
+        coalesce_ms: float = 0,
+        full_text_index: bool = False,
+        query_cache_size: Optional[int] = None,
+        scheduler: bool = False
+    ):
+        """
+            Инициализация асинхронного менеджера. Задачи загружаются в фоне, методы дожидаются окончания загрузки.
+
+            Args:
+                data_file (str): Путь к файлу с данными.
+                data_handler (Optional[DataHandler]): Готовый обработчик данных. Если передан, data_file не используется.
+                executor (Optional[Executor]): Пул для записи файла (по умолчанию - пул цикла событий).
+                coalesce_ms (float): Задержка перед записью в миллисекундах: изменения, сделанные за это время,
+                    попадут в ту же запись.
+                full_text_index (bool): Строить полнотекстовый индекс (см. TaskManager).
+                query_cache_size (Optional[int]): Размер кэша результатов поиска (см. TaskManager).
+                scheduler (bool): Держать очередь невыполненных задач для peek_next и pop_next (см. TaskManager).
+        """
+        data_handler = data_handler or DataHandler(data_file)
+        archived = data_handler.archive is not None
+        self._offload = data_handler.supports_queries or archived # Операции обращаются к базе данных или к архиву
+        self.manager = TaskManager(
+            data_handler=data_handler,
+            full_text_index=full_text_index,
+            background_load=True,
+            auto_persist=data_handler.supports_queries,
+            thread_safe=archived, # Операции выполняются в пуле потоков параллельно с записью изменений
+            query_cache_size=query_cache_size,
+            scheduler=scheduler
+        )
+        self.executor = executor
+        self.coalesce_ms = coalesce_ms
+        self._loaded = False
+        self._persisting: Optional[asyncio.Task] = None # Задача цикла событий, сохраняющая изменения
+        self._write_lock = asyncio.Lock() # Записи накопленных изменений выполняются по одной
+
+    async def __aenter__(self) -> 'AsyncTaskManager':
+        await self.wait_until_loaded()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _in_executor(self, function: Callable, *args, **kwargs):
+        """
+            Выполняет блокирующую функцию в пуле потоков.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, *args, **kwargs))
+
+    async def _call(self, method: Callable, *args, **kwargs):
+        """
+            Вызывает метод TaskManager: в цикле событий, если он работает с памятью, или в пуле потоков
+            для SQLite и архива.
+        """
+        await self.wait_until_loaded()
+        if self._offload:
+            return await self._in_executor(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    async def _mutate(self, method: Callable, *args, **kwargs):
+        """
+            Выполняет изменение задач и планирует сохранение накопленных изменений.
+        """
+        result = await self._call(method, *args, **kwargs)
+        if self.manager.has_pending and (self._persisting is None or self._persisting.done()):
+            self._persisting = asyncio.get_running_loop().create_task(self._persist_pending())
+        return result
+
+    async def _persist_pending(self) -> None:
+        """
+            Сохраняет накопленные изменения в пуле потоков, пока они появляются.
+            Ошибка записи попадает в лог (logging), а изменения остаются накопленными: их сохранит следующая
+            запись, а flush() и close() сообщат об ошибке, если она повторится.
+        """
+        await asyncio.sleep(self.coalesce_ms / 1000) # Даем изменениям из той же серии накопиться
+        while self.manager.has_pending:
+            try:
+                await self._write_pending()
+            except Exception:
+                data_handler = self.manager.data_handler
+                logger.exception("Не удалось сохранить изменения в %s", getattr(data_handler, "file_path", data_handler))
+                return
+
+    async def _write_pending(self) -> None:
+        """
+            Сохраняет накопленные изменения одной записью в пуле потоков.
+            Снимок записей задач делается в цикле событий, поэтому изменения, сделанные во время записи файла,
+            в нее не попадают. Если запись не удалась, изменения возвращаются в накопленные.
+            Записи выполняются под блокировкой по одной, чтобы более старый снимок не перезаписал новый.
+        """
+        async with self._write_lock:
+            if not self.manager.has_pending: # Изменения сохранила запись, завершившаяся, пока ждали блокировку
+                return
+            tasks, changed, deleted = self.manager.take_pending()
+            snapshot = self.manager.data_handler.snapshot(tasks, changed, deleted)
+            try:
+                await self._in_executor(self.manager.data_handler.persist, *snapshot)
+            except BaseException: # В том числе отмена: изменения не должны потеряться
+                self.manager.restore_pending(changed, deleted)
+                raise
+
+    async def next_tasks(self, tasks: Iterator[Task], count: int) -> List[Task]:
+        """
+            Берет следующие задачи из итератора iter_search. Итератор по архиву распаковывает его по мере
+            обхода, поэтому в этом случае (и для SQLite) задачи берутся в пуле потоков.
+
+            Args:
+                tasks (Iterator[Task]): Итератор, возвращенный iter_search.
+                count (int): Наибольшее количество задач.
+
+            Returns:
+                List[Task]: Задачи (пустой список, если итератор исчерпан).
+        """
+        if self._offload:
+            return await self._in_executor(lambda: list(islice(tasks, count)))
+        return list(islice(tasks, count))
+
+    async def wait_until_loaded(self) -> None:
+        """
+            Ожидает окончания фоновой загрузки задач, не блокируя цикл событий.
+
+            Raises:
+                Exception: Ошибка, возникшая при загрузке задач.
+        """
+        if not self._loaded:
+            await self._in_executor(self.manager.wait_until_loaded)
+            self._loaded = True
+
+    async def flush(self) -> None:
+        """
+            Дожидается сохранения всех изменений, сделанных до вызова.
+
+            Raises:
+                OSError: Если накопленные изменения не удалось сохранить.
+        """
+        while self._persisting is not None and not self._persisting.done(): # Сначала завершается фоновая запись
+            await self._persisting
+        if self.manager.has_pending: # Изменения без запланированной записи (например, после ошибки записи)
+            await self._write_pending()
+        await self._in_executor(self.manager.flush)
+
+    async def close(self) -> None:
+        """
+            Сохраняет изменения и освобождает ресурсы обработчика данных.
+
+            Raises:
+                OSError: Если накопленные изменения не удалось сохранить (ресурсы освобождаются и в этом случае).
+        """
+        try:
+            await self.flush()
+        finally:
+            await self._in_executor(self.manager.close)
+
+    async def get_tasks(self) -> List[Task]:
+        """
+            Возвращает список задач.
+
+            Returns:
+                List[Task]: Список задач.
+        """
+        await self.wait_until_loaded()
+        if self._offload:
+            return await self._in_executor(lambda: self.manager.tasks)
+        return self.manager.tasks
+
+    async def create_task(self, **fields) -> Task:
+        """
+            Создает задачу из переданных полей и добавляет ее в менеджер.
+
+            Args:
+                **fields: Поля задачи (title, description, category, due_date, priority, status).
+
+            Returns:
+                Task: Созданная задача.
+        """
+        return await self._mutate(self.manager.create_task, **fields)
+
+    async def add_task(self, task: Task) -> None:
+        """
+            Добавляет задачу.
+
+            Args:
+                task (Task): Задача для добавления.
+        """
+        await self._mutate(self.manager.add_task, task)
+
+    async def get_task(self, task_id: int) -> Optional[Task]:
+        """
+            Получает задачу по ID.
+
+            Args:
+                task_id (int): ID задачи для поиска.
+
+            Returns:
+                Optional[Task]: Задача с указанным ID или None, если задача не найдена.
+        """
+        return await self._call(self.manager.get_task, task_id)
+
+    async def get_tasks_by_category(self, category: str) -> List[Task]:
+        """
+            Получает список задач по категории.
+
+            Args:
+                category (str): Категория для поиска задач.
+
+            Returns:
+                List[Task]: Список задач указанной категории.
+        """
+        return await self._call(self.manager.get_tasks_by_category, category)
+
+    async def search_tasks(
+        self,
+        keyword: str = "",
+        category: str = "",
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None
+    ) -> List[Task]:
+        """
+            Ищет задачи по ключевому слову, категории, статусу и приоритету.
+
+            Args:
+                keyword (str): Ключевое слово для поиска в названии и описании задачи.
+                category (str): Категория для фильтрации задач.
+                status (Optional[Status]): Статус для фильтрации задач.
+                priority (Optional[Priority]): Приоритет для фильтрации задач.
+
+            Returns:
+                List[Task]: Список задач, соответствующих фильтрам.
+        """
+        return await self._call(self.manager.search_tasks, keyword, category, status, priority)
+
+    async def iter_search(self, **filters) -> Iterator[Task]:
+        """
+            Ленивый поиск задач с сортировкой и постраничной выборкой.
+
+            Args:
+                **filters: Аргументы TaskManager.iter_search (keyword, category, status, priority,
+                    sort_by, offset, limit).
+
+            Returns:
+                Iterator[Task]: Итератор по найденным задачам.
+        """
+        return await self._call(self.manager.iter_search, **filters)
+
+    async def peek_next(self, n: int = 1) -> List[Task]:
+        """
+            Возвращает самые срочные невыполненные задачи.
+
+            Args:
+                n (int): Количество задач.
+
+            Returns:
+                List[Task]: Задачи в порядке выполнения.
+        """
+        return await self._call(self.manager.peek_next, n)
+
+    async def pop_next(self, status: Status = Status.IN_PROGRESS) -> Optional[Task]:
+        """
+            Забирает самую срочную невыполненную задачу, присваивая ей новый статус.
+
+            Args:
+                status (Status): Новый статус задачи.
+
+            Returns:
+                Optional[Task]: Задача или None, если невыполненных задач нет.
+        """
+        return await self._mutate(self.manager.pop_next, status)
+
+    async def get_tasks_due_between(self, start: str, end: str) -> List[Task]:
+        """
+            Получает задачи со сроком выполнения в диапазоне дат включительно.
+
+            Args:
+                start (str): Начало диапазона в формате YYYY-MM-DD.
+                end (str): Конец диапазона в формате YYYY-MM-DD.
+
+            Returns:
+                List[Task]: Задачи, упорядоченные по сроку выполнения.
+        """
+        return await self._call(self.manager.get_tasks_due_between, start, end)
+
+    async def get_overdue_tasks(self, today: Optional[str] = None) -> List[Task]:
+        """
+            Получает невыполненные задачи, срок выполнения которых уже прошел.
+
+            Args:
+                today (Optional[str]): Текущая дата в формате YYYY-MM-DD (по умолчанию - сегодня).
+
+            Returns:
+                List[Task]: Просроченные задачи.
+        """
+        return await self._call(self.manager.get_overdue_tasks, today)
+
+    async def update_task(self, task_id: int, **kwargs) -> bool:
+        """
+            Обновляет данные задачи по ее ID.
+
+            Args:
+                task_id (int): ID задачи для обновления.
+                **kwargs: Ключи и значения, которые будут обновлены.
+
+            Returns:
+                bool: True, если задача успешно обновлена, иначе False.
+        """
+        return await self._mutate(self.manager.update_task, task_id, **kwargs)
+
+    async def delete_task_by_id(self, task_id: int) -> None:
+        """
+            Удаляет задачу по ее ID.
+
+            Args:
+                task_id (int): ID задачи для удаления.
+        """
+        await self._mutate(self.manager.delete_task_by_id, task_id)
+
+    async def delete_task_by_category(self, category: str) -> None:
+        """
+            Удаляет задачи по категории.
+
+            Args:
+                category (str): Категория задач для удаления.
+        """
+        await self._mutate(self.manager.delete_task_by_category, category)
+
+    async def batch(self, function: Callable[[TaskManager], Any]) -> Any:
+        """
+            Выполняет группу изменений одним вызовом внутри TaskManager.batch(): другие операции
+            не вклиниваются между изменениями группы, а сами изменения сохраняются одной записью.
+            Группа не откатывается при ошибке, поэтому входные данные нужно проверить заранее.
+
+            Args:
+                function (Callable[[TaskManager], Any]): Функция, изменяющая задачи через переданный менеджер.
+
+            Returns:
+                Any: Результат функции.
+        """
+        def run():
+            with self.manager.batch() as manager:
+                return function(manager)
+
+        return await self._mutate(run)
+
+    async def add_tasks(self, tasks: Iterable[Task]) -> int:
+        """
+            Добавляет несколько задач.
+
+            Args:
+                tasks (Iterable[Task]): Задачи для добавления.
+
+            Returns:
+                int: Количество добавленных задач.
+        """
+        return await self._mutate(self.manager.add_tasks, tasks)
+
+    async def update_many(self, selector: Union[Callable[[Task], bool], Iterable[int]], **kwargs) -> int:
+        """
+            Обновляет несколько задач.
+
+            Args:
+                selector (Union[Callable[[Task], bool], Iterable[int]]): Условие отбора задач или список их ID.
+                **kwargs: Ключи и значения, которые будут обновлены.
+
+            Returns:
+                int: Количество обновленных задач.
+        """
+        return await self._mutate(self.manager.update_many, selector, **kwargs)
+
+    async def delete_many(self, task_ids: Iterable[int]) -> int:
+        """
+            Удаляет несколько задач по ID.
+
+            Args:
+                task_ids (Iterable[int]): ID задач для удаления.
+
+            Returns:
+                int: Количество удаленных задач.
+        """
+        return await self._mutate(self.manager.delete_many, task_ids)
+
+    async def import_tasks(self, file_path: str) -> int:
+        """
+            Импортирует задачи из файла JSON или CSV другой системы. Файл читается в пуле потоков.
+
+            Args:
+                file_path (str): Путь к импортируемому файлу.
+
+            Returns:
+                int: Количество импортированных задач.
+        """
+        tasks = await self._in_executor(lambda: list(DataHandler(file_path).import_tasks()))
+        return await self.add_tasks(tasks)
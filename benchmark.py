@@ -0,0 +1,345 @@
+import argparse
+import json
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from task import Task, Priority, Status
+from data_handler import DataHandler
+from task_manager import TaskManager
+
+CATEGORIES = ["Работа", "Дом", "Учеба", "Здоровье", "Покупки", "Финансы", "Обучение", "Путешествия"]
+VERBS = ["Подготовить", "Изучить", "Купить", "Написать", "Проверить", "Обсудить", "Оплатить", "Заказать"]
+OBJECTS = ["отчет", "документацию", "продукты", "письмо", "презентацию", "счета", "билеты", "план проекта"]
+DETAILS = ["до конца недели", "с командой", "по FastAPI", "для клиента", "к совещанию", "в личном кабинете"]
+
+# Форматы файла для замеров: имя -> (расширение, сериализатор)
+FORMATS = {
+    "json": (".json", "json"),
+    "json-compact": (".json", "json-compact"),
+    "msgpack": (".msgpack", "msgpack"),
+    "csv": (".csv", None),
+}
+
+# Комбинации фильтров search_tasks: имя -> аргументы
+SEARCH_FILTERS = {
+    "all": {},
+    "keyword": {"keyword": "отчет"},
+    "category": {"category": "работа"},
+    "status": {"status": Status.NOT_DONE},
+    "keyword+category": {"keyword": "отчет", "category": "работа"},
+    "keyword+status": {"keyword": "отчет", "status": Status.NOT_DONE},
+    "category+status": {"category": "работа", "status": Status.NOT_DONE},
+    "keyword+category+status": {"keyword": "отчет", "category": "работа", "status": Status.NOT_DONE},
+}
+
+
+def generate_records(count: int, seed: int = 0) -> List[Dict]:
+    """
+        Генерирует синтетические задачи с реалистичными русскими названиями, категориями и датами.
+
+        Args:
+            count (int): Количество задач.
+            seed (int): Начальное значение генератора случайных чисел.
+
+        Returns:
+            List[Dict]: Записи задач в формате Task.to_dict.
+    """
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    priorities, statuses = Priority.list_values(), Status.list_values()
+    return [
+        {
+            "id": task_id,
+            "title": f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}",
+            "description": f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(DETAILS)}",
+            "category": rng.choice(CATEGORIES),
+            "due_date": (start + timedelta(days=rng.randrange(730))).isoformat(),
+            "priority": rng.choice(priorities),
+            "status": rng.choice(statuses),
+        }
+        for task_id in range(1, count + 1)
+    ]
+
+
+def timed(function: Callable, *args, **kwargs) -> Tuple[object, float]:
+    """
+        Выполняет функцию и замеряет время выполнения.
+
+        Returns:
+            Tuple[object, float]: Результат функции и время в секундах.
+    """
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def result(benchmark: str, data_format: str, size: int, seconds: float, ops: int = 1,
+           peak_bytes: Optional[int] = None) -> Dict:
+    """
+        Формирует строку результата замера.
+
+        Args:
+            benchmark (str): Имя замера.
+            data_format (str): Формат файла данных.
+            size (int): Количество задач.
+            seconds (float): Общее время замера.
+            ops (int): Количество операций в замере.
+            peak_bytes (Optional[int]): Пиковый объем памяти по tracemalloc.
+
+        Returns:
+            Dict: Результат замера.
+    """
+    return {
+        "benchmark": benchmark,
+        "format": data_format,
+        "size": size,
+        "ops": ops,
+        "seconds": round(seconds, 6),
+        "us_per_op": round(seconds / ops * 1e6, 2),
+        "peak_bytes": peak_bytes,
+    }
+
+
+def peak_memory(function: Callable, *args, **kwargs) -> int:
+    """
+        Выполняет функцию под tracemalloc и возвращает пиковый объем выделенной памяти.
+        Выполняется отдельным прогоном, чтобы трассировка не искажала замер времени.
+
+        Returns:
+            int: Пиковый объем памяти в байтах.
+    """
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def fresh_manager(file_path: Path, serializer: Optional[str] = None) -> TaskManager:
+    """
+        Создает менеджер задач для файла замера, загружая его заново.
+
+        Args:
+            file_path (Path): Файл с данными.
+            serializer (Optional[str]): Формат сериализации файла.
+
+        Returns:
+            TaskManager: Менеджер задач.
+    """
+    return TaskManager(data_handler=DataHandler(file_path, serializer=serializer))
+
+
+def bench_manager(size: int, data_format: str, directory: Path, ops: int, write_ops: int, memory: bool) -> List[Dict]:
+    """
+        Замеряет операции TaskManager и DataHandler на наборе задач заданного размера.
+
+        Args:
+            size (int): Количество задач.
+            data_format (str): Формат файла данных (ключ FORMATS).
+            directory (Path): Каталог для временных файлов.
+            ops (int): Количество операций чтения (get_task) в замере.
+            write_ops (int): Количество изменяющих операций в замере (каждая сохраняет файл).
+            memory (bool): Замерять пиковый объем памяти загрузки, сохранения и поиска.
+
+        Returns:
+            List[Dict]: Результаты замеров.
+    """
+    extension, serializer = FORMATS[data_format]
+    file_path = directory / f"manager-{data_format}-{size}{extension}"
+    DataHandler(file_path, serializer=serializer).save(Task.from_dict(record, lazy=True) for record in generate_records(size))
+    rng = random.Random(size)
+    results = []
+
+    def measure(benchmark: str, function: Callable, count: int = 1, trace: bool = False) -> None:
+        _, seconds = timed(function)
+        peak = peak_memory(function) if memory and trace else None
+        results.append(result(benchmark, data_format, size, seconds, count, peak))
+
+    measure("manager.load", lambda: fresh_manager(file_path, serializer), trace=True)
+    manager = fresh_manager(file_path, serializer)
+    measure("data_handler.save", lambda: manager.data_handler.save(manager.tasks), trace=True)
+
+    ids = [rng.randint(1, size) for _ in range(ops)]
+    measure("manager.get_task", lambda: [manager.get_task(task_id) for task_id in ids], ops)
+    for name, filters in SEARCH_FILTERS.items():
+        measure(f"manager.search_tasks[{name}]", lambda: manager.search_tasks(**filters), trace=True)
+
+    write_ids = rng.sample(range(1, size + 1), write_ops * 2)
+    update_ids, delete_ids = write_ids[:write_ops], write_ids[write_ops:]
+    statuses = Status.list_values()
+    measure("manager.update_task",
+            lambda: [manager.update_task(task_id, status=rng.choice(statuses)) for task_id in update_ids], write_ops)
+    measure("manager.delete_task_by_id", lambda: [manager.delete_task_by_id(task_id) for task_id in delete_ids], write_ops)
+    measure("manager.delete_task_by_category", lambda: manager.delete_task_by_category(CATEGORIES[0]))
+    return results
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> bool:
+    """
+        Сравнивает результаты с сохраненным прогоном и печатает отношение времени.
+
+        Args:
+            results (List[Dict]): Текущие результаты.
+            baseline (Dict): Отчет предыдущего прогона.
+            threshold (float): Допустимое замедление (например, 1.2 - на 20%).
+
+        Returns:
+            bool: True, если ни один замер не замедлился сильнее допустимого.
+    """
+    previous = {(row["benchmark"], row["format"], row["size"]): row for row in baseline["results"]}
+    passed = True
+    for row in results:
+        old = previous.get((row["benchmark"], row["format"], row["size"]))
+        if old is None or not old["us_per_op"]:
+            continue
+        ratio = row["us_per_op"] / old["us_per_op"]
+        regression = ratio > threshold
+        passed &= not regression
+        print(
+            f"{'РЕГРЕССИЯ' if regression else 'ок':>9}  {ratio:6.2f}x  "
+            f"{row['benchmark']} [{row['format']}, {row['size']}]",
+            file=sys.stderr
+        )
+    return passed
+
+
+def bench_serialization(size: int, directory: Path) -> List[Dict]:
+    """
+        Замеряет пропускную способность сохранения и загрузки для каждого формата файла.
+
+        Args:
+            size (int): Количество задач.
+            directory (Path): Каталог для временных файлов.
+
+        Returns:
+            List[Dict]: Результаты замеров.
+    """
+    tasks = [Task.from_dict(record) for record in generate_records(size)]
+    results = []
+    for name, (extension, serializer) in FORMATS.items():
+        handler = DataHandler(directory / f"bench-{name}{extension}", serializer=serializer)
+        _, save_seconds = timed(handler.save, tasks)
+        _, load_seconds = timed(handler.load)
+        file_size = handler.file_path.stat().st_size
+        for operation, seconds in (("save", save_seconds), ("load", load_seconds)):
+            row = result(f"serialization.{operation}", name, size, seconds, size)
+            row.update(tasks_per_second=round(size / seconds) if seconds else None, bytes=file_size)
+            results.append(row)
+    return results
+
+
+def import_time(module: str) -> float:
+    """
+        Замеряет время импорта модуля в отдельном процессе по отчету python -X importtime.
+
+        Args:
+            module (str): Имя модуля.
+
+        Returns:
+            float: Суммарное время импорта модуля вместе с зависимостями в секундах.
+
+        Raises:
+            RuntimeError: Если в отчете importtime нет строки для модуля.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=Path(__file__).resolve().parent, capture_output=True, text=True, check=True
+    )
+    # Строка отчета: "import time: <собственное, мкс> | <вместе с зависимостями, мкс> | <модуль>"
+    match = re.search(rf"^import time:\s*\d+ \|\s*(\d+) \| {re.escape(module)}$", process.stderr, re.MULTILINE)
+    if match is None:
+        raise RuntimeError(f"В отчете python -X importtime нет строки для модуля {module}:\n{process.stderr[-2000:]}")
+    return int(match.group(1)) / 1e6
+
+
+def bench_startup(size: int, directory: Path, runs: int = 5) -> List[Dict]:
+    """
+        Замеряет запуск main.py в отдельных процессах: время импорта модулей, выход из меню
+        без обращения к задачам и команду поиска с разбором файла данных и с кэшем загрузки.
+        Из нескольких прогонов берется минимальное время, наименее искаженное шумом системы.
+
+        Args:
+            size (int): Количество задач.
+            directory (Path): Каталог для временных файлов.
+            runs (int): Количество прогонов каждого замера.
+
+        Returns:
+            List[Dict]: Результаты замеров.
+    """
+    data_file = directory / "startup.json"
+    data_file.write_text(json.dumps(generate_records(size), ensure_ascii=False), encoding="utf-8")
+    cache_file = data_file.with_name(data_file.name + ".cache")
+    main_py = str(Path(__file__).resolve().parent / "main.py")
+
+    def run_main(args: List[str], stdin: str = "", drop_cache: bool = False) -> float:
+        if drop_cache:
+            cache_file.unlink(missing_ok=True)
+        _, seconds = timed(
+            subprocess.run, [sys.executable, main_py, "--data", str(data_file), *args],
+            input=stdin, capture_output=True, text=True, check=True
+        )
+        return seconds
+
+    search = ["search", "--keyword", "отчет", "--limit", "1"]
+    measurements = {
+        "startup.import": lambda: import_time("main"),
+        "startup.menu_exit": lambda: run_main([], stdin="0\n"),
+        "startup.search.parse": lambda: run_main(search, drop_cache=True),
+        "startup.search.cached": lambda: run_main(search),
+    }
+    run_main(search) # Прогрев: кэш загрузки и байт-код модулей
+    return [
+        result(benchmark, "json", size, min(measure() for _ in range(runs)))
+        for benchmark, measure in measurements.items()
+    ]
+
+
+def main() -> None:
+    """
+        Запускает замеры и выводит результаты в формате JSON.
+    """
+    parser = argparse.ArgumentParser(description="Замеры производительности менеджера задач")
+    parser.add_argument("--suite", choices=["manager", "serialization", "startup", "all"], default="all", help="Набор замеров")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="Количество задач (например, 1000 10000 100000 1000000)")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=["json", "csv"],
+                        help="Форматы файла данных для замеров TaskManager")
+    parser.add_argument("--ops", type=int, default=1000, help="Количество операций чтения в замере")
+    parser.add_argument("--write-ops", type=int, default=5, help="Количество изменяющих операций в замере")
+    parser.add_argument("--no-memory", action="store_true", help="Не замерять пиковый объем памяти")
+    parser.add_argument("--output", type=Path, help="Файл для сохранения результатов (по умолчанию - stdout)")
+    parser.add_argument("--compare", type=Path, help="Отчет предыдущего прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Допустимое замедление при сравнении")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            if args.suite in ("manager", "all"):
+                for data_format in args.formats:
+                    results += bench_manager(size, data_format, Path(directory), args.ops, args.write_ops,
+                                             not args.no_memory)
+            if args.suite in ("serialization", "all"):
+                results += bench_serialization(size, Path(directory))
+            if args.suite in ("startup", "all"):
+                results += bench_startup(size, Path(directory))
+    report = json.dumps({"python": sys.version.split()[0], "results": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(report, encoding="utf-8")
+    else:
+        print(report)
+    if args.compare and not compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict, Optional, TextIO
+
+from task import Priority, Status
+from data_handler import DataHandler
+from task_manager import TaskManager, SORT_KEYS
+
+TASK_FIELDS = ("title", "description", "category", "due_date", "priority", "status") # Изменяемые поля задачи
+
+
+def _fields(command: Dict) -> Dict:
+    """
+        Отбирает поля задачи из команды и проверяет значения приоритета и статуса.
+        В отличие от TaskManager.update_task, недопустимое значение не пропускается молча.
+
+        Args:
+            command (Dict): Команда с полями задачи.
+
+        Returns:
+            Dict: Поля задачи.
+
+        Raises:
+            ValueError: Если в команде есть неизвестные поля или недопустимые значения.
+    """
+    unknown = set(command) - set(TASK_FIELDS) - {"op", "id"}
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}. Допустимые поля: {', '.join(TASK_FIELDS)}")
+    fields = {key: command[key] for key in TASK_FIELDS if command.get(key) is not None}
+    if "priority" in fields:
+        fields["priority"] = Priority(fields["priority"])
+    if "status" in fields:
+        fields["status"] = Status(fields["status"])
+    return fields
+
+
+def execute(manager: TaskManager, command: Dict) -> Any:
+    """
+        Выполняет одну команду над менеджером задач.
+
+        Команды (поле op):
+            add     - создать задачу: title, description, category, due_date, priority, [status]
+            update  - изменить задачу: id и изменяемые поля
+            delete  - удалить задачи: id (число или список) или category
+            search  - найти задачи: keyword, category, status, priority, sort, offset, limit
+            import  - импортировать задачи из файла: file
+            export  - сохранить задачи в файл (формат по расширению): file
+
+        Args:
+            manager (TaskManager): Менеджер задач.
+            command (Dict): Команда.
+
+        Returns:
+            Any: Результат команды, который кодируется в JSON.
+
+        Raises:
+            ValueError: Если команда или ее аргументы некорректны.
+            LookupError: Если изменяемая задача не найдена.
+    """
+    match command.get("op"):
+        case "add":
+            return manager.create_task(**_fields(command)).to_dict()
+        case "update":
+            task_id = command.get("id")
+            if not isinstance(task_id, int):
+                raise ValueError("Для изменения задачи нужен целый ID (поле id).")
+            if not manager.update_task(task_id, **_fields(command)):
+                raise LookupError(f"Задача с ID {task_id} не найдена.")
+            return manager.get_task(task_id).to_dict()
+        case "delete":
+            if command.get("category"):
+                count = len(manager.get_tasks_by_category(command["category"]))
+                manager.delete_task_by_category(command["category"])
+                return {"deleted": count}
+            ids = command.get("id")
+            ids = [ids] if isinstance(ids, int) else ids
+            if not isinstance(ids, list) or not all(isinstance(task_id, int) for task_id in ids):
+                raise ValueError("Для удаления нужен ID, список ID (поле id) или категория (поле category).")
+            return {"deleted": manager.delete_many(ids)}
+        case "search":
+            if command.get("sort") and command["sort"] not in SORT_KEYS:
+                raise ValueError(f"Неизвестный ключ сортировки: {command['sort']}. Допустимые значения: {', '.join(SORT_KEYS)}")
+            tasks = manager.iter_search(
+                keyword=command.get("keyword") or "",
+                category=command.get("category") or "",
+                status=Status(command["status"]) if command.get("status") else None,
+                priority=Priority(command["priority"]) if command.get("priority") else None,
+                sort_by=command.get("sort") or None,
+                offset=command.get("offset") or 0,
+                limit=command.get("limit")
+            )
+            return [task.to_dict() for task in tasks]
+        case "import":
+            return {"imported": manager.import_tasks(command["file"])}
+        case "export":
+            tasks = manager.tasks
+            DataHandler(command["file"]).save(tasks)
+            return {"exported": len(tasks)}
+        case op:
+            raise ValueError(f"Неизвестная команда: {op}")
+
+
+def run_batch(manager: TaskManager, lines: TextIO, out: TextIO) -> int:
+    """
+        Выполняет команды в формате JSON-lines и пишет по одной строке результата на команду.
+        Все изменения применяются внутри одного batch() и сохраняются один раз в конце.
+        Ошибка в команде не прерывает обработку: в результат попадает текст ошибки.
+
+        Args:
+            manager (TaskManager): Менеджер задач.
+            lines (TextIO): Входной поток команд (по одному объекту JSON в строке).
+            out (TextIO): Поток для результатов.
+
+        Returns:
+            int: Количество команд, завершившихся ошибкой.
+    """
+    errors = 0
+    with manager.batch():
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                command = json.loads(line)
+                if not isinstance(command, dict):
+                    raise ValueError("Команда должна быть объектом JSON.")
+                record = {"line": number, "ok": True, "result": execute(manager, command)}
+            except Exception as error:
+                errors += 1
+                record = {"line": number, "ok": False, "error": str(error) or type(error).__name__}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return errors
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+        Создает разбор аргументов командной строки.
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Менеджер задач. Без команды и --batch запускается интерактивное меню."
+    )
+    parser.add_argument("--data", default="data.json", help="Файл с данными (по умолчанию data.json)")
+    parser.add_argument("--archive-after-days", type=int, metavar="DAYS",
+                        help="Переносить в архив выполненные задачи со сроком старше указанного числа дней")
+    parser.add_argument("--batch", action="store_true",
+                        help="Читать команды JSON-lines из stdin и писать результаты JSON-lines в stdout")
+    commands = parser.add_subparsers(dest="op")
+
+    add = commands.add_parser("add", help="Добавить задачу")
+    add.add_argument("--title", required=True)
+    add.add_argument("--description", default="")
+    add.add_argument("--category", required=True)
+    add.add_argument("--due-date", dest="due_date", required=True, help="Срок выполнения (ГГГГ-ММ-ДД)")
+    add.add_argument("--priority", required=True, choices=Priority.list_values())
+    add.add_argument("--status", choices=Status.list_values())
+
+    update = commands.add_parser("update", help="Изменить задачу")
+    update.add_argument("id", type=int)
+    update.add_argument("--title")
+    update.add_argument("--description")
+    update.add_argument("--category")
+    update.add_argument("--due-date", dest="due_date", help="Срок выполнения (ГГГГ-ММ-ДД)")
+    update.add_argument("--priority", choices=Priority.list_values())
+    update.add_argument("--status", choices=Status.list_values())
+
+    delete = commands.add_parser("delete", help="Удалить задачи по ID или по категории")
+    delete.add_argument("id", type=int, nargs="*")
+    delete.add_argument("--category")
+
+    search = commands.add_parser("search", help="Найти задачи (результат - JSON-lines, по задаче в строке)")
+    search.add_argument("--keyword")
+    search.add_argument("--category")
+    search.add_argument("--status", choices=Status.list_values())
+    search.add_argument("--priority", choices=Priority.list_values())
+    search.add_argument("--sort", choices=list(SORT_KEYS))
+    search.add_argument("--offset", type=int, default=0)
+    search.add_argument("--limit", type=int)
+
+    import_ = commands.add_parser("import", help="Импортировать задачи из файла JSON или CSV")
+    import_.add_argument("file")
+
+    export = commands.add_parser("export", help="Сохранить задачи в файл (формат по расширению)")
+    export.add_argument("file")
+    return parser
+
+
+def run(args: argparse.Namespace, stdin: Optional[TextIO] = None, stdout: Optional[TextIO] = None) -> int:
+    """
+        Выполняет команду командной строки или пакет команд из stdin.
+
+        Args:
+            args (argparse.Namespace): Разобранные аргументы (см. build_parser).
+            stdin (Optional[TextIO]): Входной поток (по умолчанию sys.stdin).
+            stdout (Optional[TextIO]): Поток вывода (по умолчанию sys.stdout).
+
+        Returns:
+            int: Код завершения: 0 - успех, 1 - ошибка команды, 2 - некорректные аргументы.
+    """
+    stdin, stdout = stdin or sys.stdin, stdout or sys.stdout
+    if args.batch and args.op:
+        print("Команда не указывается вместе с --batch: команды читаются из stdin.", file=sys.stderr)
+        return 2
+    # Файл могут одновременно изменять другие процессы (например, интерактивное меню)
+    manager = TaskManager(data_handler=DataHandler(
+        args.data, shared=True, load_cache=True, archive_after_days=args.archive_after_days
+    ))
+    try:
+        if args.batch:
+            return 1 if run_batch(manager, stdin, stdout) else 0
+        command = {key: value for key, value in vars(args).items() if key not in ("data", "batch", "archive_after_days")}
+        try:
+            result = execute(manager, command)
+        except (ValueError, LookupError, OSError) as error:
+            print(f"Ошибка: {error}", file=sys.stderr)
+            return 1
+        if args.op == "search": # Задачи выводятся по одной в строке, как их удобно читать построчно
+            stdout.writelines(json.dumps(task, ensure_ascii=False) + "\n" for task in result)
+        else:
+            stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        return 0
+    finally:
+        manager.close()
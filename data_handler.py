@@ -1,15 +1,76 @@
+import io
 import json
-import csv
+import logging
+import marshal
+import os
+import threading
+import time
+import atexit
+from contextlib import contextmanager
+from datetime import date, timedelta
 from pathlib import Path
-from typing import List, Callable
+from typing import IO, TYPE_CHECKING, List, Callable, Iterable, Iterator, Optional, Dict, TextIO, Tuple
 from functools import wraps
 
-from task import Task
+# Модули csv и sqlite3 импортируются при первом обращении к файлу CSV или базе данных (архив - при его включении),
+# чтобы не замедлять запуск программы, работающей с файлом другого формата
+if TYPE_CHECKING:
+    import sqlite3
+    from archive import TaskArchive
+
+try: # Блокировка файлов между процессами (недоступна в Windows)
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from task import Task, TaskRecord, Priority, Status
+from serializers import DEFAULT_SERIALIZERS, get_serializer
+from instrumentation import REGISTRY, instrumented
+
+SQLITE_EXTENSIONS = (".db", ".sqlite") # Расширения файлов базы данных SQLite
+SERIALIZED_EXTENSIONS = tuple(DEFAULT_SERIALIZERS) # Расширения файлов, записываемых сериализаторами (JSON, msgpack)
+SUPPORTED_EXTENSIONS = SERIALIZED_EXTENSIONS + (".csv",) + SQLITE_EXTENSIONS
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        category TEXT NOT NULL,
+        category_key TEXT NOT NULL,
+        due_date TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        status TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS tasks_category ON tasks (category_key);
+    CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+    CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date);
+"""
+SQLITE_VERSION = 1 # Версия схемы базы данных (PRAGMA user_version)
+SQLITE_COLUMNS = "id, title, description, category, due_date, priority, status"
+LOAD_CACHE_VERSION = 1 # Версия формата кэша загрузки; кэш другой версии не используется
+CSV_FIELDS = ("id", "title", "description", "category", "due_date", "priority", "status") # Столбцы CSV (как в Task.to_dict)
+
+logger = logging.getLogger(__name__)
+
+class EncodedTasks(list):
+    """
+        Снимок набора задач для записи в другом потоке (см. DataHandler.snapshot):
+        записи задач, уже закодированные для формата файла, в порядке задач.
+    """
+    def __init__(self, key: str, records: Iterable[bytes]):
+        """
+            Args:
+                key (str): Имя формата записей (см. Task.fragment).
+                records (Iterable[bytes]): Закодированные записи.
+        """
+        super().__init__(records)
+        self.key = key
 
 def handle_extension(method: Callable) -> Callable:
     """
     Декоратор для проверки расширения файла перед выполнением метода.
-    Поддерживаются только файлы с расширениями .json и .csv.
+    Поддерживаются только файлы с расширениями .json, .msgpack, .csv, .db и .sqlite.
     
     Args:
         method (Callable): Метод, который будет обернут декоратором.
@@ -19,40 +80,284 @@ def handle_extension(method: Callable) -> Callable:
     """
     @wraps(method) # Сохраняем оригинальное имя метода и его документацию
     def wrapper(self, *args, **kwargs):
-        if self.extension not in [".json", ".csv"]: # Проверяем, что расширение файла поддерживаемое
+        if self.extension not in SUPPORTED_EXTENSIONS: # Проверяем, что расширение файла поддерживаемое
             raise ValueError("Неподдерживаемое расширение файла.")
         return method(self, *args, **kwargs) # Вызываем оригинальный метод
     return wrapper
+@instrumented
 class DataHandler:
     """
         Класс для обработки данных, сохранения и загрузки их из файлов.
-        Поддерживает форматы JSON и CSV.
+        Поддерживает форматы JSON, MessagePack, CSV и базу данных SQLite.
     """
     
-    def __init__(self, file_path: str):
+    def __init__(
+        self,
+        file_path: str,
+        journal: bool = False,
+        compact_threshold: int = 1024 * 1024,
+        write_behind_ms: Optional[int] = None,
+        serializer: Optional[str] = None,
+        shared: bool = False,
+        load_cache: bool = False,
+        archive_after_days: Optional[int] = None
+    ):
         """
             Инициализация DataHandler с путем к файлу.
             
             Args:
                 file_path (str): Путь к файлу, в котором будут сохраняться или из которого будут загружаться данные.
+                journal (bool): Включает журналируемый режим: изменения дописываются в журнал (JSON-lines),
+                    а файл данных служит снимком и перезаписывается только при сжатии журнала.
+                compact_threshold (int): Размер журнала в байтах, после которого запускается фоновое сжатие.
+                write_behind_ms (Optional[int]): Включает отложенную запись: изменения только помечают данные
+                    измененными, а фоновый поток сохраняет файл не чаще одного раза за указанное число миллисекунд
+                    и при завершении программы. Применяется к полной перезаписи файла (без журнала и SQLite).
+                serializer (Optional[str]): Имя формата из реестра serializers (например, "json-compact").
+                    По умолчанию выбирается по расширению файла: .json - JSON с отступами, .msgpack - MessagePack.
+                shared (bool): Файл используют несколько процессов. Цикл "чтение - изменение - запись" выполняется
+                    под рекомендательной блокировкой файла (fcntl), а изменения других процессов определяются
+                    по inode, времени изменения и размеру файла. Несовместим с отложенной записью.
+                load_cache (bool): Хранить рядом с файлом данных двоичный кэш загруженных задач (файл .cache).
+                    Пока inode, время изменения и размер файла данных совпадают с записанными в кэше,
+                    stream() берет задачи из кэша без разбора и валидации файла. Применяется к файлам
+                    JSON, MessagePack и CSV без журнала.
+                archive_after_days (Optional[int]): Включает архив выполненных задач (см. archive.TaskArchive):
+                    выполненные задачи, срок которых прошел больше указанного числа дней назад, переносятся
+                    из файла данных в сжатый архив рядом с ним (файл .archive.jsonl.gz).
+
+            Raises:
+                ValueError: Если shared передан вместе с write_behind_ms или архив включен для базы данных SQLite.
         """
+        if shared and write_behind_ms is not None:
+            raise ValueError("Отложенная запись не поддерживается для файла, общего для нескольких процессов.")
         self.file_path = Path(file_path) # Преобразуем строку в объект Path для удобства работы с файлом
         self.extension = self.file_path.suffix # Определяем расширение файла
+        if archive_after_days is not None and self.supports_queries:
+            raise ValueError("Архив выполненных задач не поддерживается для базы данных SQLite: поиск выполняет сама база.")
+        serializer = serializer or DEFAULT_SERIALIZERS.get(self.extension)
+        self.serializer = get_serializer(serializer) if serializer else None # Формат файла (кроме CSV и SQLite)
+        self.serializer_name = serializer # Имя формата - ключ закодированных записей, кэшируемых в задачах
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.journal_path = self.file_path.with_name(self.file_path.name + ".log") # Текущий журнал изменений
+        self.rotated_journal_path = self.file_path.with_name(self.file_path.name + ".log.1") # Журнал, который сжимается в снимок
+        self._journal_file = None # Открытый на дозапись файл журнала
+        self._journal_lock = threading.Lock() # Защищает журнал от одновременной дозаписи и ротации
+        self._compaction: Optional[threading.Thread] = None # Поток фонового сжатия журнала
+        self._connection: Optional["sqlite3.Connection"] = None # Соединение с SQLite (открывается при первом обращении)
+        self.write_behind_ms = write_behind_ms
+        self._pending: Optional[Iterable[Task]] = None # Задачи, ожидающие отложенной записи
+        self._dirty = threading.Event() # Есть несохраненные изменения
+        self._flush_lock = threading.Lock() # Не допускает одновременной записи файла двумя потоками
+        self._closed = False
+        self.shared = shared
+        self.lock_path = self.file_path.with_name(self.file_path.name + ".lock") # Файл блокировки между процессами
+        self.load_cache = load_cache
+        self.cache_path = self.file_path.with_name(self.file_path.name + ".cache") # Кэш загрузки
+        self.archive_after_days = archive_after_days
+        self.archive: Optional["TaskArchive"] = None # Архив выполненных задач (если включен)
+        if archive_after_days is not None:
+            from archive import TaskArchive
+            self.archive = TaskArchive(self.file_path.with_name(self.file_path.name + ".archive.jsonl.gz"))
+        self._lock_file: Optional[IO] = None
+        self._lock_depth = 0 # Глубина повторного захвата блокировки файла
+        self._process_lock = threading.RLock() # Потоки процесса захватывают блокировку файла по очереди
+        self._state: Optional[tuple] = None # Состояние файлов после последнего чтения или записи этим обработчиком
+        self._journal_offset = 0 # Позиция в журнале, до которой изменения уже известны
+        if write_behind_ms is not None:
+            threading.Thread(target=self._flush_loop, daemon=True).start()
+            atexit.register(self.flush) # Сохраняем отложенные изменения при завершении программы
+
+    @property
+    def supports_queries(self) -> bool:
+        """
+            Признак хранилища, которое выполняет поиск само, без загрузки всех задач в память.
+
+            Returns:
+                bool: True для базы данных SQLite.
+        """
+        return self.extension in SQLITE_EXTENSIONS
+
+    def archive_cutoff(self, today: Optional[str] = None) -> str:
+        """
+            Дата, раньше которой срок выполненной задачи должен истечь, чтобы задача ушла в архив.
+
+            Args:
+                today (Optional[str]): Текущая дата в формате YYYY-MM-DD (по умолчанию - сегодня).
+
+            Returns:
+                str: Дата в формате YYYY-MM-DD.
+        """
+        current = date.fromisoformat(today) if today else date.today()
+        return (current - timedelta(days=self.archive_after_days)).isoformat()
+
+    @contextmanager
+    def file_lock(self) -> Iterator[None]:
+        """
+            Монопольная блокировка файла данных между процессами на время цикла "чтение - изменение - запись".
+            Блокируется отдельный файл .lock, так как файл данных при сохранении подменяется новым.
+            Повторный захват тем же обработчиком допускается. Без shared (или без fcntl) ничего не делает.
+        """
+        if not self.shared or fcntl is None:
+            yield
+            return
+        with self._process_lock:
+            if not self._lock_depth:
+                self._lock_file = self.lock_path.open("a")
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX) # Ждем, пока другой процесс закончит запись
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if not self._lock_depth:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
 
-    def save_to_json(self, tasks: List[Task]) -> None:
+    @staticmethod
+    def _stat(path: Path) -> Optional[Tuple[int, int, int]]:
+        """
+            Возвращает признаки версии файла: inode, время изменения в наносекундах и размер.
+            Файл при сохранении подменяется новым, поэтому inode меняется даже при совпадении времени и размера.
+        """
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _file_state(self) -> tuple:
+        """
+            Текущее состояние файла данных и журнала.
         """
-            Сохраняет список задач в файл формата JSON.
+        return self._stat(self.file_path), self._stat(self.journal_path) if self.journal else None
+
+    def _remember(self) -> None:
+        """
+            Запоминает состояние файлов после чтения или записи этим обработчиком.
+        """
+        if self.shared:
+            self._state = self._file_state()
+            self._journal_offset = self._state[1][2] if self._state[1] else 0
+
+    def changed_on_disk(self) -> bool:
+        """
+            Проверяет, изменил ли файл данных другой процесс после последнего чтения или записи.
+
+            Returns:
+                bool: True, если файл изменен извне (только для shared, кроме SQLite).
+        """
+        return self.shared and not self.supports_queries and self._file_state() != self._state
+
+    def read_changes(self, known: Dict[int, Task]) -> Tuple[List[Task], List[int]]:
+        """
+            Читает изменения, внесенные в файл другими процессами, без полной перезагрузки задач.
+            В журналируемом режиме читается только хвост журнала после запомненной позиции.
+            Иначе записи файла сравниваются с задачами в памяти, и задачи создаются только для отличающихся записей.
+
+            Args:
+                known (Dict[int, Task]): Задачи в памяти по ID.
+
+            Returns:
+                Tuple[List[Task], List[int]]: Добавленные или измененные задачи и ID удаленных задач.
+        """
+        snapshot, journal = self._file_state()
+        known_journal = self._state[1] if self._state else None
+        appended = journal is not None and (
+            known_journal is None or (journal[0] == known_journal[0] and journal[2] >= self._journal_offset)
+        ) # Журнал создан или дописан после последнего чтения, но не сжат
+        if self.journal and self._state and snapshot == self._state[0] and appended:
+            changes: Dict[int, Optional[Task]] = {} # ID -> новая задача или None для удаленной
+            with self.journal_path.open("rb") as file:
+                file.seek(self._journal_offset) # Журнал только дописывается - читаем новые записи
+                for record in self._journal_records(file):
+                    if record["op"] == "put":
+                        changes[record["task"]["id"]] = Task.from_dict(record["task"], lazy=True)
+                    elif record["op"] == "delete":
+                        changes.update(dict.fromkeys(record["ids"]))
+            changed = [task for task in changes.values() if task is not None]
+            deleted = [task_id for task_id, task in changes.items() if task is None and task_id in known]
+        else: # Файл перезаписан целиком (или журнал сжат) - сравниваем записи с задачами в памяти
+            records = (task.to_dict() for task in self.load_journaled()) if self.journal else self.iter_records()
+            changed, seen = [], set()
+            for record in records:
+                record["id"] = task_id = int(record["id"]) # В CSV ID хранится строкой
+                seen.add(task_id)
+                task = known.get(task_id)
+                if task is None or task.to_dict() != record:
+                    changed.append(Task.from_dict(record, lazy=True))
+            deleted = [task_id for task_id in known if task_id not in seen]
+        self._remember()
+        return changed, deleted
+
+    def save_serialized(self, tasks: Iterable[Task], file_path: Optional[Path] = None) -> None:
+        """
+            Сохраняет список задач в файл в формате сериализатора обработчика (JSON, MessagePack).
+            Если формат умеет собирать файл из отдельных записей, заново кодируются только измененные задачи,
+            а записи остальных берутся из кэша задач.
             
             Args:
-                tasks (List[Task]): Список задач для сохранения.
+                tasks (Iterable[Task]): Список задач для сохранения.
+                file_path (Optional[Path]): Файл для записи (по умолчанию - файл обработчика).
         """
-        data = [task.to_dict() for task in tasks] # Преобразуем каждую задачу в словарь
-        with self.file_path.open("w") as file: # Открываем файл для записи
-            json.dump(data, file, indent=4, ensure_ascii=False) # Сохраняем данные в JSON формате
+        serializer = self.serializer
+        if serializer.dump_item is not None and serializer.join is not None:
+            data = serializer.join(self._fragments(tasks, self.serializer_name, serializer.dump_item))
+        else:
+            data = serializer.dumps([task.to_dict() for task in tasks]) # Преобразуем задачи в словари и кодируем
+        with (file_path or self.file_path).open("wb") as file: # Открываем файл для записи
+            file.write(data)
+            self._sync(file)
     
-    def load_from_json(self) -> List[Task]:
+    @staticmethod
+    def _fragments(tasks: Iterable[Task], key: str, encode: Callable[[Dict], bytes]) -> List[bytes]:
+        """
+            Записи задач, закодированные для формата key: из снимка EncodedTasks или из кэша задач.
+        """
+        if isinstance(tasks, EncodedTasks) and tasks.key == key:
+            return tasks
+        return [task.fragment(key, encode) for task in tasks]
+
+    @staticmethod
+    def _temp_path(target: Path) -> Path:
+        """
+            Имя временного файла для атомарной записи target. Файл могут одновременно записывать
+            несколько процессов и несколько потоков процесса (сжатие журнала, отложенная запись,
+            пул потоков), поэтому имя уникально для потока.
+        """
+        return target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    @staticmethod
+    def _sync_directory(directory: Path) -> None:
+        """
+            Сбрасывает на диск запись каталога, чтобы переименование файла пережило сбой питания.
+            В Windows каталог нельзя открыть как файл - там сброс пропускается.
+        """
+        try:
+            descriptor = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    @staticmethod
+    def _sync(file: IO) -> None:
+        """
+            Сбрасывает данные файла на диск перед его закрытием.
+
+            Args:
+                file (IO): Открытый на запись файл.
+        """
+        file.flush()
+        os.fsync(file.fileno())
+
+    def load_serialized(self) -> List[Task]:
         """
-            Загружает список задач из файла формата JSON.
+            Загружает список задач из файла в формате сериализатора обработчика (JSON, MessagePack).
             
             Returns:
                 List[Task]: Список задач, загруженных из файла.
@@ -62,21 +367,46 @@ class DataHandler:
         """
         if not self.file_path.exists():
             raise FileNotFoundError(f"Файл {self.file_path} не найден.") # Если файл не найден, выбрасываем исключение
-        with self.file_path.open("r") as file:
-            data = json.load(file) # Загружаем данные из файла
+        data = self.serializer.loads(self.file_path.read_bytes()) # Загружаем данные из файла
         return [Task.from_dict(task) for task in data] # Преобразуем данные в объекты Task
     
-    def save_to_csv(self, tasks: List[Task]) -> None:
+    def save_to_csv(self, tasks: Iterable[Task], file_path: Optional[Path] = None) -> None:
         """
             Сохраняет список задач в файл формата CSV.
+            Строки неизмененных задач берутся из кэша задач, заново кодируются только измененные.
             
             Args:
-                tasks (List[Task]): Список задач для сохранения.
+                tasks (Iterable[Task]): Список задач для сохранения.
+                file_path (Optional[Path]): Файл для записи (по умолчанию - файл обработчика).
         """
-        with self.file_path.open("w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=tasks[0].to_dict().keys() if tasks else [])
-            writer.writeheader() # Пишем заголовки для столбцов
-            writer.writerows(task.to_dict() for task in tasks) # Записываем данные задач
+        rows = self._fragments(tasks, "csv", self._csv_row)
+        with (file_path or self.file_path).open("wb") as file:
+            file.write(self._csv_line(CSV_FIELDS) if rows else b"\r\n") # Строка заголовков столбцов
+            file.write(b"".join(rows)) # Записываем данные задач
+            self._sync(file)
+
+    @staticmethod
+    def _csv_line(values: Iterable) -> bytes:
+        """
+            Кодирует одну строку CSV так же, как ее записывает csv.writer.
+
+            Args:
+                values (Iterable): Значения столбцов.
+
+            Returns:
+                bytes: Строка CSV с переводом строки в кодировке UTF-8.
+        """
+        import csv
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue().encode("utf-8")
+
+    @classmethod
+    def _csv_row(cls, record: Dict) -> bytes:
+        """
+            Кодирует запись задачи в строку CSV в порядке CSV_FIELDS.
+        """
+        return cls._csv_line(record[field] for field in CSV_FIELDS)
     
     def load_from_csv(self) -> List[Task]:
         """
@@ -90,34 +420,708 @@ class DataHandler:
         """
         if not self.file_path.exists():
             raise FileNotFoundError(f"Файл {self.file_path} не найден.") # Если файл не найден, выбрасываем исключение
+        import csv
         with self.file_path.open("r", encoding="utf-8") as file:
             rows = csv.DictReader(file) # Читаем строки из CSV
             return [Task.from_dict(row) for row in rows] # Преобразуем строки в объекты Task
         
+    @staticmethod
+    def iter_json_array(file: TextIO, chunk_size: int = 64 * 1024) -> Iterator[Dict]:
+        """
+            Инкрементально разбирает JSON-массив объектов, читая файл частями.
+            Элементы выдаются по мере чтения, весь файл в память не загружается.
+
+            Args:
+                file (TextIO): Открытый файл с JSON-массивом.
+                chunk_size (int): Размер читаемой части файла в символах.
+
+            Yields:
+                Dict: Очередной элемент массива.
+
+            Raises:
+                ValueError: Если файл не является JSON-массивом.
+        """
+        decoder = json.JSONDecoder()
+        buffer, position, eof = "", 0, False
+
+        def skip(chars: str) -> bool:
+            """
+                Пропускает символы-разделители, при необходимости дочитывая файл.
+                Возвращает False, если файл закончился.
+            """
+            nonlocal buffer, position, eof
+            while True:
+                while position < len(buffer) and buffer[position] in chars:
+                    position += 1
+                if position < len(buffer):
+                    return True
+                if eof:
+                    return False
+                buffer, position = file.read(chunk_size), 0
+                eof = not buffer
+
+        if not skip(" \t\r\n"):
+            return # Пустой файл
+        if buffer[position] != "[":
+            raise ValueError(f"Файл {file.name} не содержит JSON-массив.")
+        position += 1
+        while skip(" \t\r\n,"):
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = file.read(chunk_size) # Элемент не поместился в буфер - дочитываем файл
+                buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+                continue
+            yield item
+            position = end
+        raise ValueError(f"Файл {file.name} обрывается до конца JSON-массива.")
+
+    @handle_extension
+    def iter_records(self) -> Iterator[Dict]:
+        """
+            Потоково читает записи задач из файла в виде словарей.
+
+            Yields:
+                Dict: Данные очередной задачи.
+
+            Raises:
+                FileNotFoundError: Если файл не существует.
+        """
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"Файл {self.file_path} не найден.")
+        if self.extension == ".json":
+            with self.file_path.open("r", encoding="utf-8") as file:
+                yield from self.iter_json_array(file)
+        elif self.extension in SERIALIZED_EXTENSIONS: # Двоичные форматы читаются целиком
+            yield from self.serializer.loads(self.file_path.read_bytes())
+        elif self.extension == ".csv":
+            import csv
+            with self.file_path.open("r", encoding="utf-8") as file:
+                yield from csv.DictReader(file) # DictReader читает файл построчно
+        else:
+            for task in self.load_from_sqlite():
+                yield task.to_dict()
+
+    def stream(self) -> Iterator[Task]:
+        """
+            Потоково загружает задачи. Записи из файла превращаются в задачи без разбора даты
+            (дата разбирается при первом обращении), поэтому загрузка не тратит время на strptime.
+            В журналируемом режиме журнал нужно воспроизвести целиком, поэтому задачи загружаются обычно.
+
+            Yields:
+                Task: Очередная задача.
+        """
+        if self.journal:
+            yield from self.load()
+            return
+        self._remember()
+        if self.load_cache and not self.supports_queries:
+            yield from self._load_cached()
+            return
+        for record in self.iter_records():
+            yield Task.from_dict(record, lazy=True)
+
+    def _load_cached(self) -> List[Task]:
+        """
+            Загружает задачи из кэша загрузки, если файл данных не менялся после записи кэша.
+            Иначе разбирает файл и записывает новый кэш. Кэш записывается только при загрузке,
+            поэтому после сохранения изменений следующая загрузка снова разбирает файл.
+
+            Returns:
+                List[Task]: Список задач.
+        """
+        state = self._stat(self.file_path) # Состояние до чтения: изменение файла во время чтения сделает кэш устаревшим
+        tasks = self._read_load_cache(state)
+        if tasks is None:
+            tasks = [Task.from_dict(record, lazy=True) for record in self.iter_records()]
+            self._write_load_cache(state, tasks)
+        return tasks
+
+    def _read_load_cache(self, state: Optional[Tuple[int, int, int]]) -> Optional[List[Task]]:
+        """
+            Читает кэш загрузки, записанный для указанного состояния файла данных.
+
+            Args:
+                state (Optional[Tuple[int, int, int]]): Текущее состояние файла данных (см. _stat).
+
+            Returns:
+                Optional[List[Task]]: Задачи или None, если кэша нет, он устарел или поврежден.
+        """
+        if state is None:
+            return None
+        try:
+            # loads() по прочитанным байтам в несколько раз быстрее load(), читающего файл по частям
+            version, cached_state, rows = marshal.loads(self.cache_path.read_bytes())
+            if version != LOAD_CACHE_VERSION or cached_state != state:
+                return None
+            return [Task.from_row(row) for row in rows]
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            return None
+
+    def _write_load_cache(self, state: Optional[Tuple[int, int, int]], tasks: List[Task]) -> None:
+        """
+            Записывает кэш загрузки для указанного состояния файла данных.
+            Кэш только ускоряет загрузку, поэтому ошибка записи не прерывает работу.
+
+            Args:
+                state (Optional[Tuple[int, int, int]]): Состояние файла данных на момент начала чтения.
+                tasks (List[Task]): Загруженные задачи.
+        """
+        if state is None:
+            return
+        temp_path = self._temp_path(self.cache_path)
+        try:
+            temp_path.write_bytes(marshal.dumps((LOAD_CACHE_VERSION, state, [task.to_row() for task in tasks])))
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+
+    def import_tasks(self) -> Iterator[Task]:
+        """
+            Потоково читает задачи для импорта из файла другой системы.
+            В отличие от stream(), каждая запись проходит полную валидацию,
+            а задача получает новый ID вместо сохраненного в файле.
+
+            Yields:
+                Task: Очередная импортируемая задача.
+        """
+        for record in self.iter_records():
+            yield Task(
+                title=record["title"],
+                description=record["description"],
+                category=record["category"],
+                due_date=record["due_date"],
+                priority=record["priority"],
+                status=record.get("status") or Status.NOT_DONE
+            )
+
     @handle_extension
-    def save(self, tasks: List[Task]) -> None:
+    def save(self, tasks: Iterable[Task], file_path: Optional[Path] = None) -> None:
         """
             Сохраняет задачи в файл в зависимости от расширения файла.
+            Файл записывается атомарно: данные пишутся во временный файл, сбрасываются на диск
+            и подменяют целевой файл, поэтому сбой во время записи не портит сохраненные данные.
             
             Args:
-                tasks (List[Task]): Список задач для сохранения.
+                tasks (Iterable[Task]): Список задач для сохранения.
+                file_path (Optional[Path]): Файл для записи (по умолчанию - файл обработчика).
         """
-        if self.extension == ".json":
-            self.save_to_json(tasks) # Сохраняем в формате JSON
-        elif self.extension == ".csv":
-            self.save_to_csv(tasks) # Сохраняем в формате CSV
+        if self.extension in SQLITE_EXTENSIONS:
+            self.save_to_sqlite(tasks) # Сохраняем в базу данных
+            return
+        target = Path(file_path or self.file_path)
+        temp_path = self._temp_path(target)
+        try:
+            if self.extension in SERIALIZED_EXTENSIONS:
+                self.save_serialized(tasks, temp_path) # Сохраняем в формате JSON или MessagePack
+            elif self.extension == ".csv":
+                self.save_to_csv(tasks, temp_path) # Сохраняем в формате CSV
+            if REGISTRY.enabled:
+                REGISTRY.record_bytes("DataHandler.save", temp_path.stat().st_size)
+            os.replace(temp_path, target)
+        except BaseException:
+            temp_path.unlink(missing_ok=True) # Недописанный временный файл не остается рядом с данными
+            raise
+        self._sync_directory(target.parent) # Переименование попадает на диск вместе с данными
+        if target == self.file_path:
+            self._remember()
             
     @handle_extension
     def load(self) -> List[Task]:
         """
             Загружает задачи из файла в зависимости от расширения файла.
+            В журналируемом режиме поверх снимка воспроизводятся записи журнала.
             
             Returns:
                 List[Task]: Список задач, загруженных из файла.
         """
-        if self.extension == ".json":
-            return self.load_from_json() # Загружаем из JSON
+        if self.extension in SQLITE_EXTENSIONS:
+            return self.load_from_sqlite() # Загружаем из базы данных
+        self._remember()
+        if self.journal:
+            return self.load_journaled()
+        if self.extension in SERIALIZED_EXTENSIONS:
+            return self.load_serialized() # Загружаем из JSON или MessagePack
         elif self.extension == ".csv":
             return self.load_from_csv() # Загружаем из CSV
         return [] # Если расширение не поддерживается, возвращаем пустой список
-            
\ No newline at end of file
+
+    def persist(self, tasks: Iterable[Task], changed: Iterable[Task] = (), deleted: Iterable[int] = ()) -> None:
+        """
+            Фиксирует изменение набора задач.
+            В обычном режиме перезаписывает файл целиком, в журналируемом - дописывает в журнал
+            только измененные и удаленные записи, в SQLite - изменяет только эти строки в одной транзакции.
+            
+            Args:
+                tasks (Iterable[Task]): Все задачи после изменения.
+                changed (Iterable[Task]): Добавленные или измененные задачи.
+                deleted (Iterable[int]): ID удаленных задач.
+        """
+        if self.extension in SQLITE_EXTENSIONS:
+            self.write_rows(changed, deleted)
+            return
+        if not self.journal and self.write_behind_ms is not None:
+            self._pending = tasks # Запись выполнит фоновый поток
+            self._dirty.set()
+            return
+        if not self.journal:
+            self.save(tasks) # Без журнала сохраняем весь список
+            return
+        records = [{"op": "put", "task": task.to_dict()} for task in changed]
+        deleted = list(deleted)
+        if deleted:
+            records.append({"op": "delete", "ids": deleted})
+        if records:
+            self.append_to_journal(records)
+        if self.journal_path.exists() and self.journal_path.stat().st_size >= self.compact_threshold:
+            self.compact(tasks) # Журнал разросся - сжимаем его в новый снимок в фоне
+
+    def snapshot(
+        self,
+        tasks: Iterable[Task],
+        changed: Iterable[Task] = (),
+        deleted: Iterable[int] = ()
+    ) -> Tuple[List, List[TaskRecord], List[int]]:
+        """
+            Снимок аргументов persist для записи в другом потоке, пока задачи продолжают изменяться.
+            Для формата, собираемого из записей, набор задач заменяется закодированными записями (EncodedTasks):
+            заново кодируются только измененные задачи, остальные записи берутся из кэша задач.
+            Иначе, как и для записей журнала, задачи заменяются снимками TaskRecord.
+
+            Args:
+                tasks (Iterable[Task]): Все задачи после изменения.
+                changed (Iterable[Task]): Добавленные или измененные задачи.
+                deleted (Iterable[int]): ID удаленных задач.
+
+            Returns:
+                Tuple[List, List[TaskRecord], List[int]]: Аргументы persist.
+        """
+        serializer = self.serializer
+        if self.extension == ".csv":
+            records = EncodedTasks("csv", self._fragments(tasks, "csv", self._csv_row))
+        elif serializer is not None and serializer.dump_item is not None and serializer.join is not None:
+            records = EncodedTasks(self.serializer_name, self._fragments(tasks, self.serializer_name, serializer.dump_item))
+        else:
+            records = [TaskRecord(task) for task in tasks]
+        changed = [TaskRecord(task) for task in changed] if self.journal else [] # Без журнала пишется весь набор
+        return records, changed, list(deleted)
+
+    def append_to_journal(self, records: List[Dict]) -> None:
+        """
+            Дописывает записи в журнал изменений в формате JSON-lines.
+            
+            Args:
+                records (List[Dict]): Записи журнала (операции put/delete).
+        """
+        with self._journal_lock:
+            if self._journal_file is not None and self.shared and self._journal_rotated():
+                self._journal_file.close() # Другой процесс сжал журнал - пишем в новый файл журнала
+                self._journal_file = None
+            if self._journal_file is None:
+                self._journal_file = self.journal_path.open("a", encoding="utf-8")
+            data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+            self._journal_file.write(data)
+            self._journal_file.flush() # Сбрасываем буфер, чтобы запись попала в файл сразу
+            self._remember()
+        if REGISTRY.enabled:
+            REGISTRY.record_bytes("DataHandler.append_to_journal", len(data.encode("utf-8")))
+
+    def _journal_rotated(self) -> bool:
+        """
+            Проверяет, что открытый на дозапись файл журнала больше не является текущим журналом.
+        """
+        current = self._stat(self.journal_path)
+        return current is None or current[0] != os.fstat(self._journal_file.fileno()).st_ino
+
+    @handle_extension
+    def load_journaled(self) -> List[Task]:
+        """
+            Загружает последний снимок и воспроизводит поверх него журнал изменений.
+            
+            Returns:
+                List[Task]: Список задач с учетом всех записей журнала.
+
+            Raises:
+                FileNotFoundError: Если не существует ни снимка, ни журнала.
+        """
+        has_journal = self.journal_path.exists() or self.rotated_journal_path.exists()
+        if not self.file_path.exists() and not has_journal:
+            raise FileNotFoundError(f"Файл {self.file_path} не найден.")
+        snapshot = []
+        if self.file_path.exists():
+            snapshot = self.load_from_csv() if self.extension == ".csv" else self.load_serialized()
+        tasks = {task.id: task for task in snapshot} # Словарь сохраняет порядок задач из снимка
+        for path in (self.rotated_journal_path, self.journal_path): # Сначала журнал, который не успел сжаться
+            if path.exists():
+                self._replay(tasks, path)
+        return list(tasks.values())
+
+    @staticmethod
+    def _replay(tasks: Dict[int, Task], path: Path) -> None:
+        """
+            Применяет записи журнала к словарю задач. Операции идемпотентны,
+            поэтому повторное воспроизведение уже сжатого журнала безопасно.
+            
+            Args:
+                tasks (Dict[int, Task]): Задачи по ID, изменяются на месте.
+                path (Path): Путь к файлу журнала.
+        """
+        with path.open("rb") as file:
+            for record in DataHandler._journal_records(file):
+                if record["op"] == "put":
+                    task = Task.from_dict(record["task"])
+                    tasks[task.id] = task
+                elif record["op"] == "delete":
+                    for task_id in record["ids"]:
+                        tasks.pop(task_id, None)
+
+    @staticmethod
+    def _journal_records(file: IO) -> Iterator[Dict]:
+        """
+            Читает записи журнала из открытого в двоичном режиме файла с текущей позиции.
+
+            Args:
+                file (IO): Файл журнала.
+
+            Yields:
+                Dict: Очередная запись журнала.
+        """
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                return # Недописанная последняя строка (сбой во время записи) - дальше записей нет
+
+    def compact(self, tasks: Iterable[Task], wait: bool = False) -> None:
+        """
+            Сжимает журнал: ротирует его и в фоновом потоке записывает новый снимок.
+            Новые изменения во время сжатия пишутся уже в свежий журнал.
+            Для файла, общего для нескольких процессов, снимок записывается сразу.
+            
+            Args:
+                tasks (Iterable[Task]): Текущие задачи.
+                wait (bool): Дождаться окончания записи снимка.
+        """
+        with self._journal_lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return # Сжатие уже выполняется
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            if self.journal_path.exists():
+                if self.rotated_journal_path.exists(): # Предыдущее сжатие не завершилось - объединяем журналы
+                    with self.rotated_journal_path.open("a", encoding="utf-8") as rotated:
+                        rotated.write(self.journal_path.read_text(encoding="utf-8"))
+                    self.journal_path.unlink()
+                else:
+                    os.replace(self.journal_path, self.rotated_journal_path)
+                self._remember()
+            # Копия списка (закодированные записи - уже снимок): задачи, добавленные позже, попадут в новый журнал
+            snapshot = tasks if isinstance(tasks, EncodedTasks) else list(tasks)
+            if self.shared: # Снимок пишется под блокировкой файла, чтобы не пропустить записи других процессов
+                self._write_snapshot(snapshot)
+                return
+            self._compaction = threading.Thread(target=self._write_snapshot, args=(snapshot,))
+            self._compaction.start()
+        if wait:
+            self.wait_for_compaction()
+
+    def _write_snapshot(self, tasks: List[Task]) -> None:
+        """
+            Атомарно записывает снимок через временный файл и удаляет сжатый журнал.
+            
+            Args:
+                tasks (List[Task]): Задачи для записи в снимок.
+        """
+        with self.file_lock(): # Другие процессы не читают файлы, пока снимок заменяет сжатый журнал
+            self.save(tasks) # Запись атомарна - снимок не бывает недописанным
+            self.rotated_journal_path.unlink(missing_ok=True)
+
+    def wait_for_compaction(self) -> None:
+        """
+            Ожидает завершения фонового сжатия журнала, если оно выполняется.
+        """
+        if self._compaction is not None:
+            self._compaction.join()
+
+    def _flush_loop(self) -> None:
+        """
+            Цикл фонового потока отложенной записи: ждет изменений и сохраняет их
+            не чаще одного раза за write_behind_ms миллисекунд.
+        """
+        interval = self.write_behind_ms / 1000
+        while True:
+            self._dirty.wait()
+            if self._closed:
+                return
+            time.sleep(interval) # Изменения, пришедшие за это время, попадут в ту же запись
+            try:
+                self.flush()
+            except Exception: # Изменения остались отложенными - запись повторится через interval
+                logger.exception("Отложенная запись файла %s не удалась, запись будет повторена", self.file_path)
+
+    def flush(self) -> None:
+        """
+            Немедленно сохраняет отложенные изменения, если они есть.
+            Если запись не удалась, изменения остаются отложенными и сохранятся следующей записью.
+
+            Raises:
+                OSError: Ошибка записи файла (например, закончилось место на диске).
+        """
+        with self._flush_lock:
+            tasks = self._pending
+            if tasks is None:
+                return
+            self._pending = None
+            self._dirty.clear()
+            snapshot = tasks if isinstance(tasks, EncodedTasks) else None # Закодированные записи - уже снимок
+            while snapshot is None:
+                try:
+                    snapshot = list(tasks) # Снимок набора задач; другой поток мог изменить его во время копирования
+                except RuntimeError:
+                    continue
+            try:
+                self.save(snapshot)
+            except Exception:
+                if self._pending is None: # Более новый набор задач, отложенный во время записи, уже включает эти изменения
+                    self._pending = tasks
+                self._dirty.set()
+                raise
+
+    def close(self) -> None:
+        """
+            Сохраняет отложенные изменения, дожидается сжатия журнала и освобождает файлы и соединения.
+            Ресурсы освобождаются и тогда, когда последняя запись не удалась.
+
+            Raises:
+                OSError: Если отложенные изменения не удалось сохранить.
+        """
+        try:
+            self.flush()
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        """
+            Дожидается сжатия журнала, останавливает поток отложенной записи и закрывает файлы и соединения.
+        """
+        self.wait_for_compaction()
+        if self.write_behind_ms is not None and not self._closed:
+            self._closed = True
+            self._dirty.set() # Будим фоновый поток, чтобы он завершился
+            atexit.unregister(self.flush)
+        with self._journal_lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _sqlite(self) -> "sqlite3.Connection":
+        """
+            Открывает соединение с базой данных и создает схему при первом обращении.
+
+            Returns:
+                sqlite3.Connection: Соединение с базой данных.
+        """
+        if self._connection is None:
+            import sqlite3
+            self._connection = sqlite3.connect(self.file_path, check_same_thread=False)
+            # Встроенный upper() SQLite меняет регистр только у латиницы, поэтому используем Python
+            self._connection.create_function("PY_UPPER", 1, str.upper, deterministic=True)
+            self._connection.executescript(SQLITE_SCHEMA)
+            with self._connection:
+                if self._connection.execute("PRAGMA user_version").fetchone()[0] < SQLITE_VERSION:
+                    # Ключи категорий ранних версий построены casefold() - пересчитываем их через upper()
+                    self._connection.execute("UPDATE tasks SET category_key = PY_UPPER(category)")
+                    self._connection.execute(f"PRAGMA user_version = {SQLITE_VERSION}")
+        return self._connection
+
+    @staticmethod
+    def _to_row(task: Task) -> tuple:
+        """
+            Преобразует задачу в строку таблицы tasks.
+        """
+        return (
+            task.id, task.title, task.description, task.category, task.category.upper(),
+            task.due_date, task.priority.value, task.status.value
+        )
+
+    @staticmethod
+    def _from_rows(rows: Iterable[tuple]) -> List[Task]:
+        """
+            Преобразует строки таблицы tasks в задачи.
+        """
+        return [
+            Task.from_dict({
+                "id": row[0], "title": row[1], "description": row[2], "category": row[3],
+                "due_date": row[4], "priority": row[5], "status": row[6]
+            })
+            for row in rows
+        ]
+
+    def save_to_sqlite(self, tasks: Iterable[Task]) -> None:
+        """
+            Полностью заменяет содержимое базы данных списком задач в одной транзакции.
+
+            Args:
+                tasks (Iterable[Task]): Список задач для сохранения.
+        """
+        connection = self._sqlite()
+        with connection: # Транзакция: фиксируется целиком или откатывается
+            connection.execute("DELETE FROM tasks")
+            connection.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", map(self._to_row, tasks))
+
+    def load_from_sqlite(self) -> List[Task]:
+        """
+            Загружает все задачи из базы данных.
+
+            Returns:
+                List[Task]: Список задач в порядке ID.
+        """
+        return self._from_rows(self._sqlite().execute(f"SELECT {SQLITE_COLUMNS} FROM tasks ORDER BY id"))
+
+    def write_rows(self, changed: Iterable[Task] = (), deleted: Iterable[int] = ()) -> None:
+        """
+            Вставляет или обновляет измененные задачи и удаляет удаленные в одной транзакции.
+
+            Args:
+                changed (Iterable[Task]): Добавленные или измененные задачи.
+                deleted (Iterable[int]): ID удаленных задач.
+        """
+        connection = self._sqlite()
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", map(self._to_row, changed))
+            connection.executemany("DELETE FROM tasks WHERE id = ?", ((task_id,) for task_id in deleted))
+
+    def get_row(self, task_id: int) -> Optional[Task]:
+        """
+            Получает задачу из базы данных по ID.
+
+            Args:
+                task_id (int): ID задачи.
+
+            Returns:
+                Optional[Task]: Задача или None, если задача не найдена.
+        """
+        tasks = self._from_rows(self._sqlite().execute(f"SELECT {SQLITE_COLUMNS} FROM tasks WHERE id = ?", (task_id,)))
+        return tasks[0] if tasks else None
+
+    def max_id(self) -> int:
+        """
+            Возвращает максимальный ID задачи в базе данных.
+
+            Returns:
+                int: Максимальный ID или 0, если задач нет.
+        """
+        return self._sqlite().execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+
+    def query(
+        self,
+        keyword: str = "",
+        category: str = "",
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        exact_category: bool = False,
+        sort_by: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Task]:
+        """
+            Ищет задачи в базе данных. Фильтры по категории и статусу используют индексы таблицы.
+
+            Args:
+                keyword (str): Ключевое слово для поиска в названии и описании задачи.
+                category (str): Категория (без учета регистра).
+                status (Optional[Status]): Статус.
+                priority (Optional[Priority]): Приоритет.
+                exact_category (bool): Сравнивать категорию с учетом регистра.
+                sort_by (Optional[str]): Сортировка: "due_date" - по сроку, "priority" - по приоритету и сроку.
+                offset (int): Количество пропускаемых задач.
+                limit (Optional[int]): Максимальное количество задач.
+
+            Returns:
+                List[Task]: Найденные задачи (по умолчанию в порядке ID).
+        """
+        conditions, params = [], []
+        if category:
+            conditions.append("category_key = ?")
+            params.append(category.upper())
+            if exact_category:
+                conditions.append("category = ?")
+                params.append(category)
+        if status:
+            conditions.append("status = ?")
+            params.append(status.value)
+        if priority:
+            conditions.append("priority = ?")
+            params.append(priority.value)
+        if keyword:
+            conditions.append("(instr(PY_UPPER(description), ?) > 0 OR instr(PY_UPPER(title), ?) > 0)")
+            params += [keyword.upper()] * 2
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "id"
+        if sort_by == "due_date":
+            order = "due_date, id"
+        elif sort_by == "priority":
+            order = f"CASE priority {'WHEN ? THEN ? ' * len(Priority)}END, due_date, id" # Высокий приоритет - первым
+            for rank, value in enumerate(Priority):
+                params += [value.value, rank]
+        paging = ""
+        if offset or limit is not None:
+            paging = "LIMIT ? OFFSET ?" # LIMIT -1 в SQLite - без ограничения
+            params += [-1 if limit is None else limit, offset]
+        return self._from_rows(self._sqlite().execute(
+            f"SELECT {SQLITE_COLUMNS} FROM tasks {where} ORDER BY {order} {paging}", params
+        ))
+
+    def query_due(self, start: str = "", end: str = "", exclude_status: Optional[Status] = None) -> List[Task]:
+        """
+            Ищет задачи по диапазону сроков выполнения с помощью индекса по дате.
+
+            Args:
+                start (str): Начало диапазона включительно (пустая строка - без ограничения).
+                end (str): Конец диапазона (пустая строка - без ограничения).
+                exclude_status (Optional[Status]): Статус, задачи с которым не попадают в результат.
+                    Если задан, конец диапазона не включается (запрос просроченных задач).
+
+            Returns:
+                List[Task]: Задачи, упорядоченные по сроку выполнения.
+        """
+        conditions, params = ["due_date >= ?"], [start]
+        if end:
+            conditions.append("due_date < ?" if exclude_status else "due_date <= ?")
+            params.append(end)
+        if exclude_status:
+            conditions.append("status != ?")
+            params.append(exclude_status.value)
+        where = " AND ".join(conditions)
+        return self._from_rows(self._sqlite().execute(
+            f"SELECT {SQLITE_COLUMNS} FROM tasks WHERE {where} ORDER BY due_date, id", params
+        ))
+
+    def delete_category_rows(self, category: str) -> List[int]:
+        """
+            Удаляет задачи категории (точное совпадение) одной транзакцией.
+
+            Args:
+                category (str): Категория задач для удаления.
+
+            Returns:
+                List[int]: ID удаленных задач.
+        """
+        connection = self._sqlite()
+        with connection:
+            ids = [row[0] for row in connection.execute(
+                "SELECT id FROM tasks WHERE category_key = ? AND category = ?", (category.upper(), category)
+            )]
+            connection.execute("DELETE FROM tasks WHERE category_key = ? AND category = ?", (category.upper(), category))
+        return ids
@@ -0,0 +1,421 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from task import Task, Priority, Status
+
+
+class TaskIndex:
+    """
+        Вторичные индексы задач: корзины по категории (без учета регистра), статусу и приоритету,
+        а также отсортированный индекс по сроку выполнения.
+        Индекс хранит ключи, под которыми задача была проиндексирована, поэтому задачу можно
+        переиндексировать уже после изменения ее полей.
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        """
+            Инициализация индекса.
+
+            Args:
+                tasks (Iterable[Task]): Задачи для начального заполнения индекса.
+        """
+        self.rebuild(tasks)
+
+    @staticmethod
+    def fold(category: str) -> str:
+        """
+            Приводит категорию к ключу индекса. Регистр приводится через upper(), как при сравнении
+            категорий без индекса: casefold() иначе обрабатывает, например, "ß" и турецкие "ı"/"İ".
+
+            Args:
+                category (str): Категория задачи.
+
+            Returns:
+                str: Ключ категории.
+        """
+        return category.upper()
+
+    @staticmethod
+    def _keys(task: Task) -> Tuple[str, Status, Priority, str]:
+        """
+            Вычисляет ключи индекса для задачи.
+
+            Args:
+                task (Task): Задача.
+
+            Returns:
+                Tuple[str, Status, Priority, str]: Категория, статус, приоритет и срок выполнения.
+        """
+        return TaskIndex.fold(task.category), task.status, task.priority, task.due_date
+
+    def rebuild(self, tasks: Iterable[Task]) -> None:
+        """
+            Полностью перестраивает индекс.
+
+            Args:
+                tasks (Iterable[Task]): Все задачи.
+        """
+        self._counter = count() # Порядковые номера задач, чтобы выдавать результаты в порядке добавления
+        self._order: Dict[int, int] = {}
+        self._indexed: Dict[int, Tuple[str, Status, Priority, str]] = {}
+        self._tasks: Dict[int, Task] = {}
+        self._categories: Dict[str, Dict[int, Task]] = {}
+        self._statuses: Dict[Status, Dict[int, Task]] = {}
+        self._priorities: Dict[Priority, Dict[int, Task]] = {}
+        self._dates: List[Tuple[str, int]] = []
+        for task in tasks:
+            if task.id not in self._tasks:
+                self._link(task, self._keys(task))
+                self._dates.append((self._indexed[task.id][3], task.id))
+        self._dates.sort() # Одна сортировка дешевле, чем вставка каждой даты по отдельности
+
+    def _link(self, task: Task, keys: Tuple[str, Status, Priority, str]) -> None:
+        """
+            Добавляет задачу в корзины категории, статуса и приоритета.
+        """
+        category, status, priority, _ = keys
+        self._tasks[task.id] = task
+        self._indexed[task.id] = keys
+        self._order.setdefault(task.id, next(self._counter))
+        self._categories.setdefault(category, {})[task.id] = task
+        self._statuses.setdefault(status, {})[task.id] = task
+        self._priorities.setdefault(priority, {})[task.id] = task
+
+    def _unlink(self, task_id: int) -> Tuple[str, Status, Priority, str]:
+        """
+            Убирает задачу из корзин по сохраненным ключам.
+
+            Returns:
+                Tuple[str, Status, Priority, str]: Ключи, под которыми задача была проиндексирована.
+        """
+        keys = self._indexed.pop(task_id)
+        del self._tasks[task_id]
+        for buckets, key in ((self._categories, keys[0]), (self._statuses, keys[1]), (self._priorities, keys[2])):
+            bucket = buckets[key]
+            del bucket[task_id]
+            if not bucket:
+                del buckets[key] # Пустые корзины не храним
+        return keys
+
+    def add(self, task: Task) -> None:
+        """
+            Добавляет задачу в индекс.
+
+            Args:
+                task (Task): Новая задача.
+        """
+        if task.id in self._tasks:
+            self.remove(task.id)
+        self._link(task, self._keys(task))
+        insort(self._dates, (self._indexed[task.id][3], task.id))
+
+    def remove(self, task_id: int) -> None:
+        """
+            Удаляет задачу из индекса.
+
+            Args:
+                task_id (int): ID задачи.
+        """
+        if task_id not in self._tasks:
+            return
+        keys = self._unlink(task_id)
+        del self._order[task_id]
+        self._remove_date(keys[3], task_id)
+
+    def update(self, task: Task) -> None:
+        """
+            Переиндексирует задачу после изменения ее полей. Порядок задачи сохраняется.
+
+            Args:
+                task (Task): Измененная задача.
+        """
+        keys = self._keys(task)
+        old_keys = self._indexed.get(task.id)
+        if old_keys == keys:
+            return # Индексируемые поля не изменились
+        if old_keys is None:
+            self.add(task)
+            return
+        self._unlink(task.id)
+        self._link(task, keys)
+        if old_keys[3] != keys[3]:
+            self._remove_date(old_keys[3], task.id)
+            insort(self._dates, (keys[3], task.id))
+
+    def _remove_date(self, due_date: str, task_id: int) -> None:
+        """
+            Удаляет запись из отсортированного индекса дат.
+        """
+        position = bisect_left(self._dates, (due_date, task_id))
+        if position < len(self._dates) and self._dates[position] == (due_date, task_id):
+            del self._dates[position]
+
+    def ordered(self, tasks: Iterable[Task]) -> List[Task]:
+        """
+            Упорядочивает задачи в порядке их добавления.
+        """
+        return sorted(tasks, key=lambda task: self._order[task.id])
+
+    def candidates(
+        self,
+        category: str = "",
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None
+    ) -> Optional[List[Task]]:
+        """
+            Возвращает задачи, удовлетворяющие фильтрам, пересечением корзин индекса.
+
+            Args:
+                category (str): Категория (без учета регистра).
+                status (Optional[Status]): Статус.
+                priority (Optional[Priority]): Приоритет.
+
+            Returns:
+                Optional[List[Task]]: Задачи в порядке добавления или None, если фильтры не заданы.
+        """
+        buckets = []
+        if category:
+            buckets.append(self._categories.get(self.fold(category), {}))
+        if status:
+            buckets.append(self._statuses.get(status, {}))
+        if priority:
+            buckets.append(self._priorities.get(priority, {}))
+        if not buckets:
+            return None
+        buckets.sort(key=len) # Начинаем с самой маленькой корзины
+        smallest, others = buckets[0], buckets[1:]
+        return self.ordered(
+            task for task_id, task in smallest.items() if all(task_id in bucket for bucket in others)
+        )
+
+    def by_category(self, category: str) -> List[Task]:
+        """
+            Возвращает задачи категории с точным совпадением названия.
+
+            Args:
+                category (str): Категория.
+
+            Returns:
+                List[Task]: Задачи категории в порядке добавления.
+        """
+        bucket = self._categories.get(self.fold(category), {})
+        return self.ordered(task for task in bucket.values() if task.category == category)
+
+    def due_between(self, start: str, end: str) -> List[Task]:
+        """
+            Возвращает задачи со сроком выполнения в диапазоне [start, end].
+
+            Args:
+                start (str): Начало диапазона в формате YYYY-MM-DD.
+                end (str): Конец диапазона в формате YYYY-MM-DD.
+
+            Returns:
+                List[Task]: Задачи, упорядоченные по сроку выполнения.
+        """
+        low = bisect_left(self._dates, (start,))
+        high = bisect_right(self._dates, (end, float("inf")))
+        return [self._tasks[task_id] for _, task_id in self._dates[low:high]]
+
+    def overdue(self, today: str) -> List[Task]:
+        """
+            Возвращает невыполненные задачи со сроком выполнения раньше указанной даты.
+
+            Args:
+                today (str): Текущая дата в формате YYYY-MM-DD.
+
+            Returns:
+                List[Task]: Просроченные задачи, упорядоченные по сроку выполнения.
+        """
+        high = bisect_left(self._dates, (today,))
+        return [
+            self._tasks[task_id] for _, task_id in self._dates[:high]
+            if self._indexed[task_id][1] != Status.DONE
+        ]
+
+
+class FullTextIndex:
+    """
+        Инвертированный индекс по названию и описанию задач: триграммы для поиска подстроки
+        и отсортированный словарь слов для поиска по префиксу.
+        Индекс отбирает кандидатов, итоговая проверка совпадает с проверкой в TaskManager.search_tasks.
+    """
+    NGRAM = 3 # Длина n-граммы
+    _WORD = re.compile(r"\w+") # Слова для префиксного поиска (\w учитывает кириллицу)
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        """
+            Инициализация индекса.
+
+            Args:
+                tasks (Iterable[Task]): Задачи для начального заполнения индекса.
+        """
+        self.rebuild(tasks)
+
+    @staticmethod
+    def fold(text: str) -> str:
+        """
+            Нормализует текст для индекса. Сначала upper(), как в поиске без индекса, затем casefold():
+            обе операции посимвольные, поэтому если строка запроса входит в текст после upper(),
+            то и после нормализации она останется его подстрокой.
+
+            Args:
+                text (str): Исходный текст.
+
+            Returns:
+                str: Нормализованный текст.
+        """
+        return text.upper().casefold()
+
+    @classmethod
+    def ngrams(cls, text: str) -> Set[str]:
+        """
+            Разбивает нормализованный текст на n-граммы.
+
+            Args:
+                text (str): Нормализованный текст.
+
+            Returns:
+                Set[str]: Множество n-грамм.
+        """
+        return {text[i:i + cls.NGRAM] for i in range(len(text) - cls.NGRAM + 1)}
+
+    def _terms(self, task: Task) -> Tuple[Set[str], Set[str]]:
+        """
+            Вычисляет n-граммы и слова названия и описания задачи.
+        """
+        fields = (self.fold(task.title), self.fold(task.description))
+        grams = set().union(*(self.ngrams(field) for field in fields)) # n-граммы не пересекают границу полей
+        words = {word for field in fields for word in self._WORD.findall(field)}
+        return grams, words
+
+    def rebuild(self, tasks: Iterable[Task]) -> None:
+        """
+            Полностью перестраивает индекс.
+
+            Args:
+                tasks (Iterable[Task]): Все задачи.
+        """
+        self._grams: Dict[str, Set[int]] = {}
+        self._words: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = [] # Отсортированный список слов для поиска по префиксу
+        self._indexed: Dict[int, Tuple[str, str, Set[str], Set[str]]] = {}
+        for task in tasks:
+            if task.id not in self._indexed:
+                self._link(task, sort=False)
+        self._vocabulary = sorted(self._words)
+
+    def _link(self, task: Task, sort: bool = True) -> None:
+        """
+            Добавляет термы задачи в списки вхождений.
+        """
+        grams, words = self._terms(task)
+        self._indexed[task.id] = (task.title, task.description, grams, words)
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(task.id)
+        for word in words:
+            postings = self._words.get(word)
+            if postings is None:
+                postings = self._words[word] = set()
+                if sort:
+                    insort(self._vocabulary, word)
+            postings.add(task.id)
+
+    def add(self, task: Task) -> None:
+        """
+            Добавляет задачу в индекс.
+
+            Args:
+                task (Task): Новая задача.
+        """
+        self.remove(task.id)
+        self._link(task)
+
+    def remove(self, task_id: int) -> None:
+        """
+            Удаляет задачу из индекса.
+
+            Args:
+                task_id (int): ID задачи.
+        """
+        indexed = self._indexed.pop(task_id, None)
+        if indexed is None:
+            return
+        _, _, grams, words = indexed
+        for gram in grams:
+            postings = self._grams[gram]
+            postings.discard(task_id)
+            if not postings:
+                del self._grams[gram]
+        for word in words:
+            postings = self._words[word]
+            postings.discard(task_id)
+            if not postings:
+                del self._words[word]
+                del self._vocabulary[bisect_left(self._vocabulary, word)]
+
+    def update(self, task: Task) -> None:
+        """
+            Переиндексирует задачу, если изменились ее название или описание.
+
+            Args:
+                task (Task): Измененная задача.
+        """
+        indexed = self._indexed.get(task.id)
+        if indexed is not None and indexed[0] == task.title and indexed[1] == task.description:
+            return # Текстовые поля не изменились
+        self.add(task)
+
+    def substring(self, keyword: str) -> Optional[Set[int]]:
+        """
+            Отбирает задачи, которые могут содержать подстроку, пересечением списков триграмм.
+
+            Args:
+                keyword (str): Искомая подстрока.
+
+            Returns:
+                Optional[Set[int]]: ID задач-кандидатов или None, если запрос короче n-граммы
+                    и индекс не может его обслужить.
+        """
+        grams = self.ngrams(self.fold(keyword))
+        if not grams:
+            return None
+        postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+        return postings[0].intersection(*postings[1:])
+
+    @classmethod
+    def has_prefix(cls, task: Task, prefix: str) -> bool:
+        """
+            Проверяет без индекса, есть ли в названии или описании задачи слово с указанным префиксом.
+
+            Args:
+                task (Task): Задача.
+                prefix (str): Нормализованный префикс слова.
+
+            Returns:
+                bool: True, если такое слово есть.
+        """
+        return any(
+            word.startswith(prefix)
+            for field in (task.title, task.description)
+            for word in cls._WORD.findall(cls.fold(field))
+        )
+
+    def prefix(self, prefix: str) -> Set[int]:
+        """
+            Находит задачи, в названии или описании которых есть слово, начинающееся с префикса.
+
+            Args:
+                prefix (str): Префикс слова.
+
+            Returns:
+                Set[int]: ID найденных задач.
+        """
+        prefix = self.fold(prefix)
+        result: Set[int] = set()
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            result |= self._words[self._vocabulary[position]]
+            position += 1
+        return result
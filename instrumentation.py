@@ -0,0 +1,266 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from types import FunctionType
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Верхние границы корзин гистограммы задержек в секундах (как у гистограмм Prometheus)
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Хук вызывается после каждого замеренного вызова: (имя метода, время в секундах, исключение или None)
+Hook = Callable[[str, float, Optional[BaseException]], None]
+
+
+class MethodStats:
+    """
+        Статистика вызовов одного метода: количество, ошибки, гистограмма задержек и записанные байты.
+    """
+    __slots__ = ("calls", "errors", "total_seconds", "buckets", "bytes_written")
+
+    def __init__(self):
+        self.calls: int = 0
+        self.errors: int = 0
+        self.total_seconds: float = 0.0
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1) # Последняя корзина - больше всех границ
+        self.bytes_written: int = 0
+
+    def to_dict(self) -> Dict:
+        """
+            Преобразует статистику в словарь.
+
+            Returns:
+                Dict: Статистика с накопительными значениями корзин гистограммы.
+        """
+        cumulative, histogram = 0, {}
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.buckets):
+            cumulative += count
+            histogram[str(bound)] = cumulative
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_seconds": self.total_seconds,
+            "histogram": histogram,
+            "bytes_written": self.bytes_written,
+        }
+
+
+class Registry:
+    """
+        Реестр инструментированных классов, хуков и собранной статистики.
+        Пока сбор выключен, методы классов не обернуты и накладных расходов нет:
+        enable() подменяет публичные методы замеряющими обертками, disable() возвращает исходные.
+    """
+    def __init__(self):
+        self.enabled: bool = False
+        self.stats: Dict[str, MethodStats] = {}
+        self.hooks: List[Hook] = []
+        self._classes: List[type] = []
+        self._originals: Dict[Tuple[type, str], Callable] = {} # (класс, имя метода) -> исходная функция
+        self._lock = threading.Lock()
+
+    def register(self, cls: type) -> type:
+        """
+            Регистрирует класс, публичные методы которого замеряются при включенном сборе.
+
+            Args:
+                cls (type): Класс для инструментирования.
+
+            Returns:
+                type: Тот же класс.
+        """
+        self._classes.append(cls)
+        if self.enabled:
+            self._patch(cls)
+        return cls
+
+    def add_hook(self, hook: Hook) -> None:
+        """
+            Добавляет хук, который вызывается после каждого замеренного вызова.
+
+            Args:
+                hook (Hook): Функция (имя метода, время в секундах, исключение или None).
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: Hook) -> None:
+        """
+            Удаляет ранее добавленный хук.
+
+            Args:
+                hook (Hook): Хук для удаления.
+        """
+        self.hooks.remove(hook)
+
+    def enable(self) -> None:
+        """
+            Включает сбор статистики во всех зарегистрированных классах.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        for cls in self._classes:
+            self._patch(cls)
+
+    def disable(self) -> None:
+        """
+            Выключает сбор статистики и возвращает исходные методы. Собранная статистика сохраняется.
+        """
+        self.enabled = False
+        for (cls, name), function in self._originals.items():
+            setattr(cls, name, function)
+        self._originals.clear()
+
+    def reset(self) -> None:
+        """
+            Очищает собранную статистику.
+        """
+        with self._lock:
+            self.stats.clear()
+
+    def _patch(self, cls: type) -> None:
+        """
+            Подменяет публичные методы класса замеряющими обертками.
+
+            Args:
+                cls (type): Зарегистрированный класс.
+        """
+        for name, function in list(vars(cls).items()):
+            if name.startswith("_") or not isinstance(function, FunctionType): # Свойства и статические методы не замеряются
+                continue
+            self._originals[(cls, name)] = function
+            setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", function))
+
+    def _wrap(self, name: str, function: Callable) -> Callable:
+        """
+            Создает обертку, замеряющую время вызова функции.
+
+            Args:
+                name (str): Имя метода в статистике.
+                function (Callable): Исходная функция.
+
+            Returns:
+                Callable: Обертка.
+        """
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            error = None
+            try:
+                return function(*args, **kwargs)
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                self.observe(name, time.perf_counter() - started, error)
+        return wrapper
+
+    def _get(self, name: str) -> MethodStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = MethodStats()
+        return stats
+
+    def observe(self, name: str, seconds: float, error: Optional[BaseException] = None) -> None:
+        """
+            Учитывает вызов метода и передает его хукам.
+
+            Args:
+                name (str): Имя метода.
+                seconds (float): Время выполнения в секундах.
+                error (Optional[BaseException]): Исключение, если вызов завершился ошибкой.
+        """
+        with self._lock: # Методы вызываются и из фоновых потоков (отложенная запись, сжатие журнала)
+            stats = self._get(name)
+            stats.calls += 1
+            stats.errors += error is not None
+            stats.total_seconds += seconds
+            stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        for hook in self.hooks:
+            hook(name, seconds, error)
+
+    def record_bytes(self, name: str, count: int) -> None:
+        """
+            Учитывает байты, записанные методом на диск. При выключенном сборе ничего не делает.
+
+            Args:
+                name (str): Имя метода.
+                count (int): Количество записанных байт.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._get(name).bytes_written += count
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+            Возвращает копию собранной статистики.
+
+            Returns:
+                Dict[str, Dict]: Статистика по именам методов.
+        """
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self.stats.items())}
+
+    def to_json(self) -> str:
+        """
+            Экспортирует статистику в формате JSON.
+
+            Returns:
+                str: Статистика в формате JSON.
+        """
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=4)
+
+    def to_prometheus(self) -> str:
+        """
+            Экспортирует статистику в текстовом формате Prometheus.
+
+            Returns:
+                str: Метрики в текстовом формате Prometheus.
+        """
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP taskmanager_calls_total Количество вызовов метода.",
+            "# TYPE taskmanager_calls_total counter",
+        ]
+        lines += [f'taskmanager_calls_total{{method="{name}"}} {stats["calls"]}' for name, stats in snapshot.items()]
+        lines += [
+            "# HELP taskmanager_errors_total Количество вызовов, завершившихся исключением.",
+            "# TYPE taskmanager_errors_total counter",
+        ]
+        lines += [f'taskmanager_errors_total{{method="{name}"}} {stats["errors"]}' for name, stats in snapshot.items()]
+        lines += [
+            "# HELP taskmanager_call_duration_seconds Время выполнения метода.",
+            "# TYPE taskmanager_call_duration_seconds histogram",
+        ]
+        for name, stats in snapshot.items():
+            for bound, count in stats["histogram"].items():
+                lines.append(f'taskmanager_call_duration_seconds_bucket{{method="{name}",le="{bound}"}} {count}')
+            lines.append(f'taskmanager_call_duration_seconds_sum{{method="{name}"}} {stats["total_seconds"]}')
+            lines.append(f'taskmanager_call_duration_seconds_count{{method="{name}"}} {stats["calls"]}')
+        lines += [
+            "# HELP taskmanager_bytes_written_total Количество байт, записанных методом на диск.",
+            "# TYPE taskmanager_bytes_written_total counter",
+        ]
+        lines += [
+            f'taskmanager_bytes_written_total{{method="{name}"}} {stats["bytes_written"]}'
+            for name, stats in snapshot.items() if stats["bytes_written"]
+        ]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry() # Общий реестр приложения
+
+
+def instrumented(cls: type) -> type:
+    """
+        Декоратор класса: регистрирует публичные методы класса для сбора статистики в REGISTRY.
+
+        Args:
+            cls (type): Класс для инструментирования.
+
+        Returns:
+            type: Тот же класс.
+    """
+    return REGISTRY.register(cls)
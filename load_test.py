@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from benchmark import CATEGORIES, generate_records
+
+# Смесь запросов нагрузки: имя -> доля
+MIX = {"get": 0.5, "search": 0.3, "update": 0.15, "create": 0.05}
+
+
+class HTTPConnection:
+    """
+        Минимальный асинхронный клиент HTTP/1.1 с постоянным соединением (keep-alive).
+        Поддерживает ответы с Content-Length и с Transfer-Encoding: chunked.
+    """
+
+    def __init__(self, host: str, port: int):
+        """
+            Args:
+                host (str): Адрес сервера.
+                port (int): Порт сервера.
+        """
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, payload=None) -> Tuple[int, bytes]:
+        """
+            Отправляет запрос по открытому соединению (открывает его при первом запросе).
+
+            Args:
+                method (str): Метод запроса.
+                path (str): Путь со строкой запроса.
+                payload: Тело запроса, кодируется в JSON.
+
+            Returns:
+                Tuple[int, bytes]: Код ответа и тело ответа.
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n\r\n"
+        self._writer.write(head.encode("latin-1") + body)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        headers = {}
+        while (line := await self._reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while size := int((await self._reader.readline()).strip(), 16):
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline() # Перевод строки после фрагмента
+            await self._reader.readline() # Пустая строка после последнего фрагмента
+            data = b"".join(chunks)
+        else:
+            data = await self._reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, data
+
+    async def close(self) -> None:
+        """
+            Закрывает соединение.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = self._reader = None
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+        Возвращает перцентиль отсортированного списка значений.
+    """
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def worker(host: str, port: int, deadline: float, max_id: int, seed: int, latencies: Dict[str, List[float]]) -> int:
+    """
+        Выполняет запросы по одному соединению до окончания замера.
+
+        Returns:
+            int: Количество ответов с кодом ошибки 5xx.
+    """
+    rng = random.Random(seed)
+    connection = HTTPConnection(host, port)
+    names, weights = list(MIX), list(MIX.values())
+    errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            if name == "get":
+                args = ("GET", f"/tasks/{rng.randint(1, max_id)}")
+            elif name == "search":
+                query = urlencode({"category": rng.choice(CATEGORIES), "status": "Не выполнена", "limit": 20})
+                args = ("GET", f"/tasks?{query}")
+            elif name == "update":
+                args = ("PATCH", f"/tasks/{rng.randint(1, max_id)}", {"priority": rng.choice(["Высокий", "Низкий"])})
+            else:
+                args = ("POST", "/tasks", {"title": "Нагрузка", "description": "", "category": rng.choice(CATEGORIES),
+                                           "due_date": "2025-01-15", "priority": "Средний"})
+            started = time.perf_counter()
+            status, _ = await connection.request(*args)
+            latencies[name].append(time.perf_counter() - started)
+            errors += status >= 500
+    finally:
+        await connection.close()
+    return errors
+
+
+async def run(host: str, port: int, connections: int, duration: float, max_id: int) -> Dict:
+    """
+        Запускает нагрузку и собирает статистику.
+
+        Returns:
+            Dict: Количество запросов, запросов в секунду и задержки (мс) по видам запросов.
+    """
+    latencies: Dict[str, List[float]] = {name: [] for name in MIX}
+    started = time.perf_counter()
+    deadline = started + duration
+    errors = sum(await asyncio.gather(*(
+        worker(host, port, deadline, max_id, seed, latencies) for seed in range(connections)
+    )))
+    elapsed = time.perf_counter() - started
+    everything = sorted(latency for values in latencies.values() for latency in values)
+
+    def summary(values: List[float]) -> Dict:
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        }
+
+    return {
+        "connections": connections,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(everything) / elapsed),
+        "errors": errors,
+        **summary(everything),
+        "by_request": {name: summary(values) for name, values in latencies.items()},
+    }
+
+
+def start_local_server(tasks: int, directory: Path, server_args: List[str] = ()) -> Tuple[subprocess.Popen, int]:
+    """
+        Запускает сервер в отдельном процессе на файле со сгенерированными задачами.
+        Отдельный процесс нужен, чтобы клиент и сервер не делили один цикл событий.
+
+        Args:
+            tasks (int): Количество задач.
+            directory (Path): Каталог для файла данных.
+            server_args (List[str]): Дополнительные аргументы командной строки сервера.
+
+        Returns:
+            Tuple[subprocess.Popen, int]: Процесс сервера и его порт.
+    """
+    data_file = directory / "data.json"
+    data_file.write_text(json.dumps(generate_records(tasks), ensure_ascii=False), encoding="utf-8")
+    server = Path(__file__).resolve().parent / "server.py"
+    process = subprocess.Popen(
+        [sys.executable, str(server), str(data_file), "--port", "0", *server_args], stdout=subprocess.PIPE, text=True
+    )
+    match = re.search(r":(\d+)\s*$", process.stdout.readline())
+    if match is None:
+        process.kill()
+        raise RuntimeError("Сервер не запустился.")
+    return process, int(match.group(1))
+
+
+def main() -> None:
+    """
+        Нагрузочный тест API сервера: выводит запросы в секунду и задержки p50/p99 в формате JSON.
+    """
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HTTP API менеджера задач")
+    parser.add_argument("--url", help="Адрес работающего сервера host:port (по умолчанию запускается локальный)")
+    parser.add_argument("--tasks", type=int, default=10_000, help="Количество задач локального сервера")
+    parser.add_argument("--connections", type=int, default=32, help="Количество параллельных соединений")
+    parser.add_argument("--duration", type=float, default=10, help="Длительность замера в секундах")
+    parser.add_argument("--journal", action="store_true", help="Запустить локальный сервер в журналируемом режиме")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        process = None
+        if args.url:
+            host, _, port = args.url.rpartition(":")
+            port = int(port)
+        else:
+            process, port = start_local_server(args.tasks, Path(directory), ["--journal"] if args.journal else [])
+            host = "127.0.0.1"
+        try:
+            report = asyncio.run(run(host, port, args.connections, args.duration, args.tasks))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class RWLock:
+    """
+        Блокировка читателей-писателей: несколько потоков могут читать одновременно,
+        запись выполняется монопольно. Ожидающий писатель не пропускает новых читателей вперед,
+        поэтому поток поисков не может бесконечно откладывать изменения.
+        Поток, уже владеющий блокировкой, может захватывать ее повторно (запись внутри записи,
+        чтение внутри чтения или записи). Повышение чтения до записи не допускается.
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0 # Количество потоков, удерживающих блокировку на чтение
+        self._writer = None # Идентификатор потока, удерживающего блокировку на запись
+        self._writer_depth = 0 # Глубина повторного захвата на запись
+        self._waiting_writers = 0
+        self._local = threading.local() # Состояние блокировки чтения в текущем потоке
+
+    def acquire_read(self) -> None:
+        """
+            Захватывает блокировку на чтение, ожидая окончания записи.
+        """
+        local = self._local
+        if self._writer == threading.get_ident() or getattr(local, "reads", 0):
+            local.nested = getattr(local, "nested", 0) + 1 # Повторный захват не ждет и не учитывается в _readers
+            return
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        local.reads = 1
+
+    def release_read(self) -> None:
+        """
+            Освобождает блокировку на чтение.
+        """
+        local = self._local
+        if getattr(local, "nested", 0):
+            local.nested -= 1
+            return
+        local.reads = 0
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """
+            Захватывает блокировку на запись, ожидая ухода всех читателей и писателей.
+
+            Raises:
+                RuntimeError: Если поток удерживает блокировку на чтение.
+        """
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        if getattr(self._local, "reads", 0):
+            raise RuntimeError("Нельзя захватить блокировку на запись, удерживая ее на чтение.")
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self) -> None:
+        """
+            Освобождает блокировку на запись.
+        """
+        self._writer_depth -= 1
+        if self._writer_depth:
+            return
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """
+            Контекстный менеджер блокировки на чтение.
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """
+            Контекстный менеджер блокировки на запись.
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -1,6 +1,14 @@
-from typing import Dict
+import sys
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
 from task_manager import TaskManager
-from task import Status, Priority, Task
+from data_handler import DataHandler
+from task import Status, Priority
+from instrumentation import REGISTRY
+from cli import build_parser, run
+
+PAGE_SIZE = 20 # Количество задач на одной странице вывода
+SORT_OPTIONS = {"1": "due_date", "2": "priority"} # Выбор сортировки в меню -> ключ сортировки TaskManager
 
 def input_task_data() -> Dict:
     """
@@ -18,12 +26,56 @@ def input_task_data() -> Dict:
             "status": input(f"Статус ({Status.values_as_string()}): ").strip(),
         }
 
-def main():
+def input_sort() -> Optional[str]:
+    """
+        Запрашивает у пользователя порядок вывода задач.
+
+        Returns:
+            Optional[str]: Ключ сортировки для TaskManager.iter_search или None для порядка добавления.
+    """
+    choice = input("Сортировка (1 - по сроку, 2 - по приоритету, пусто - по порядку добавления): ").strip()
+    return SORT_OPTIONS.get(choice)
+
+def print_paged(tasks: Iterator, page_size: int = PAGE_SIZE) -> bool:
+    """
+        Выводит задачи постранично по мере их получения из итератора.
+        В строку преобразуются только выведенные задачи.
+
+        Args:
+            tasks (Iterator): Итератор задач.
+            page_size (int): Количество задач на странице.
+
+        Returns:
+            bool: True, если была выведена хотя бы одна задача.
+    """
+    page = list(islice(tasks, page_size))
+    shown = 0
+    while page:
+        print("\n\n".join(str(task) for task in page))
+        shown += len(page)
+        page = list(islice(tasks, page_size))
+        if page and input(f"\nПоказано задач: {shown}. Enter - следующая страница, q - закончить просмотр: ").strip().lower() == "q":
+            break
+    return bool(shown)
+
+def main(argv: Optional[List[str]] = None):
     """
         Основная функция программы.
-        Осуществляет взаимодействие пользователя с менеджером задач.
+        С командой или --batch выполняет команду или пакет команд (см. cli.py),
+        иначе - осуществляет взаимодействие пользователя с менеджером задач через меню.
+
+        Args:
+            argv (Optional[List[str]]): Аргументы командной строки (по умолчанию sys.argv[1:]).
     """
-    manager = TaskManager() # Создаем экземпляр менеджера задач
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    if args.op or args.batch:
+        sys.exit(run(args))
+
+    # Файл может быть открыт в нескольких процессах: изменения сохраняются под блокировкой файла,
+    # а изменения других процессов подгружаются перед каждым действием
+    # Разобранные задачи кэшируются в файле рядом с файлом данных и не разбираются заново, пока он не изменится
+    data_handler = DataHandler(args.data, shared=True, load_cache=True, archive_after_days=args.archive_after_days)
+    manager = TaskManager(data_handler=data_handler, lazy_load=True) # Задачи загружаются при первом действии, которому они нужны
     
     while True:
         try:
@@ -41,17 +93,14 @@ def main():
             match action: # Обработка выбранного действия
                 case "1": # Просмотр задач по категории (или всех задач)
                     category = input("Введите категорию (оставьте поле пустым, для просмотра всех задач): ").strip() 
+                    sort_by = input_sort()
                     print()
-                    tasks = manager.search_tasks(category=category)
-                    if tasks:
-                        print("\n\n".join(str(task) for task in tasks))
-                    else:
+                    if not print_paged(manager.iter_search(category=category, sort_by=sort_by)):
                         print("Нет задач для отображения.")
                 case "2": # Добавление новой задачи
                     print("Введите данные для создания задачи")
                     task_data = input_task_data()
-                    task = Task(**task_data) # Создаем задачу с помощью распаковки словаря
-                    manager.add_task(task) # Добавляем задачу в менеджер
+                    manager.create_task(**task_data) # Создаем задачу с помощью распаковки словаря и добавляем ее в менеджер
                     print("Задача добавлена!")
                 case "3": # Изменение существующей задачи
                     task_id = int(input("Введите ID задачи: ").strip())
@@ -100,14 +149,31 @@ def main():
                         except ValueError:
                             print(f"Некорректный статус: {status_input}")
                             task_data["status"] = None  # Если статус неверный, продолжаем без фильтрации по статусу
+                    sort_by = input_sort()
                     print("\nЗадачи:")
-                    results = manager.search_tasks(**task_data)
-                    if results:
-                        for task in results:
-                            print(task)
-                    else: print("Задач не найдено!")
+                    if not print_paged(manager.iter_search(**task_data, sort_by=sort_by)):
+                        print("Задач не найдено!")
+                    
+                case "stats": # Скрытый пункт меню: статистика производительности
+                    print(
+                        f"Сбор статистики {'включен' if REGISTRY.enabled else 'выключен'}",
+                        "1. Включить сбор",
+                        "2. Выключить сбор",
+                        "3. Показать в формате Prometheus",
+                        "4. Показать в формате JSON",
+                        "5. Сбросить статистику",
+                        sep="\n"
+                    )
+                    match input("Введите номер действия: ").strip():
+                        case "1": REGISTRY.enable()
+                        case "2": REGISTRY.disable()
+                        case "3": print(REGISTRY.to_prometheus())
+                        case "4": print(REGISTRY.to_json())
+                        case "5": REGISTRY.reset()
+                        case _: print("Некорректное действие!")
                     
                 case "0": # Завершение работы программы
+                    manager.close() # Дожидаемся записи отложенных изменений
                     print("Окончание работы.")
                     break
                 case _: # Обработка некорректного выбора
@@ -0,0 +1,192 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from task import Task, Priority, Status
+from indexes import TaskIndex
+
+# Ключ запроса: (вид запроса, ключевое слово в верхнем регистре, категория, статус, приоритет)
+QueryKey = Tuple[str, str, str, Optional[Status], Optional[Priority]]
+# Поля задачи, от которых зависят результаты запросов: категория, статус, приоритет, название и описание в верхнем регистре
+TaskFields = Tuple[str, Status, Priority, str, str]
+
+
+class QueryCache:
+    """
+        Ограниченный LRU-кэш результатов поиска задач.
+        Запись сбрасывается только теми изменениями, которые могут изменить ее результат:
+        при изменении задачи - только если задача начала или перестала подходить под запрос.
+        Результаты хранят ссылки на задачи, поэтому изменение полей задачи без смены состава
+        результата кэш не сбрасывает.
+    """
+
+    def __init__(self, max_size: int = 256):
+        """
+            Инициализация кэша.
+
+            Args:
+                max_size (int): Максимальное количество кэшируемых запросов.
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[QueryKey, List[Task]]" = OrderedDict()
+        self._lock = threading.Lock() # Кэш читают параллельные поиски под блокировкой на чтение
+        self.generation = 0 # Номер версии данных; растет при каждом сбросе
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def search_key(
+        keyword: str = "",
+        category: str = "",
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None
+    ) -> QueryKey:
+        """
+            Нормализованный ключ для TaskManager.search_tasks: ключевое слово и категория
+            сравниваются без учета регистра, поэтому и в ключ попадают в нормализованном виде.
+        """
+        return "search", keyword.upper(), TaskIndex.fold(category), status or None, priority or None
+
+    @staticmethod
+    def category_key(category: str) -> QueryKey:
+        """
+            Ключ для TaskManager.get_tasks_by_category (точное совпадение категории).
+        """
+        return "category", "", category, None, None
+
+    @staticmethod
+    def fields(task: Task) -> TaskFields:
+        """
+            Снимок полей задачи, от которых зависят результаты запросов.
+            Снимается до изменения задачи, чтобы сравнить его с новым состоянием.
+
+            Args:
+                task (Task): Задача.
+
+            Returns:
+                TaskFields: Поля задачи.
+        """
+        return task.category, task.status, task.priority, task.title.upper(), task.description.upper()
+
+    @staticmethod
+    def _matches(key: QueryKey, fields: TaskFields) -> bool:
+        """
+            Проверяет, попадает ли задача с указанными полями в результат запроса.
+        """
+        kind, keyword, category, status, priority = key
+        task_category, task_status, task_priority, title, description = fields
+        if kind == "category":
+            return task_category == category
+        return (
+            (not category or TaskIndex.fold(task_category) == category)
+            and (status is None or task_status == status)
+            and (priority is None or task_priority == priority)
+            and (not keyword or keyword in description or keyword in title)
+        )
+
+    def get(self, key: QueryKey) -> Optional[List[Task]]:
+        """
+            Возвращает копию закэшированного результата запроса.
+
+            Args:
+                key (QueryKey): Ключ запроса.
+
+            Returns:
+                Optional[List[Task]]: Результат или None, если запроса нет в кэше.
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key) # Недавно использованный запрос вытесняется последним
+            self.hits += 1
+            return list(result) # Копия: изменение списка вызывающей стороной не портит кэш
+
+    def put(self, key: QueryKey, result: List[Task], generation: int) -> None:
+        """
+            Сохраняет результат запроса, если данные не менялись с начала его вычисления.
+
+            Args:
+                key (QueryKey): Ключ запроса.
+                result (List[Task]): Результат запроса.
+                generation (int): Значение generation на момент начала вычисления.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return # Во время вычисления задачи изменились - результат мог устареть
+            self._entries[key] = list(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _drop(self, stale: List[QueryKey]) -> None:
+        """
+            Удаляет устаревшие записи и увеличивает номер версии данных. Вызывается под блокировкой.
+        """
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        self.generation += 1
+
+    def invalidate_task(self, fields: TaskFields) -> None:
+        """
+            Сбрасывает запросы, в результат которых попадает добавленная или удаленная задача.
+
+            Args:
+                fields (TaskFields): Поля задачи (см. fields()).
+        """
+        with self._lock:
+            self._drop([key for key in self._entries if self._matches(key, fields)])
+
+    def invalidate_update(self, before: TaskFields, after: TaskFields) -> None:
+        """
+            Сбрасывает запросы, для которых измененная задача начала или перестала подходить под условия.
+
+            Args:
+                before (TaskFields): Поля задачи до изменения.
+                after (TaskFields): Поля задачи после изменения.
+        """
+        with self._lock:
+            self._drop([key for key in self._entries if self._matches(key, before) != self._matches(key, after)])
+
+    def invalidate_category(self, category: str) -> None:
+        """
+            Сбрасывает запросы, результат которых может содержать задачи категории:
+            запросы этой категории и запросы без фильтра по категории.
+
+            Args:
+                category (str): Категория (точное название).
+        """
+        folded = TaskIndex.fold(category)
+        with self._lock:
+            self._drop([
+                key for key in self._entries
+                if key[2] == (category if key[0] == "category" else folded) or (key[0] == "search" and not key[2])
+            ])
+
+    def clear(self) -> None:
+        """
+            Сбрасывает весь кэш (например, после перезагрузки задач).
+        """
+        with self._lock:
+            self._drop(list(self._entries))
+
+    def stats(self) -> Dict[str, int]:
+        """
+            Счетчики кэша.
+
+            Returns:
+                Dict[str, int]: Попадания, промахи, сброшенные записи и текущий размер кэша.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
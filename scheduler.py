@@ -0,0 +1,270 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from task import Task, Priority, Status, PRIORITY_RANK
+
+
+class IndexedHeap:
+    """
+        Двоичная куча с индексом позиций: элемент можно удалить или изменить его ключ за O(log N).
+        Элементы - ID задач, ключи уникальны (последний компонент ключа - ID).
+    """
+
+    def __init__(self, items: Iterable[Tuple[tuple, int]] = ()):
+        """
+            Инициализация кучи.
+
+            Args:
+                items (Iterable[Tuple[tuple, int]]): Пары (ключ, ID) для начального заполнения.
+        """
+        self._heap: List[Tuple[tuple, int]] = list(items)
+        heapq.heapify(self._heap) # Построение кучи за O(N) вместо N вставок
+        self._positions: Dict[int, int] = {task_id: position for position, (_, task_id) in enumerate(self._heap)}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._positions
+
+    def _place(self, position: int, item: Tuple[tuple, int]) -> None:
+        """
+            Записывает элемент в позицию кучи и обновляет индекс позиций.
+        """
+        self._heap[position] = item
+        self._positions[item[1]] = position
+
+    def _sift_up(self, position: int) -> None:
+        """
+            Поднимает элемент, пока он меньше родителя.
+        """
+        item = self._heap[position]
+        while position > 0:
+            parent = (position - 1) // 2
+            if self._heap[parent] <= item:
+                break
+            self._place(position, self._heap[parent])
+            position = parent
+        self._place(position, item)
+
+    def _sift_down(self, position: int) -> None:
+        """
+            Опускает элемент, пока он больше меньшего из потомков.
+        """
+        item, size = self._heap[position], len(self._heap)
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and self._heap[child + 1] < self._heap[child]:
+                child += 1
+            if item <= self._heap[child]:
+                break
+            self._place(position, self._heap[child])
+            position = child
+        self._place(position, item)
+
+    def push(self, task_id: int, key: tuple) -> None:
+        """
+            Добавляет элемент или изменяет ключ уже добавленного.
+
+            Args:
+                task_id (int): ID задачи.
+                key (tuple): Ключ упорядочивания.
+        """
+        position = self._positions.get(task_id)
+        if position is None:
+            self._heap.append((key, task_id))
+            self._sift_up(len(self._heap) - 1)
+            return
+        old_key = self._heap[position][0]
+        self._place(position, (key, task_id))
+        if key < old_key:
+            self._sift_up(position)
+        else:
+            self._sift_down(position)
+
+    def remove(self, task_id: int) -> None:
+        """
+            Удаляет элемент, если он есть в куче.
+
+            Args:
+                task_id (int): ID задачи.
+        """
+        position = self._positions.pop(task_id, None)
+        if position is None:
+            return
+        last = self._heap.pop()
+        if position < len(self._heap): # На место удаленного ставим последний элемент и восстанавливаем порядок
+            self._place(position, last)
+            self._sift_down(position)
+            self._sift_up(self._positions[last[1]])
+
+    def first(self) -> Optional[Tuple[tuple, int]]:
+        """
+            Возвращает наименьший элемент без удаления.
+
+            Returns:
+                Optional[Tuple[tuple, int]]: Пара (ключ, ID) или None для пустой кучи.
+        """
+        return self._heap[0] if self._heap else None
+
+    def smallest(self, n: int) -> List[int]:
+        """
+            Возвращает n наименьших элементов без изменения кучи за O(n log n):
+            обходится только верхняя часть кучи через вспомогательную кучу кандидатов.
+
+            Args:
+                n (int): Количество элементов.
+
+            Returns:
+                List[int]: ID задач по возрастанию ключа.
+        """
+        result, frontier = [], [(self._heap[0], 0)] if self._heap else []
+        while frontier and len(result) < n:
+            (_, task_id), position = heapq.heappop(frontier)
+            result.append(task_id)
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(self._heap):
+                    heapq.heappush(frontier, (self._heap[child], child))
+        return result
+
+
+class TaskScheduler:
+    """
+        Очередь задач к выполнению: невыполненные задачи упорядочены по (приоритет, срок, ID)
+        в индексированной куче. Вторая куча по (срок, ID) отдает задачи, срок которых истек,
+        по одному разу. Поддерживает интерфейс индексов TaskManager (rebuild/add/remove/update).
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        """
+            Инициализация очереди.
+
+            Args:
+                tasks (Iterable[Task]): Задачи для начального заполнения.
+        """
+        self._reported: Dict[int, str] = {} # ID -> срок, о просрочке которого уже сообщено
+        self.rebuild(tasks)
+
+    @staticmethod
+    def _keys(task: Task) -> Tuple[Status, Priority, str]:
+        """
+            Поля задачи, от которых зависит ее место в очереди.
+        """
+        return task.status, task.priority, task.due_date
+
+    def rebuild(self, tasks: Iterable[Task]) -> None:
+        """
+            Полностью перестраивает очередь. Сведения о том, о каких просрочках уже сообщено,
+            сохраняются для оставшихся невыполненных задач, поэтому о них не сообщается повторно.
+
+            Args:
+                tasks (Iterable[Task]): Все задачи.
+        """
+        self._tasks: Dict[int, Task] = {}
+        self._indexed: Dict[int, Tuple[Status, Priority, str]] = {}
+        for task in tasks:
+            self._tasks.setdefault(task.id, task)
+        for task in self._tasks.values():
+            self._indexed[task.id] = self._keys(task)
+        self._reported = {
+            task_id: due_date for task_id, due_date in self._reported.items()
+            if task_id in self._indexed and self._indexed[task_id][0] != Status.DONE
+        }
+        self._queue = IndexedHeap(
+            ((PRIORITY_RANK[priority], due_date, task_id), task_id)
+            for task_id, (status, priority, due_date) in self._indexed.items() if status == Status.NOT_DONE
+        )
+        self._deadlines = IndexedHeap(
+            ((due_date, task_id), task_id)
+            for task_id, (status, _, due_date) in self._indexed.items()
+            if status != Status.DONE and self._reported.get(task_id) != due_date
+        )
+
+    def _link(self, task: Task) -> None:
+        """
+            Ставит задачу в очередь и в кучу сроков в соответствии с ее текущими полями.
+        """
+        status, priority, due_date = self._indexed[task.id] = self._keys(task)
+        if status == Status.NOT_DONE:
+            self._queue.push(task.id, (PRIORITY_RANK[priority], due_date, task.id))
+        else:
+            self._queue.remove(task.id)
+        if status != Status.DONE and self._reported.get(task.id) != due_date:
+            self._deadlines.push(task.id, (due_date, task.id)) # Новый срок - о просрочке сообщим снова
+        else:
+            self._deadlines.remove(task.id)
+        if status == Status.DONE: # Выполненная задача больше не просрочится
+            self._reported.pop(task.id, None)
+
+    def add(self, task: Task) -> None:
+        """
+            Добавляет задачу.
+
+            Args:
+                task (Task): Новая задача.
+        """
+        if task.id in self._tasks:
+            self.remove(task.id)
+        self._tasks[task.id] = task
+        self._link(task)
+
+    def remove(self, task_id: int) -> None:
+        """
+            Удаляет задачу из очереди.
+
+            Args:
+                task_id (int): ID задачи.
+        """
+        if self._tasks.pop(task_id, None) is None:
+            return
+        del self._indexed[task_id]
+        self._reported.pop(task_id, None)
+        self._queue.remove(task_id)
+        self._deadlines.remove(task_id)
+
+    def update(self, task: Task) -> None:
+        """
+            Переставляет задачу после изменения приоритета, срока или статуса за O(log N).
+
+            Args:
+                task (Task): Измененная задача.
+        """
+        if task.id not in self._tasks:
+            self.add(task)
+        elif self._indexed[task.id] != self._keys(task):
+            self._link(task)
+
+    def peek(self, n: int = 1) -> List[Task]:
+        """
+            Возвращает n самых срочных невыполненных задач, не меняя очередь.
+
+            Args:
+                n (int): Количество задач.
+
+            Returns:
+                List[Task]: Задачи по убыванию приоритета, затем по сроку.
+        """
+        return [self._tasks[task_id] for task_id in self._queue.smallest(n)]
+
+    def expire(self, today: str) -> List[Task]:
+        """
+            Забирает невыполненные задачи со сроком раньше указанной даты, о которых еще не сообщалось.
+
+            Args:
+                today (str): Текущая дата в формате YYYY-MM-DD.
+
+            Returns:
+                List[Task]: Просроченные задачи по сроку выполнения.
+        """
+        expired = []
+        while (first := self._deadlines.first()) is not None and first[0][0] < today:
+            due_date, task_id = first[0]
+            self._deadlines.remove(task_id)
+            self._reported[task_id] = due_date
+            expired.append(self._tasks[task_id])
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._queue)
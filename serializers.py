@@ -0,0 +1,271 @@
+import json
+import struct
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+try: # msgpack с C-расширением, при отсутствии используется реализация на Python ниже
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Serializer(NamedTuple):
+    """
+        Формат сериализации списка записей задач.
+
+        Attributes:
+            dumps (Callable[[List[Dict]], bytes]): Кодирует записи в байты.
+            loads (Callable[[bytes], List[Dict]]): Декодирует записи из байтов.
+            dump_item (Optional[Callable[[Dict], bytes]]): Кодирует одну запись в фрагмент файла.
+            join (Optional[Callable[[List[bytes]], bytes]]): Собирает файл из фрагментов записей.
+                Если dump_item и join заданы, закодированные записи неизмененных задач используются повторно.
+    """
+    dumps: Callable[[List[Dict]], bytes]
+    loads: Callable[[bytes], List[Dict]]
+    dump_item: Optional[Callable[[Dict], bytes]] = None
+    join: Optional[Callable[[List[bytes]], bytes]] = None
+
+
+SERIALIZERS: Dict[str, Serializer] = {} # Реестр форматов: имя -> сериализатор
+DEFAULT_SERIALIZERS = {".json": "json", ".msgpack": "msgpack"} # Формат по умолчанию для расширения файла
+_orjson = None # Модуль orjson после первого обращения (False - orjson не установлен)
+
+
+def _get_orjson():
+    """
+        Импортирует orjson при первом кодировании или разборе JSON.
+        orjson ускоряет кодирование и разбор JSON, но не обязателен, а его импорт
+        заметно замедляет запуск программы, поэтому он откладывается до первого использования.
+
+        Returns:
+            Модуль orjson или False, если он не установлен.
+    """
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+        except ImportError:
+            orjson = False
+        _orjson = orjson
+    return _orjson
+
+
+def register_serializer(name: str, serializer: Serializer) -> None:
+    """
+        Регистрирует формат сериализации.
+
+        Args:
+            name (str): Имя формата, по которому его выбирает DataHandler.
+            serializer (Serializer): Функции кодирования и декодирования.
+    """
+    SERIALIZERS[name] = serializer
+
+
+def get_serializer(name: str) -> Serializer:
+    """
+        Возвращает зарегистрированный формат сериализации.
+
+        Args:
+            name (str): Имя формата.
+
+        Returns:
+            Serializer: Формат сериализации.
+
+        Raises:
+            ValueError: Если формат не зарегистрирован.
+    """
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный формат сериализации: {name}. Доступные форматы: {', '.join(SERIALIZERS)}")
+
+
+def _json_loads(data: bytes) -> List[Dict]:
+    """
+        Разбирает JSON через orjson, если он установлен, иначе через стандартный json.
+    """
+    orjson = _get_orjson()
+    return orjson.loads(data) if orjson else json.loads(data.decode("utf-8"))
+
+
+def _json_dumps_pretty(records: List[Dict]) -> bytes:
+    """
+        Кодирует записи в JSON с отступами (исходный формат файла data.json).
+    """
+    return json.dumps(records, indent=4, ensure_ascii=False).encode("utf-8")
+
+
+def _json_dump_item_pretty(record: Dict) -> bytes:
+    """
+        Кодирует запись так, как она выглядит внутри массива JSON с отступами.
+    """
+    return ("    " + json.dumps(record, indent=4, ensure_ascii=False).replace("\n", "\n    ")).encode("utf-8")
+
+
+def _json_join_pretty(items: List[bytes]) -> bytes:
+    """
+        Собирает массив JSON с отступами из закодированных записей (результат совпадает с _json_dumps_pretty).
+    """
+    return b"[\n" + b",\n".join(items) + b"\n]" if items else b"[]"
+
+
+def _json_dump_item_compact(record: Dict) -> bytes:
+    """
+        Кодирует запись в JSON без отступов и пробелов.
+    """
+    orjson = _get_orjson()
+    if orjson:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_join_compact(items: List[bytes]) -> bytes:
+    """
+        Собирает массив JSON без отступов из закодированных записей.
+    """
+    return b"[" + b",".join(items) + b"]"
+
+
+def _json_dumps_compact(records: List[Dict]) -> bytes:
+    """
+        Кодирует записи в JSON без отступов и пробелов.
+    """
+    orjson = _get_orjson()
+    if orjson:
+        return orjson.dumps(records)
+    return json.dumps(records, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _msgpack_dumps(records: List[Dict]) -> bytes:
+    """
+        Кодирует записи в MessagePack на Python. Поддерживаются типы, из которых состоит запись задачи:
+        словари, списки, строки, целые числа, bool и None.
+    """
+    out = bytearray()
+
+    def pack(value) -> None:
+        if value is None:
+            out.append(0xc0)
+        elif value is True or value is False:
+            out.append(0xc3 if value else 0xc2)
+        elif isinstance(value, int):
+            if 0 <= value < 0x80:
+                out.append(value) # positive fixint
+            elif -32 <= value < 0:
+                out.append(value & 0xff) # negative fixint
+            else:
+                out.append(0xd3)
+                out.extend(struct.pack(">q", value)) # int64
+        elif isinstance(value, str):
+            data = value.encode("utf-8")
+            header(len(data), 0xa0, 32, ((0xd9, ">B"), (0xda, ">H"), (0xdb, ">I")))
+            out.extend(data)
+        elif isinstance(value, (list, tuple)):
+            header(len(value), 0x90, 16, ((0xdc, ">H"), (0xdd, ">I")))
+            for item in value:
+                pack(item)
+        elif isinstance(value, dict):
+            header(len(value), 0x80, 16, ((0xde, ">H"), (0xdf, ">I")))
+            for key, item in value.items():
+                pack(key)
+                pack(item)
+        else:
+            raise TypeError(f"Тип {type(value).__name__} не поддерживается форматом msgpack.")
+
+    def header(size: int, fix_code: int, fix_limit: int, sized_codes: tuple) -> None:
+        """
+            Пишет заголовок строки, массива или словаря наименьшего подходящего размера.
+        """
+        out.extend(_msgpack_header(size, fix_code, fix_limit, sized_codes))
+
+    pack(records)
+    return bytes(out)
+
+
+def _msgpack_header(size: int, fix_code: int, fix_limit: int, sized_codes: tuple) -> bytes:
+    """
+        Кодирует заголовок строки, массива или словаря MessagePack наименьшего подходящего размера.
+    """
+    if size < fix_limit:
+        return bytes((fix_code | size,))
+    for code, size_format in sized_codes:
+        if size < 1 << (8 * struct.calcsize(size_format)):
+            return bytes((code,)) + struct.pack(size_format, size)
+    raise ValueError(f"Слишком большой размер для формата msgpack: {size}")
+
+
+def _msgpack_join(items: List[bytes]) -> bytes:
+    """
+        Собирает массив MessagePack из закодированных записей: заголовок массива и записи подряд.
+    """
+    return _msgpack_header(len(items), 0x90, 16, ((0xdc, ">H"), (0xdd, ">I"))) + b"".join(items)
+
+
+MSGPACK_FIXED = { # Коды MessagePack чисел фиксированной ширины -> формат struct
+    0xca: ">f", 0xcb: ">d",
+    0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+    0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+}
+
+
+def _msgpack_loads(data: bytes) -> List[Dict]:
+    """
+        Декодирует MessagePack на Python: строки, массивы, словари, nil, bool, целые и вещественные числа
+        всех размеров. Поэтому файл, записанный библиотекой msgpack (она пишет ID от 128 как uint8/uint16),
+        читается и без нее.
+
+        Raises:
+            ValueError: Если данные обрываются или содержат неподдерживаемый тип.
+    """
+    position = 0
+
+    def take(size: int) -> bytes:
+        nonlocal position
+        chunk = data[position:position + size]
+        if len(chunk) < size:
+            raise ValueError("Данные msgpack обрываются до конца записи.")
+        position += size
+        return chunk
+
+    def unpack():
+        code = take(1)[0]
+        if code <= 0x7f:
+            return code
+        if code >= 0xe0:
+            return code - 0x100
+        if 0xa0 <= code <= 0xbf:
+            return take(code & 0x1f).decode("utf-8")
+        if 0x90 <= code <= 0x9f:
+            return [unpack() for _ in range(code & 0x0f)]
+        if 0x80 <= code <= 0x8f:
+            return {unpack(): unpack() for _ in range(code & 0x0f)}
+        if code == 0xc0:
+            return None
+        if code in (0xc2, 0xc3):
+            return code == 0xc3
+        if code in MSGPACK_FIXED:
+            size_format = MSGPACK_FIXED[code]
+            return struct.unpack(size_format, take(struct.calcsize(size_format)))[0]
+        if code in (0xd9, 0xda, 0xdb):
+            size = int.from_bytes(take({0xd9: 1, 0xda: 2, 0xdb: 4}[code]), "big")
+            return take(size).decode("utf-8")
+        if code in (0xdc, 0xdd):
+            size = int.from_bytes(take(2 if code == 0xdc else 4), "big")
+            return [unpack() for _ in range(size)]
+        if code in (0xde, 0xdf):
+            size = int.from_bytes(take(2 if code == 0xde else 4), "big")
+            return {unpack(): unpack() for _ in range(size)}
+        raise ValueError(f"Неподдерживаемый тип msgpack: 0x{code:02x}")
+
+    return unpack()
+
+
+register_serializer("json", Serializer(_json_dumps_pretty, _json_loads, _json_dump_item_pretty, _json_join_pretty))
+register_serializer("json-compact", Serializer(_json_dumps_compact, _json_loads, _json_dump_item_compact, _json_join_compact))
+if msgpack:
+    register_serializer("msgpack", Serializer(
+        msgpack.packb, lambda data: msgpack.unpackb(data, raw=False), msgpack.packb, _msgpack_join
+    ))
+else:
+    register_serializer("msgpack", Serializer(
+        _msgpack_dumps, _msgpack_loads, _msgpack_dumps, _msgpack_join
+    ))
@@ -0,0 +1,504 @@
+import argparse
+import asyncio
+import json
+import re
+import signal
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from task import Task, Priority, Status
+from data_handler import DataHandler
+from async_task_manager import AsyncTaskManager
+
+STREAM_CHUNK = 500 # Количество задач в одном фрагменте потоковой выдачи
+MAX_HEADERS = 100 # Максимальное количество заголовков запроса
+MAX_BODY = 16 * 1024 * 1024 # Максимальный размер тела запроса в байтах
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """
+        Ошибка обработки запроса, которая возвращается клиенту с указанным кодом ответа.
+    """
+    def __init__(self, status: int, message: str):
+        """
+            Args:
+                status (int): Код ответа HTTP.
+                message (str): Текст ошибки для клиента.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+class Request(NamedTuple):
+    """
+        Разобранный HTTP-запрос.
+
+        Attributes:
+            method (str): Метод запроса.
+            path (str): Путь без строки запроса.
+            query (Dict[str, str]): Параметры строки запроса.
+            headers (Dict[str, str]): Заголовки (имена в нижнем регистре).
+            body (bytes): Тело запроса.
+            keep_alive (bool): Соединение остается открытым после ответа.
+    """
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes
+    keep_alive: bool
+
+    def json(self) -> Any:
+        """
+            Разбирает тело запроса как JSON.
+
+            Raises:
+                HTTPError: Если тело не является корректным JSON.
+        """
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            raise HTTPError(400, "Тело запроса не является корректным JSON.")
+
+
+class TaskStream(NamedTuple):
+    """
+        Ответ с большим списком задач: отправляется фрагментами (chunked), задачи кодируются по мере отправки.
+    """
+    tasks: Iterator[Task]
+
+
+def _parse_enum(enum, value: Optional[str]):
+    """
+        Преобразует значение параметра запроса в элемент перечисления (Status, Priority).
+
+        Raises:
+            HTTPError: Если значение недопустимо.
+    """
+    if not value:
+        return None
+    try:
+        return enum(value)
+    except ValueError:
+        raise HTTPError(400, f"Недопустимое значение: {value}. Допустимые значения: {enum.values_as_string()}")
+
+
+def _check_update(fields: Any) -> Tuple[int, Dict]:
+    """
+        Проверяет изменение из пакета: ID задачи и новые значения полей, как их примет update_task.
+
+        Returns:
+            Tuple[int, Dict]: ID задачи и изменяемые поля.
+
+        Raises:
+            HTTPError: Если изменение не является объектом с целым полем id или содержит недопустимое поле.
+            ValueError: Если срок выполнения не в формате YYYY-MM-DD.
+    """
+    if not isinstance(fields, dict) or type(fields.get("id")) is not int:
+        raise HTTPError(400, "Каждое изменение должно быть объектом с целым полем id.")
+    fields = dict(fields)
+    task_id = fields.pop("id")
+    for key, value in fields.items():
+        if key in ("title", "description", "category"):
+            if not isinstance(value, str):
+                raise HTTPError(400, f"Поле {key} должно быть строкой.")
+        elif key == "due_date":
+            Task.validate_data(value)
+        elif key in ("priority", "status"):
+            enum = Priority if key == "priority" else Status
+            if value not in enum.list_values():
+                raise HTTPError(400, f"Недопустимое значение: {value}. Допустимые значения: {enum.values_as_string()}")
+        else:
+            raise HTTPError(400, f"Неизвестное поле задачи: {key}")
+    return task_id, fields
+
+
+def _parse_int(value: Optional[str], default: Optional[int]) -> Optional[int]:
+    """
+        Преобразует параметр запроса в неотрицательное целое число.
+
+        Raises:
+            HTTPError: Если значение не является неотрицательным целым числом.
+    """
+    if value is None or value == "":
+        return default
+    if not value.isdigit():
+        raise HTTPError(400, f"Ожидалось неотрицательное целое число: {value}")
+    return int(value)
+
+
+class TaskServer:
+    """
+        HTTP/JSON API над одним загруженным в память менеджером задач.
+        Построен на asyncio и стандартной библиотеке: соединения HTTP/1.1 переиспользуются (keep-alive),
+        большие списки задач отправляются фрагментами, а запись файла выполняет AsyncTaskManager в пуле потоков.
+
+        Маршруты:
+            GET    /tasks          - поиск (keyword, category, status, priority, sort, offset, limit), потоковый ответ
+            POST   /tasks          - создание задачи
+            GET    /tasks/{id}     - задача по ID
+            PATCH  /tasks/{id}     - изменение задачи
+            DELETE /tasks/{id}     - удаление задачи
+            POST   /tasks/bulk     - пакет изменений: {"create": [...], "update": [...], "delete": [...]}
+            GET    /next           - самые срочные невыполненные задачи (n)
+            POST   /next           - взять самую срочную задачу в работу (status)
+    """
+
+    def __init__(self, manager: AsyncTaskManager, host: str = "127.0.0.1", port: int = 8080, idle_timeout: float = 15):
+        """
+            Инициализация сервера.
+
+            Args:
+                manager (AsyncTaskManager): Менеджер задач, который обслуживает сервер.
+                host (str): Адрес для входящих соединений.
+                port (int): Порт (0 - выбрать свободный порт).
+                idle_timeout (float): Время в секундах, после которого простаивающее соединение закрывается.
+        """
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set() # Открытые соединения (закрываются при остановке)
+        self._routes: List[Tuple[str, "re.Pattern", Callable[..., Awaitable]]] = [
+            ("GET", re.compile(r"/tasks"), self.list_tasks),
+            ("POST", re.compile(r"/tasks"), self.create_task),
+            ("POST", re.compile(r"/tasks/bulk"), self.bulk),
+            ("GET", re.compile(r"/tasks/(\d+)"), self.get_task),
+            ("PATCH", re.compile(r"/tasks/(\d+)"), self.update_task),
+            ("DELETE", re.compile(r"/tasks/(\d+)"), self.delete_task),
+            ("GET", re.compile(r"/next"), self.peek_next),
+            ("POST", re.compile(r"/next"), self.pop_next),
+        ]
+
+    async def start(self) -> int:
+        """
+            Загружает задачи и начинает принимать соединения.
+
+            Returns:
+                int: Порт, на котором работает сервер.
+        """
+        await self.manager.wait_until_loaded()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self) -> None:
+        """
+            Обслуживает соединения до отмены задачи, затем сохраняет изменения.
+        """
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """
+            Прекращает прием соединений и сохраняет изменения задач.
+        """
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections): # Простаивающие keep-alive соединения не дают серверу закрыться
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.manager.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+            Обслуживает одно соединение: запросы читаются и выполняются по очереди, пока клиент
+            не закроет соединение, не попросит его закрыть или не будет простаивать дольше idle_timeout.
+        """
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.idle_timeout)
+                except HTTPError as error:
+                    await self._send_json(writer, error.status, {"error": str(error)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                await self._respond(writer, request)
+                if not request.keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass # Клиент ушел или простаивал - просто закрываем соединение
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+        """
+            Читает и разбирает очередной запрос соединения.
+
+            Returns:
+                Optional[Request]: Запрос или None, если клиент закрыл соединение.
+
+            Raises:
+                HTTPError: Если запрос некорректен.
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Некорректная строка запроса.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(400, "Слишком много заголовков.")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length", "0")
+        if not length.isdigit():
+            raise HTTPError(400, "Некорректный заголовок Content-Length.")
+        if int(length) > MAX_BODY:
+            raise HTTPError(413, "Слишком большое тело запроса.")
+        body = await reader.readexactly(int(length)) if int(length) else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        url = urlsplit(target)
+        return Request(method.upper(), url.path.rstrip("/") or "/", dict(parse_qsl(url.query)), headers, body, keep_alive)
+
+    async def _respond(self, writer: asyncio.StreamWriter, request: Request) -> None:
+        """
+            Выполняет запрос и отправляет ответ. Ошибки обработчика превращаются в ответ с кодом ошибки.
+        """
+        try:
+            status, payload = await self._dispatch(request)
+        except HTTPError as error:
+            status, payload = error.status, {"error": str(error)}
+        except (ValueError, TypeError) as error: # Ошибки валидации полей задачи
+            status, payload = 400, {"error": str(error)}
+        except Exception as error:
+            status, payload = 500, {"error": str(error)}
+        if isinstance(payload, TaskStream):
+            await self._send_stream(writer, status, payload.tasks, request.keep_alive)
+        else:
+            await self._send_json(writer, status, payload, request.keep_alive)
+
+    async def _dispatch(self, request: Request) -> Tuple[int, Any]:
+        """
+            Находит обработчик маршрута и вызывает его.
+
+            Raises:
+                HTTPError: Если маршрут не найден или метод не поддерживается.
+        """
+        allowed = False
+        for method, pattern, handler in self._routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if method == request.method:
+                return await handler(request, *match.groups())
+            allowed = True
+        if allowed:
+            raise HTTPError(405, f"Метод {request.method} не поддерживается для {request.path}.")
+        raise HTTPError(404, f"Маршрут {request.path} не найден.")
+
+    @staticmethod
+    def _head(status: int, headers: Dict[str, str], keep_alive: bool) -> bytes:
+        """
+            Кодирует строку статуса и заголовки ответа.
+        """
+        headers = {"Content-Type": "application/json; charset=utf-8", **headers,
+                   "Connection": "keep-alive" if keep_alive else "close"}
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"] + [f"{name}: {value}" for name, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        """
+            Отправляет ответ с телом JSON.
+        """
+        body = b"" if status == 204 else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(self._head(status, {"Content-Length": str(len(body))}, keep_alive) + body)
+        await writer.drain()
+
+    async def _send_stream(self, writer: asyncio.StreamWriter, status: int, tasks: Iterator[Task], keep_alive: bool) -> None:
+        """
+            Отправляет массив задач фрагментами (Transfer-Encoding: chunked). Задачи кодируются
+            по STREAM_CHUNK штук, и следующий фрагмент готовится только после отправки предыдущего,
+            поэтому весь ответ в памяти не собирается. Задачи из архива читаются в пуле потоков (см. next_tasks).
+        """
+        writer.write(self._head(status, {"Transfer-Encoding": "chunked"}, keep_alive))
+        separator = "["
+        while True:
+            batch = [json.dumps(task.to_dict(), ensure_ascii=False) for task in await self.manager.next_tasks(tasks, STREAM_CHUNK)]
+            if not batch:
+                break
+            chunk = (separator + ",".join(batch)).encode("utf-8")
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            await writer.drain() # Ждем, пока клиент примет фрагмент; тем временем обслуживаются другие соединения
+            separator = ","
+        tail = b"[]" if separator == "[" else b"]"
+        writer.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(tail), tail))
+        await writer.drain()
+
+    async def _task_or_404(self, task_id: str) -> Task:
+        """
+            Получает задачу по ID из пути запроса.
+
+            Raises:
+                HTTPError: Если задача не найдена.
+        """
+        task = await self.manager.get_task(int(task_id))
+        if task is None:
+            raise HTTPError(404, f"Задача с ID {task_id} не найдена.")
+        return task
+
+    @staticmethod
+    def _object(request: Request) -> Dict:
+        """
+            Тело запроса в виде объекта JSON.
+
+            Raises:
+                HTTPError: Если тело не является объектом JSON.
+        """
+        data = request.json()
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Ожидался объект JSON.")
+        return data
+
+    async def list_tasks(self, request: Request) -> Tuple[int, TaskStream]:
+        """
+            GET /tasks: поиск задач с потоковой выдачей результата.
+        """
+        query = request.query
+        sort_by = query.get("sort") or None
+        tasks = await self.manager.iter_search(
+            keyword=query.get("keyword", ""),
+            category=query.get("category", ""),
+            status=_parse_enum(Status, query.get("status")),
+            priority=_parse_enum(Priority, query.get("priority")),
+            sort_by=sort_by,
+            offset=_parse_int(query.get("offset"), 0),
+            limit=_parse_int(query.get("limit"), None),
+        )
+        return 200, TaskStream(tasks)
+
+    async def create_task(self, request: Request) -> Tuple[int, Dict]:
+        """
+            POST /tasks: создание задачи из полей тела запроса.
+        """
+        task = await self.manager.create_task(**self._object(request))
+        return 201, task.to_dict()
+
+    async def get_task(self, request: Request, task_id: str) -> Tuple[int, Dict]:
+        """
+            GET /tasks/{id}: задача по ID.
+        """
+        return 200, (await self._task_or_404(task_id)).to_dict()
+
+    async def update_task(self, request: Request, task_id: str) -> Tuple[int, Dict]:
+        """
+            PATCH /tasks/{id}: изменение полей задачи.
+        """
+        if not await self.manager.update_task(int(task_id), **self._object(request)):
+            raise HTTPError(404, f"Задача с ID {task_id} не найдена.")
+        return 200, (await self._task_or_404(task_id)).to_dict()
+
+    async def delete_task(self, request: Request, task_id: str) -> Tuple[int, None]:
+        """
+            DELETE /tasks/{id}: удаление задачи.
+        """
+        if not await self.manager.delete_many([int(task_id)]):
+            raise HTTPError(404, f"Задача с ID {task_id} не найдена.")
+        return 204, None
+
+    async def bulk(self, request: Request) -> Tuple[int, Dict]:
+        """
+            POST /tasks/bulk: пакет изменений одним запросом. Новые задачи, изменения и ID удаляемых задач
+            проверяются до внесения каких-либо изменений, поэтому ошибка в любой части отменяет весь пакет.
+            Затем пакет применяется одной группой TaskManager.batch() и сохраняется одной записью файла.
+        """
+        data = self._object(request)
+        create, update, delete = data.get("create", []), data.get("update", []), data.get("delete", [])
+        if not all(isinstance(items, list) for items in (create, update, delete)):
+            raise HTTPError(400, "Поля create, update и delete должны быть списками.")
+        tasks = [Task(**fields) for fields in create]
+        updates = [_check_update(fields) for fields in update]
+        if not all(type(task_id) is int for task_id in delete): # bool тоже int, но ID задачи не является
+            raise HTTPError(400, "Поле delete должно содержать целые ID задач.")
+
+        def apply(manager) -> Tuple[int, int]:
+            manager.add_tasks(tasks)
+            updated = sum(manager.update_task(task_id, **fields) for task_id, fields in updates)
+            return updated, manager.delete_many(delete)
+
+        updated, deleted = await self.manager.batch(apply)
+        return 200, {"created": [task.id for task in tasks], "updated": updated, "deleted": deleted}
+
+    async def peek_next(self, request: Request) -> Tuple[int, List[Dict]]:
+        """
+            GET /next: самые срочные невыполненные задачи.
+        """
+        tasks = await self.manager.peek_next(_parse_int(request.query.get("n"), 1))
+        return 200, [task.to_dict() for task in tasks]
+
+    async def pop_next(self, request: Request) -> Tuple[int, Optional[Dict]]:
+        """
+            POST /next: самая срочная задача получает статус из тела запроса (по умолчанию "В работе").
+        """
+        status = _parse_enum(Status, (self._object(request) if request.body else {}).get("status"))
+        task = await self.manager.pop_next(status or Status.IN_PROGRESS)
+        if task is None:
+            raise HTTPError(404, "Невыполненных задач нет.")
+        return 200, task.to_dict()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    """
+        Запускает сервер с параметрами командной строки и обслуживает соединения до остановки.
+    """
+    manager = AsyncTaskManager(
+        data_handler=DataHandler(args.data_file, journal=args.journal, archive_after_days=args.archive_after_days),
+        coalesce_ms=args.coalesce_ms,
+        query_cache_size=args.query_cache or None,
+        scheduler=args.scheduler
+    )
+    server = TaskServer(manager, args.host, args.port)
+    try: # SIGTERM останавливает сервер так же, как Ctrl+C: изменения сохраняются
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError: # Windows
+        pass
+    port = await server.start()
+    print(f"Сервер менеджера задач: http://{args.host}:{port}", flush=True) # Строку читает load_test.py
+    await server.serve_forever()
+
+
+def main() -> None:
+    """
+        Точка входа режима сервера.
+    """
+    parser = argparse.ArgumentParser(description="HTTP/JSON API менеджера задач")
+    parser.add_argument("data_file", nargs="?", default="data.json", help="Файл с данными")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес для входящих соединений")
+    parser.add_argument("--port", type=int, default=8080, help="Порт (0 - выбрать свободный)")
+    parser.add_argument("--coalesce-ms", type=float, default=50, help="Задержка для объединения записей файла")
+    parser.add_argument("--query-cache", type=int, default=256, help="Размер кэша результатов поиска (0 - выключен)")
+    parser.add_argument("--scheduler", action="store_true", help="Держать очередь задач для /next")
+    parser.add_argument("--journal", action="store_true",
+                        help="Дописывать изменения в журнал вместо перезаписи файла (для нагрузки с частыми изменениями)")
+    parser.add_argument("--archive-after-days", type=int, metavar="DAYS",
+                        help="Переносить в архив выполненные задачи со сроком старше указанного числа дней")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from task import Task, TaskRecord
+from data_handler import DataHandler
+from instrumentation import instrumented
+
+FIELDS = ("id", "title", "description", "category", "due_date", "priority", "status") # Порядок полей в строке шарда
+MANIFEST = "shards.json" # Файл с параметрами разбиения в каталоге хранилища
+
+
+def _read_records(path: str) -> Iterable[Dict]:
+    """
+        Читает записи задач из файла шарда. Шарды небольшие, поэтому JSON и MessagePack
+        разбираются целиком сериализатором, а не потоковым разбором.
+
+        Args:
+            path (str): Путь к файлу шарда.
+
+        Returns:
+            Iterable[Dict]: Записи задач.
+    """
+    handler = DataHandler(path)
+    if handler.serializer is None:
+        return handler.iter_records()
+    return handler.serializer.loads(handler.file_path.read_bytes())
+
+
+def _read_shard(path: str) -> List[tuple]:
+    """
+        Читает файл шарда в дочернем процессе. Возвращает кортежи, а не задачи:
+        кортежи строк передаются между процессами заметно быстрее объектов.
+
+        Args:
+            path (str): Путь к файлу шарда.
+
+        Returns:
+            List[tuple]: Записи задач в порядке FIELDS.
+    """
+    return [tuple(record[field] for field in FIELDS) for record in _read_records(path)]
+
+
+def _write_shard(path: str, rows: List[tuple]) -> None:
+    """
+        Атомарно записывает файл шарда в дочернем процессе.
+
+        Args:
+            path (str): Путь к файлу шарда.
+            rows (List[tuple]): Записи задач в порядке FIELDS.
+    """
+    DataHandler(path).save(Task.from_dict(dict(zip(FIELDS, row)), lazy=True) for row in rows)
+
+
+@instrumented
+class ShardedDataHandler:
+    """
+        Хранилище задач в каталоге файлов-шардов, разбитых по диапазонам ID.
+        Шарды читаются и записываются параллельно в пуле процессов, а при изменении задач
+        перезаписываются только шарды, в которых они лежат.
+        Реализует ту же часть интерфейса DataHandler, которой пользуется TaskManager.
+    """
+    def __init__(
+        self,
+        directory: str,
+        shard_size: int = 10_000,
+        shard_format: str = ".json",
+        workers: Optional[int] = None,
+        parallel_threshold: int = 4 * 1024 * 1024
+    ):
+        """
+            Инициализация хранилища. Если каталог уже содержит шарды, параметры разбиения
+            берутся из его файла shards.json.
+
+            Args:
+                directory (str): Каталог хранилища (создается при отсутствии).
+                shard_size (int): Количество ID в одном шарде.
+                shard_format (str): Расширение файлов шардов (.json, .csv, .msgpack).
+                workers (Optional[int]): Количество процессов (по умолчанию - по числу ядер).
+                parallel_threshold (int): Размер данных в байтах, начиная с которого используется пул процессов.
+                    Запуск процессов дороже разбора небольших файлов.
+
+            Raises:
+                ValueError: Если формат шардов не поддерживается.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.directory / MANIFEST
+        if manifest_path.exists(): # Разбиение существующего хранилища менять нельзя
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            shard_size, shard_format = manifest["shard_size"], manifest["shard_format"]
+        elif shard_format not in (".json", ".csv", ".msgpack"):
+            raise ValueError(f"Неподдерживаемый формат шардов: {shard_format}")
+        else:
+            manifest_path.write_text(json.dumps({"shard_size": shard_size, "shard_format": shard_format}), encoding="utf-8")
+        self.shard_size = shard_size
+        self.shard_format = shard_format
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.shared = False # Интерфейс DataHandler: хранилище используется одним процессом
+        self.supports_queries = False
+        self.archive = None # Архив выполненных задач для шардов не поддерживается
+        self._shards: Optional[Dict[int, Dict[int, Task]]] = None # Номер шарда -> задачи шарда по ID
+        self._pool: Optional[Executor] = None
+
+    def shard_of(self, task_id: int) -> int:
+        """
+            Возвращает номер шарда, в котором хранится задача.
+
+            Args:
+                task_id (int): ID задачи.
+
+            Returns:
+                int: Номер шарда.
+        """
+        return task_id // self.shard_size
+
+    def shard_path(self, shard: int) -> Path:
+        """
+            Возвращает путь к файлу шарда.
+
+            Args:
+                shard (int): Номер шарда.
+
+            Returns:
+                Path: Путь к файлу шарда.
+        """
+        return self.directory / f"tasks-{shard:06d}{self.shard_format}"
+
+    def _existing_shards(self) -> List[Tuple[int, Path]]:
+        """
+            Находит файлы шардов в каталоге.
+
+            Returns:
+                List[Tuple[int, Path]]: Номера шардов и пути к их файлам по возрастанию номера.
+        """
+        return sorted(
+            (int(path.stem.split("-", 1)[1]), path)
+            for path in self.directory.glob(f"tasks-*{self.shard_format}")
+        )
+
+    def _executor(self, paths: List[Path]) -> Optional[Executor]:
+        """
+            Возвращает пул процессов, если шардов несколько и объем данных оправдывает запуск процессов.
+        """
+        if self.workers < 2 or len(paths) < 2:
+            return None
+        if sum(path.stat().st_size for path in paths if path.exists()) < self.parallel_threshold:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def load(self) -> List[Task]:
+        """
+            Загружает задачи из всех шардов, разбирая файлы параллельно в пуле процессов.
+
+            Returns:
+                List[Task]: Задачи в порядке ID.
+        """
+        shards = self._existing_shards()
+        paths = [path for _, path in shards]
+        executor = self._executor(paths)
+        if executor:
+            records = (map(dict, map(partial(zip, FIELDS), rows)) for rows in executor.map(_read_shard, map(str, paths)))
+        else:
+            records = map(_read_records, map(str, paths))
+        self._shards = {}
+        tasks = []
+        for (shard, _), shard_records in zip(shards, records):
+            # Записи уже прошли валидацию при сохранении - дата разберется при первом обращении
+            members = [Task.from_dict(record, lazy=True) for record in shard_records]
+            self._shards[shard] = {task.id: task for task in members}
+            tasks.extend(members)
+        return tasks
+
+    def stream(self) -> Iterator[Task]:
+        """
+            Загружает задачи (интерфейс DataHandler.stream).
+
+            Yields:
+                Task: Очередная задача.
+        """
+        yield from self.load()
+
+    def _write(self, shards: Iterable[int]) -> None:
+        """
+            Перезаписывает указанные шарды, параллельно, если их несколько. Пустые шарды удаляются.
+
+            Args:
+                shards (Iterable[int]): Номера шардов.
+        """
+        writes = []
+        for shard in shards:
+            members = self._shards.get(shard)
+            if members:
+                writes.append((str(self.shard_path(shard)), sorted(members.values(), key=lambda task: task.id)))
+            else:
+                self._shards.pop(shard, None)
+                self.shard_path(shard).unlink(missing_ok=True)
+        executor = self._executor([Path(path) for path, _ in writes])
+        if executor is None:
+            for path, tasks in writes:
+                DataHandler(path).save(tasks)
+            return
+        futures = [
+            executor.submit(_write_shard, path, [tuple(task.to_dict().values()) for task in tasks])
+            for path, tasks in writes
+        ]
+        for future in futures:
+            future.result() # Пробрасываем ошибки записи
+
+    def save(self, tasks: Iterable[Task]) -> None:
+        """
+            Полностью перезаписывает хранилище списком задач.
+
+            Args:
+                tasks (Iterable[Task]): Задачи для сохранения.
+        """
+        stale = {shard for shard, _ in self._existing_shards()}
+        self._shards = {}
+        for task in tasks:
+            self._shards.setdefault(self.shard_of(task.id), {})[task.id] = task
+        self._write(stale | set(self._shards))
+
+    def persist(self, tasks: Iterable[Task], changed: Iterable[Task] = (), deleted: Iterable[int] = ()) -> None:
+        """
+            Сохраняет изменения, перезаписывая только шарды с измененными или удаленными задачами.
+
+            Args:
+                tasks (Iterable[Task]): Все задачи после изменения (нужны, только если хранилище еще не загружалось).
+                changed (Iterable[Task]): Добавленные или измененные задачи.
+                deleted (Iterable[int]): ID удаленных задач.
+        """
+        if self._shards is None:
+            self.save(tasks)
+            return
+        dirty = set()
+        for task in changed:
+            shard = self.shard_of(task.id)
+            self._shards.setdefault(shard, {})[task.id] = task
+            dirty.add(shard)
+        for task_id in deleted:
+            shard = self.shard_of(task_id)
+            self._shards.get(shard, {}).pop(task_id, None)
+            dirty.add(shard)
+        self._write(dirty)
+
+    def snapshot(
+        self,
+        tasks: Iterable[Task],
+        changed: Iterable[Task] = (),
+        deleted: Iterable[int] = ()
+    ) -> Tuple[List[TaskRecord], List[TaskRecord], List[int]]:
+        """
+            Интерфейс DataHandler.snapshot. Шард перезаписывается целиком, поэтому снимками заменяются
+            и остальные задачи шардов, которые перезапишет persist.
+
+            Args:
+                tasks (Iterable[Task]): Все задачи после изменения.
+                changed (Iterable[Task]): Добавленные или измененные задачи.
+                deleted (Iterable[int]): ID удаленных задач.
+
+            Returns:
+                Tuple[List[TaskRecord], List[TaskRecord], List[int]]: Аргументы persist.
+        """
+        changed, deleted = [TaskRecord(task) for task in changed], list(deleted)
+        if self._shards is None:
+            return [TaskRecord(task) for task in tasks], changed, deleted
+        for shard in {self.shard_of(task.id) for task in changed} | {self.shard_of(task_id) for task_id in deleted}:
+            members = self._shards.get(shard, {})
+            for task_id, task in members.items():
+                if not isinstance(task, TaskRecord):
+                    members[task_id] = TaskRecord(task)
+        return [], changed, deleted
+
+    def file_lock(self) -> ContextManager:
+        """
+            Интерфейс DataHandler: блокировка между процессами не используется.
+        """
+        return nullcontext()
+
+    def changed_on_disk(self) -> bool:
+        """
+            Интерфейс DataHandler: хранилище изменяет только этот процесс.
+        """
+        return False
+
+    def flush(self) -> None:
+        """
+            Интерфейс DataHandler: изменения записываются сразу.
+        """
+
+    def close(self) -> None:
+        """
+            Завершает пул процессов.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
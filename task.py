@@ -1,6 +1,6 @@
 from enum import Enum
-from typing import Optional, Dict, List, Any
-from datetime import datetime
+from typing import Callable, Optional, Dict, List, Any
+from datetime import date, datetime
 
 
 class EnumBase(Enum):
@@ -41,12 +41,19 @@ class Status(EnumBase):
     """
     DONE = 'Выполнена'
     NOT_DONE = 'Не выполнена'
+    IN_PROGRESS = 'В работе'
+
+PRIORITY_RANK: Dict[Priority, int] = {priority: rank for rank, priority in enumerate(Priority)} # Высокий приоритет - первым
 
 class Task:
     """
         Класс для представления задачи с аттрибутами и методами для манипуляций с задачами.
     """
-    _id_counter = 0  # Статическая переменная для автоматической генерации ID задач
+    # Атрибуты хранятся в слотах без __dict__, что заметно уменьшает объем памяти на задачу
+    __slots__ = (
+        "_id", "_title", "_description", "_category", "_due_date", "_due_date_str", "_priority", "_status",
+        "_fragment", "_version"
+    )
     def __init__(self, title: str, description: str, category: str, due_date, priority: Priority, status: Status = Status.NOT_DONE):
         """
             Инициализация задачи с необходимыми аттрибутами.
@@ -59,25 +66,49 @@ class Task:
                 priority (Priority): Приоритет задачи.
                 status (Status): Статус задачи (по умолчанию - "Не выполнена").
         """
-        self._id: int = Task._generate_id() # Генерация уникального ID задачи
+        self._id: Optional[int] = None # ID выдает менеджер задач при добавлении задачи
+        self._fragment: Optional[tuple] = None # Закодированная запись задачи: (формат, байты, версия)
+        self._version = 0 # Номер изменения задачи: сеттеры увеличивают его, делая закодированную запись устаревшей
         self.title: str = title
         self.description: str = description
         self.category: str = category
-        self._due_date: datetime = self.validate_data(due_date)  # Валидация даты
+        self.due_date = due_date  # Валидация даты выполняется в сеттере
         self.priority: str = priority
         self.status: str = status
     
-    @classmethod
-    def _generate_id(cls) -> int:
+    @staticmethod
+    def _is_iso_date(value) -> bool:
         """
-            Генерирует уникальный ID для задачи.
+            Проверяет, что значение - строка ровно формата YYYY-MM-DD из ASCII-цифр.
+
+            Args:
+                value: Проверяемое значение.
 
             Returns:
-                int: Уникальный ID задачи.
+                bool: True, если формат совпадает.
         """
-        cls._id_counter += 1
-        return cls._id_counter
-        
+        return (
+            isinstance(value, str) and len(value) == 10 and value.isascii()
+            and value[4] == "-" and value[7] == "-"
+            and value[:4].isdigit() and value[5:7].isdigit() and value[8:].isdigit()
+        )
+
+    @staticmethod
+    def _check_iso_date(value: str) -> None:
+        """
+            Проверяет, что строка формата YYYY-MM-DD (см. _is_iso_date) - существующая дата, не создавая datetime.
+
+            Args:
+                value (str): Строка даты.
+
+            Raises:
+                ValueError: Если такой даты нет (например, 2024-13-45).
+        """
+        try:
+            date.fromisoformat(value) # Проверка диапазона месяца и дня без разбора strptime
+        except ValueError:
+            raise ValueError("Дата должна быть в формате YYYY-MM-DD")
+
     @staticmethod
     def validate_data(date_str: str) -> datetime:
         """
@@ -92,11 +123,16 @@ class Task:
             Raises:
                 ValueError: Если строка не соответствует формату.
         """
+        if Task._is_iso_date(date_str): # Быстрый разбор строки фиксированного формата без strptime
+            try:
+                return datetime(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:]))
+            except ValueError:
+                raise ValueError("Дата должна быть в формате YYYY-MM-DD")
         try:
             return datetime.strptime(date_str, "%Y-%m-%d")
 
-        except ValueError:
-            raise "Дата должна быть в формате YYYY-MM-DD"  
+        except (TypeError, ValueError):
+            raise ValueError("Дата должна быть в формате YYYY-MM-DD")
             
     @property
     def id(self) -> Optional[int]:
@@ -125,6 +161,70 @@ class Task:
         if not isinstance(value, int) or value < 0:
             raise TypeError("Некорректное значение для ID задачи.")
         self._id = value 
+        self._version += 1
+
+    @property
+    def title(self) -> str:
+        """
+            Геттер для получения названия задачи.
+
+            Returns:
+                str: Название задачи.
+        """
+        return self._title
+
+    @title.setter
+    def title(self, value: str) -> None:
+        """
+            Сеттер для установки названия задачи. Помечает запись задачи измененной.
+
+            Args:
+                value (str): Новое название задачи.
+        """
+        self._title = value
+        self._version += 1
+
+    @property
+    def description(self) -> str:
+        """
+            Геттер для получения описания задачи.
+
+            Returns:
+                str: Описание задачи.
+        """
+        return self._description
+
+    @description.setter
+    def description(self, value: str) -> None:
+        """
+            Сеттер для установки описания задачи. Помечает запись задачи измененной.
+
+            Args:
+                value (str): Новое описание задачи.
+        """
+        self._description = value
+        self._version += 1
+
+    @property
+    def category(self) -> str:
+        """
+            Геттер для получения категории задачи.
+
+            Returns:
+                str: Категория задачи.
+        """
+        return self._category
+
+    @category.setter
+    def category(self, value: str) -> None:
+        """
+            Сеттер для установки категории задачи. Помечает запись задачи измененной.
+
+            Args:
+                value (str): Новая категория задачи.
+        """
+        self._category = value
+        self._version += 1
         
     @property
     def due_date(self) -> str:
@@ -134,7 +234,7 @@ class Task:
             Returns:
                 str: Дата в строковом формате.
         """
-        return self._due_date.strftime("%Y-%m-%d")
+        return self._due_date_str
     
     @due_date.setter
     def due_date(self, value: str) -> None:
@@ -144,7 +244,23 @@ class Task:
             Args:
                 value (str): Новая дата задачи в формате YYYY-MM-DD.
         """
-        self._due_date = self.validate_data(value)
+        self._due_date: Optional[datetime] = self.validate_data(value)
+        # Строка даты хранится готовой; нестрогие варианты вроде 2024-1-5 приводятся к YYYY-MM-DD
+        self._due_date_str: str = value if self._is_iso_date(value) else self._due_date.strftime("%Y-%m-%d")
+        self._version += 1
+
+    @property
+    def due_datetime(self) -> datetime:
+        """
+            Геттер для получения срока выполнения в виде datetime.
+            У задач, загруженных лениво, дата разбирается при первом обращении.
+
+            Returns:
+                datetime: Срок выполнения задачи.
+        """
+        if self._due_date is None:
+            self._due_date = self.validate_data(self._due_date_str)
+        return self._due_date
         
     @property
     def priority(self) -> str:
@@ -176,6 +292,7 @@ class Task:
         if not isinstance(value, Priority):
             raise ValueError(f"Неверное значение для приоритета задачи. Допустимые значения: {Priority.values_as_string()}.")
         self._priority = value
+        self._version += 1
     
     @property
     def status(self) -> str:
@@ -208,18 +325,42 @@ class Task:
         if not isinstance(value, Status):
             raise ValueError(f"Неверное значение для статуса задачи. Допустимые значения: {Status.values_as_string()}.")
         self._status = value
+        self._version += 1
 
     @classmethod
-    def from_dict(cls, data: Dict) -> 'Task':
+    def from_dict(cls, data: Dict, lazy: bool = False) -> 'Task':
         """
             Создает задачу из словаря данных.
 
             Args:
                 data (Dict): Данные задачи.
+                lazy (bool): Создать задачу без strptime (для записей из собственного файла данных).
+                    Дата не откладывается целиком: формат и диапазон проверяются сразу через date.fromisoformat,
+                    чтобы недопустимая запись не попала в индексы, а datetime создается при первом обращении
+                    к due_datetime.
 
             Returns:
                 Task: Созданная задача.
-        """
+
+            Raises:
+                ValueError: Если поле задачи недопустимо (в том числе несуществующая дата).
+        """
+        if lazy:
+            task = cls.__new__(cls) # Конструктор не вызываем, чтобы не выполнять strptime
+            task._id = int(data["id"])
+            task._fragment, task._version = None, 0
+            task.title = data["title"]
+            task.description = data["description"]
+            task.category = data["category"]
+            task._due_date = None
+            if cls._is_iso_date(data["due_date"]):
+                cls._check_iso_date(data["due_date"]) # Проверка без strptime; datetime создается при первом обращении
+                task._due_date_str = data["due_date"]
+            else: # Нестрогий формат приводится к YYYY-MM-DD (или отвергается) сеттером
+                task.due_date = data["due_date"]
+            task.priority = data["priority"]
+            task.status = data["status"]
+            return task
         task = cls(
             title=data["title"], 
             description = data["description"],
@@ -228,9 +369,41 @@ class Task:
             priority = data["priority"], 
             status = data["status"]
         )
-        task._id = data["id"] # Устанавливаем ID задачи
+        task._id = int(data["id"]) # Устанавливаем ID задачи (в CSV он хранится строкой)
         return task
         
+    def to_row(self) -> tuple:
+        """
+            Преобразует задачу в кортеж значений полей (для кэша загрузки, см. DataHandler).
+
+            Returns:
+                tuple: ID, название, описание, категория, срок, приоритет и статус в виде строк.
+        """
+        return (
+            self._id, self._title, self._description, self._category, self._due_date_str,
+            self._priority.value, self._status.value
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple) -> 'Task':
+        """
+            Создает задачу из кортежа to_row() без валидации полей: кортежи записываются
+            только из уже загруженных задач. Дата разбирается при первом обращении к due_datetime.
+
+            Args:
+                row (tuple): Значения полей задачи.
+
+            Returns:
+                Task: Созданная задача.
+        """
+        task = cls.__new__(cls)
+        task._id, task._title, task._description, task._category, task._due_date_str, priority, status = row
+        task._priority = Priority._value2member_map_[priority] # Прямой поиск члена перечисления без Priority(...)
+        task._status = Status._value2member_map_[status]
+        task._due_date = None
+        task._fragment, task._version = None, 0
+        return task
+
     def to_dict(self) -> dict:
         """
             Преобразует задачу в словарь.
@@ -247,6 +420,26 @@ class Task:
             "priority": self.priority.value,
             "status": self.status.value
         }
+
+    def fragment(self, key: str, encode: Callable[[Dict], bytes]) -> bytes:
+        """
+            Возвращает запись задачи, закодированную для формата файла. Закодированная запись
+            кэшируется вместе с номером изменения задачи, поэтому неизмененная задача не кодируется повторно.
+            Запись, во время кодирования которой задачу изменил другой поток, получает старый номер
+            и не используется следующим сохранением.
+
+            Args:
+                key (str): Имя формата (кэшируется запись только для последнего использованного формата).
+                encode (Callable[[Dict], bytes]): Функция кодирования словаря задачи.
+
+            Returns:
+                bytes: Закодированная запись.
+        """
+        cached = self._fragment
+        if cached is None or cached[0] != key or cached[2] != self._version:
+            version = self._version # Номер читается до полей задачи
+            cached = self._fragment = (key, encode(self.to_dict()), version)
+        return cached[1]
         
     def __str__(self) -> str:
         """
@@ -265,4 +458,45 @@ class Task:
             f"Статус: {getattr(self.status, 'value', 'Не указан')}"
         )
             
-        
\ No newline at end of file
+        
+
+class TaskRecord:
+    """
+        Снимок задачи для сохранения в другом потоке (см. DataHandler.snapshot): словарь задачи
+        берется при создании снимка, поэтому изменения задачи, сделанные во время записи файла,
+        в нее не попадают. Поддерживает то, что DataHandler читает у задачи при сохранении:
+        id, to_dict() и fragment().
+    """
+    __slots__ = ("id", "_record")
+
+    def __init__(self, task: Task):
+        """
+            Создает снимок задачи.
+
+            Args:
+                task (Task): Задача.
+        """
+        self.id = task.id
+        self._record = task.to_dict()
+
+    def to_dict(self) -> dict:
+        """
+            Словарь задачи на момент снимка.
+
+            Returns:
+                dict: Словарь в формате Task.to_dict.
+        """
+        return dict(self._record)
+
+    def fragment(self, key: str, encode: Callable[[Dict], bytes]) -> bytes:
+        """
+            Запись задачи, закодированная для формата файла (см. Task.fragment). Снимок не кэширует запись.
+
+            Args:
+                key (str): Имя формата.
+                encode (Callable[[Dict], bytes]): Функция кодирования словаря задачи.
+
+            Returns:
+                bytes: Закодированная запись.
+        """
+        return encode(self._record)
@@ -1,62 +1,539 @@
-from typing import List, Optional
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from functools import wraps
+from itertools import chain, islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-from task import Task, Priority, Status
+from task import Task, Priority, Status, PRIORITY_RANK
 from data_handler import DataHandler
+from indexes import TaskIndex, FullTextIndex
+from instrumentation import instrumented
+from locks import RWLock
+from query_cache import QueryCache
+from scheduler import TaskScheduler
 
-class TaskManager:
+SORT_KEYS: Dict[str, Callable[[Task], tuple]] = { # Ключи сортировки результатов поиска (последний - ID, как в SQLite и TaskScheduler)
+    "due_date": lambda task: (task.due_date, task.id),
+    "priority": lambda task: (PRIORITY_RANK[task.priority], task.due_date, task.id), # Внутри приоритета - по сроку
+}
+
+def requires_load(method: Callable) -> Callable:
     """
-        Класс для управления задачами. Реализует паттерн Singleton.
-        Отвечает за добавление, удаление, обновление и поиск задач.
+        Декоратор для методов, которым нужны загруженные задачи.
+        Если задачи загружаются в фоне, метод дождется окончания загрузки,
+        а при отложенной загрузке - загрузит задачи при первом вызове.
+
+        Args:
+            method (Callable): Метод, который будет обернут декоратором.
+
+        Returns:
+            Callable: Обработанный метод.
     """
-    _instance = None  # Экземпляр для реализации паттерна Singleton
-    
-    def __new__(cls, *args, **kwargs):
-        """
-            Создает единственный экземпляр TaskManager. Если экземпляр уже существует,
-            возвращает его.
+    @wraps(method) # Сохраняем оригинальное имя метода и его документацию
+    def wrapper(self, *args, **kwargs):
+        if not self._loaded.is_set(): # Загрузка еще идет (или еще не начата) - ждем ее окончания
+            self.wait_until_loaded()
+        return method(self, *args, **kwargs)
+    return wrapper
 
-            Args:
-                cls: Класс, для которого вызывается метод.
+def read_locked(method: Callable) -> Callable:
+    """
+        Декоратор для методов, читающих задачи.
+        В потокобезопасном режиме метод выполняется под блокировкой на чтение, параллельно с другими чтениями.
+        Для файла, общего для нескольких процессов, перед чтением принимаются изменения других процессов.
 
-            Returns:
-                TaskManager: Экземпляр класса.
-        """
-        if not cls._instance: # Если экземпляр еще не создан
-            cls._instance = super().__new__(cls) # Создаем новый экземпляр
-        return cls._instance # Возвращаем единственный экземпляр
-    
-    def __init__(self, data_file: str = "data.json"):
+        Args:
+            method (Callable): Метод, который будет обернут декоратором.
+
+        Returns:
+            Callable: Обработанный метод.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._shared and self.data_handler.changed_on_disk(): # Файл изменил другой процесс
+            self.refresh()
+        if self._lock is None:
+            return method(self, *args, **kwargs)
+        self._lock.acquire_read()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._lock.release_read()
+    return wrapper
+
+def write_locked(method: Callable) -> Callable:
+    """
+        Декоратор для методов, изменяющих задачи.
+        Метод выполняется внутри транзакции записи (см. TaskManager._write_transaction).
+
+        Args:
+            method (Callable): Метод, который будет обернут декоратором.
+
+        Returns:
+            Callable: Обработанный метод.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._lock is None and not self._shared:
+            return method(self, *args, **kwargs)
+        with self._write_transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+@instrumented
+class TaskManager:
+    """
+        Класс для управления задачами.
+        Отвечает за добавление, удаление, обновление и поиск задач.
+        Каждый экземпляр работает со своим файлом данных, счетчиком ID и индексами,
+        поэтому в одном процессе можно держать открытыми несколько хранилищ.
+    """
+    def __init__(
+        self,
+        data_file: str = "data.json",
+        data_handler: Optional[DataHandler] = None,
+        full_text_index: bool = False,
+        background_load: bool = False,
+        lazy_load: bool = False,
+        thread_safe: bool = False,
+        auto_persist: bool = True,
+        query_cache_size: Optional[int] = None,
+        scheduler: bool = False
+    ):
         """
             Инициализация менеджера задач. 
             Загружает задачи из файла и инициализирует обработчик данных.
             
             Args:
                 data_file (str): Путь к файлу с данными.
+                data_handler (Optional[DataHandler]): Готовый обработчик данных (например, в журналируемом режиме).
+                    Если передан, data_file не используется.
+                full_text_index (bool): Строить инвертированный индекс по названию и описанию
+                    для поиска по ключевому слову и префиксу.
+                background_load (bool): Загружать задачи в фоновом потоке. Конструктор возвращается сразу,
+                    а методы, которым нужны задачи, ждут окончания загрузки.
+                lazy_load (bool): Отложить загрузку задач до первого метода, которому они нужны.
+                    Конструктор не читает файл, а программа, завершенная без обращения к задачам, не читает его вовсе.
+                thread_safe (bool): Потокобезопасный режим для вызова из нескольких потоков: поиски выполняются
+                    параллельно под блокировкой на чтение, изменения - монопольно под блокировкой на запись.
+                auto_persist (bool): Сохранять каждое изменение сразу. Если False, изменения накапливаются
+                    и сохраняются вызовом persist_pending() (или забираются через take_pending()).
+                    Для SQLite изменения всегда сохраняются сразу, так как запросы читают базу данных.
+                query_cache_size (Optional[int]): Включает LRU-кэш результатов search_tasks и get_tasks_by_category
+                    на указанное количество запросов. Изменения задач сбрасывают только затронутые запросы.
+                    Для SQLite кэш не используется: результаты запросов - копии строк базы данных.
+                scheduler (bool): Держать невыполненные задачи в очереди с приоритетами (см. TaskScheduler),
+                    чтобы peek_next, pop_next и iter_expired работали за O(log N) без сортировки задач.
+
+            Raises:
+                ValueError: Если auto_persist выключен для файла, общего для нескольких процессов.
+        """
+        self.data_handler = data_handler or DataHandler(data_file) # Инициализируем обработчик данных
+        if not auto_persist and self.data_handler.shared:
+            raise ValueError("Накопление изменений не поддерживается для файла, общего для нескольких процессов.")
+        self._index = TaskIndex() # Вторичные индексы по категории, статусу, приоритету и сроку
+        self._text_index = FullTextIndex() if full_text_index else None # Полнотекстовый индекс (по запросу)
+        self._pushdown = self.data_handler.supports_queries # Запросы выполняет само хранилище (SQLite)
+        self._scheduler = TaskScheduler() if scheduler and not self._pushdown else None # Очередь задач (по запросу)
+        self._indexes = [index for index in (self._index, self._text_index, self._scheduler) if index is not None]
+        self._reported_overdue: Dict[int, str] = {} # Просроченные задачи, о которых уже сообщено (без очереди)
+        self._unarchived: Set[int] = set() # Задачи, вернувшиеся из архива, копия которых еще лежит в архиве
+        self._query_cache = QueryCache(query_cache_size) if query_cache_size and not self._pushdown else None
+        self._loaded = threading.Event() # Признак окончания загрузки задач
+        self._lazy_load = lazy_load and not background_load and not self._pushdown
+        self._load_lock = threading.Lock() # Не допускает двух отложенных загрузок из разных потоков
+        self._batch_depth = 0 # Глубина вложенности batch(): пока больше нуля, сохранение откладывается
+        self._pending_changed: Dict[int, Task] = {} # Отложенные изменения, накопленные внутри batch()
+        self._pending_deleted: Set[int] = set()
+        self._load_error: Optional[Exception] = None
+        self._last_id = 0 # Последний выданный ID задачи
+        self._lock = RWLock() if thread_safe else None # Блокировка читателей-писателей (в потокобезопасном режиме)
+        self._shared = self.data_handler.shared and not self._pushdown # Файл изменяют и другие процессы
+        self.auto_persist = auto_persist or self._pushdown
+        if background_load and not self._pushdown:
+            threading.Thread(target=self._try_load, daemon=True).start()
+        elif not self._lazy_load:
+            self._load()
+
+    def _load(self) -> None:
+        """
+            Потоково загружает задачи из файла и строит индексы.
         """
-        if not hasattr(self, "initialized"): # Проверка на уже выполненную инициализацию
-            self.data_handler = DataHandler(data_file) # Инициализируем обработчик данных
-            self.tasks = self.data_handler.load() # Загружаем задачи из файла
-            self.initialized = True # Помечаем инициализацию как выполненную
+        try:
+            with self.data_handler.file_lock(): # Другой процесс не перезапишет файл во время чтения
+                self.tasks = [] if self._pushdown else list(self.data_handler.stream()) # Загружаем задачи из файла
+                if self.data_handler.archive is not None:
+                    self.data_handler.archive.delete(self._by_id) # Копии задач, вернувшихся из архива и уже сохраненных
+                    self._move_to_archive() # Выполненные задачи, ставшие старыми, уходят из рабочего набора
             self._update_id_counter() # Обновляем счетчик ID для задач
+        finally:
+            self._loaded.set()
+
+    def _try_load(self) -> None:
+        """
+            Загружает задачи (в фоновом потоке или отложенно), сохраняя ошибку загрузки для вызывающей стороны.
+        """
+        try:
+            self._load()
+        except Exception as error:
+            self._load_error = error
+
+    def wait_until_loaded(self) -> None:
+        """
+            Ожидает окончания фоновой загрузки задач. При отложенной загрузке загружает задачи.
+
+            Raises:
+                Exception: Ошибка, возникшая при загрузке задач.
+        """
+        if self._lazy_load and not self._loaded.is_set():
+            with self._load_lock:
+                if not self._loaded.is_set():
+                    self._try_load()
+        self._loaded.wait()
+        if self._load_error is not None:
+            raise self._load_error
+
+    @property
+    @requires_load
+    @read_locked
+    def tasks(self) -> List[Task]:
+        """
+            Список задач в порядке добавления.
+            Удаление помечает задачу удаленной только в индексе, список уплотняется при обращении к нему.
+            Для хранилища с запросами (SQLite) задачи каждый раз читаются из базы.
+            В потокобезопасном режиме возвращается копия списка, которую не затронут последующие изменения.
+
+            Returns:
+                List[Task]: Список задач.
+        """
+        if self._pushdown:
+            return self.data_handler.load()
+        if self._tombstones: # В списке остались удаленные задачи - уплотняем его
+            self._compact()
+        return self._tasks if self._lock is None else list(self._tasks)
+
+    @tasks.setter
+    def tasks(self, tasks: List[Task]) -> None:
+        """
+            Заменяет список задач и перестраивает индексы.
+
+            Args:
+                tasks (List[Task]): Новый список задач.
+        """
+        self._tasks = tasks
+        self._by_id: Dict[int, Task] = {}
+        for task in tasks:
+            self._by_id.setdefault(task.id, task) # При повторе ID находится первая задача, как и при линейном поиске
+        self._tombstones = len(tasks) - len(self._by_id) # Дубликаты ID не попадают в индекс и уйдут при уплотнении
+        for index in self._indexes:
+            index.rebuild(self._by_id.values())
+        self._reported_overdue = {
+            task_id: due_date for task_id, due_date in self._reported_overdue.items()
+            if task_id in self._by_id and self._by_id[task_id].status != Status.DONE
+        }
+        self._unarchived.intersection_update(self._by_id)
+        if self._query_cache is not None:
+            self._query_cache.clear()
+
+    def _compact(self) -> None:
+        """
+            Уплотняет список задач, убирая удаленные. Порядок словаря совпадает с порядком добавления.
+        """
+        self._tasks = list(self._by_id.values())
+        self._tombstones = 0
+
+    def _remove(self, task_id: int) -> Optional[Task]:
+        """
+            Удаляет задачу из индекса за O(1), оставляя в списке "надгробие" до уплотнения.
+
+            Args:
+                task_id (int): ID задачи для удаления.
+
+            Returns:
+                Optional[Task]: Удаленная задача или None, если задача не найдена.
+        """
+        task = self._by_id.pop(task_id, None)
+        if task is not None:
+            for index in self._indexes:
+                index.remove(task_id)
+            self._reported_overdue.pop(task_id, None)
+            self._unarchived.discard(task_id)
+            self._tombstones += 1
+            if self._tombstones > len(self._by_id): # Удаленных больше, чем живых - освобождаем память
+                self._compact()
+        return task
             
+    def _forget_reported(self, task: Task) -> None:
+        """
+            Забывает о сообщенной просрочке выполненной задачи (без очереди задач), чтобы набор не рос.
+        """
+        if task.status == Status.DONE:
+            self._reported_overdue.pop(task.id, None)
+
+    def _delete_unarchived(self, task_ids: Iterable[int]) -> None:
+        """
+            Удаляет из архива копии удаляемых задач рабочего набора, вернувшихся из архива,
+            чтобы задача не появилась из архива снова. Остальные удаления архив не затрагивают.
+
+            Args:
+                task_ids (Iterable[int]): ID удаляемых задач рабочего набора.
+        """
+        unarchived = [task_id for task_id in task_ids if task_id in self._unarchived]
+        if unarchived:
+            self.data_handler.archive.delete(unarchived)
+
     def _update_id_counter(self) -> None:
         """
             Обновляет счетчик ID на основе существующих задач
         """
-        if self.tasks: # Если задачи существуют
-            max_id = max(task._id for task in self.tasks) # Находим максимальный ID среди задач
-            Task._id_counter = max_id # Обновляем счетчик ID
+        if self._pushdown:
+            self._last_id = self.data_handler.max_id() # Максимальный ID хранит база данных
+        elif self._by_id: # Если задачи существуют
+            self._last_id = max(self._by_id) # Находим максимальный ID среди задач
+        if self.data_handler.archive is not None: # ID задач архива не выдаются повторно
+            self._last_id = max(self._last_id, self.data_handler.archive.max_id())
+
+    def _assign_id(self, task: Task) -> None:
+        """
+            Выдает ID новой задаче. Если ID уже задан, сдвигает счетчик, чтобы следующие ID не совпали с ним.
+
+            Args:
+                task (Task): Добавляемая задача.
+        """
+        if task.id is None:
+            self._last_id += 1
+            task.id = self._last_id
+        elif task.id > self._last_id:
+            self._last_id = task.id
             
+    def _persist(self, changed: Iterable[Task] = (), deleted: Iterable[int] = ()) -> None:
+        """
+            Сохраняет изменения через обработчик данных или откладывает их до выхода из batch()
+            (без auto_persist - до вызова persist_pending()).
+
+            Args:
+                changed (Iterable[Task]): Добавленные или измененные задачи.
+                deleted (Iterable[int]): ID удаленных задач.
+        """
+        if self._batch_depth or not self.auto_persist:
+            for task in changed:
+                self._pending_changed[task.id] = task
+                self._pending_deleted.discard(task.id)
+            for task_id in deleted:
+                self._pending_changed.pop(task_id, None)
+                self._pending_deleted.add(task_id)
+            return
+        tasks = () if self._pushdown else self._by_id.values() # Базе данных полный список не нужен
+        self.data_handler.persist(tasks, changed, deleted)
+
+    @contextmanager
+    def batch(self) -> Iterator['TaskManager']:
+        """
+            Контекстный менеджер для группы изменений: внутри блока изменения применяются в памяти,
+            а сохраняются один раз при выходе из внешнего блока (в том числе при исключении).
+
+            Yields:
+                TaskManager: Текущий менеджер задач.
+        """
+        with self._write_transaction(): # Блок изменений выполняется монопольно, чтобы не смешать чужие изменения
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and (self._pending_changed or self._pending_deleted):
+                    changed, deleted = list(self._pending_changed.values()), list(self._pending_deleted)
+                    self._pending_changed, self._pending_deleted = {}, set()
+                    self._persist(changed, deleted)
+
+    @property
+    def has_pending(self) -> bool:
+        """
+            Признак накопленных, но еще не сохраненных изменений.
+
+            Returns:
+                bool: True, если есть несохраненные изменения.
+        """
+        return bool(self._pending_changed or self._pending_deleted)
+
+    @write_locked
+    def take_pending(self) -> Tuple[List[Task], List[Task], List[int]]:
+        """
+            Забирает накопленные изменения для сохранения вне менеджера (например, в другом потоке).
+            Копируются только списки: задачи продолжают изменяться, поэтому для записи в другом потоке
+            их нужно заменить снимком (см. DataHandler.snapshot). Если сохранение не удалось,
+            изменения возвращаются через restore_pending().
+
+            Returns:
+                Tuple[List[Task], List[Task], List[int]]: Все задачи, добавленные или измененные задачи
+                    и ID удаленных задач - аргументы DataHandler.persist.
+        """
+        changed, deleted = list(self._pending_changed.values()), list(self._pending_deleted)
+        self._pending_changed, self._pending_deleted = {}, set()
+        tasks = [] if self._pushdown else list(self._by_id.values())
+        return tasks, changed, deleted
+
+    @write_locked
+    def restore_pending(self, changed: Iterable[Task], deleted: Iterable[int]) -> None:
+        """
+            Возвращает в накопленные изменения те, что забрал take_pending(), но не удалось сохранить.
+            Изменения, накопленные после take_pending(), новее и не перезаписываются.
+
+            Args:
+                changed (Iterable[Task]): Добавленные или измененные задачи.
+                deleted (Iterable[int]): ID удаленных задач.
+        """
+        for task in changed:
+            if task.id not in self._pending_changed and task.id not in self._pending_deleted:
+                self._pending_changed[task.id] = task
+        for task_id in deleted:
+            if task_id not in self._pending_changed:
+                self._pending_deleted.add(task_id)
+
+    def persist_pending(self) -> bool:
+        """
+            Сохраняет накопленные изменения одним вызовом обработчика данных.
+            Если сохранение не удалось, изменения остаются накопленными.
+
+            Returns:
+                bool: True, если было что сохранять.
+        """
+        if not self.has_pending:
+            return False
+        tasks, changed, deleted = self.take_pending()
+        try:
+            self.data_handler.persist(tasks, changed, deleted)
+        except Exception:
+            self.restore_pending(changed, deleted)
+            raise
+        return True
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[int]:
+        """
+            Монопольный доступ для изменения задач: блокировка на запись в потокобезопасном режиме
+            и блокировка файла между процессами для общего файла. Перед изменением принимаются
+            изменения других процессов, поэтому сохранение не затирает их задачи.
+
+            Yields:
+                int: Количество изменений, принятых из файла.
+        """
+        if self._lock is not None:
+            self._lock.acquire_write()
+        try:
+            with self.data_handler.file_lock():
+                yield self._merge_external() if self._shared else 0
+        finally:
+            if self._lock is not None:
+                self._lock.release_write()
+
+    def _merge_external(self) -> int:
+        """
+            Применяет к задачам в памяти изменения, которые другие процессы внесли в файл.
+            Изменяются только отличающиеся задачи, остальные задачи и индексы не перестраиваются.
+
+            Returns:
+                int: Количество принятых изменений.
+        """
+        if not self.data_handler.changed_on_disk():
+            return 0
+        changed, deleted = self.data_handler.read_changes(self._by_id)
+        for task_id in deleted:
+            self._remove(task_id)
+        for task in changed:
+            current = self._by_id.get(task.id)
+            if current is None:
+                self._by_id[task.id] = task
+                self._tasks.append(task)
+                for index in self._indexes:
+                    index.add(task)
+            else: # Обновляем существующую задачу на месте, чтобы ссылки на нее оставались актуальными
+                current.title, current.description, current.category = task.title, task.description, task.category
+                current.due_date, current.priority, current.status = task.due_date, task.priority, task.status
+                for index in self._indexes:
+                    index.update(current)
+                self._forget_reported(current)
+            self._last_id = max(self._last_id, task.id) # Новые ID не совпадут с ID задач других процессов
+        if self._query_cache is not None and (changed or deleted):
+            self._query_cache.clear()
+        return len(changed) + len(deleted)
+
+    @requires_load
+    def refresh(self) -> int:
+        """
+            Принимает изменения, внесенные в общий файл данных другими процессами.
+            Вызывается автоматически перед чтением и изменением задач.
+
+            Returns:
+                int: Количество принятых изменений (0, если файл не изменялся или не является общим).
+        """
+        with self._write_transaction() as merged:
+            return merged
+
+    def flush(self) -> None:
+        """
+            Немедленно сохраняет все отложенные изменения (в режиме отложенной записи обработчика данных).
+        """
+        self.data_handler.flush()
+
+    def close(self) -> None:
+        """
+            Сохраняет отложенные изменения (в том числе накопленные без auto_persist)
+            и освобождает ресурсы обработчика данных.
+        """
+        if self._loaded.is_set():
+            try:
+                self.persist_pending()
+            finally:
+                self.data_handler.close()
+
+    @requires_load
+    @write_locked
+    def create_task(self, **fields) -> Task:
+        """
+            Создает задачу из переданных полей и добавляет ее в менеджер.
+            ID выдается после загрузки задач, поэтому не совпадет с ID уже сохраненных задач.
+
+            Args:
+                **fields: Поля задачи (title, description, category, due_date, priority, status).
+
+            Returns:
+                Task: Созданная задача.
+        """
+        task = Task(**fields)
+        self.add_task(task)
+        return task
+
+    @requires_load
+    @write_locked
     def add_task(self, task: Task) -> None:
         """
             Добавляет задачу в список задач и сохраняет изменения в файле.
+            Задача без ID получает следующий ID этого менеджера.
             
             Args:
                 task (Task): Задача для добавления.
         """
-        self.tasks.append(task) # Добавляем задачу в список
-        self.data_handler.save(self.tasks) # Сохраняем изменения в файл
+        self._assign_id(task)
+        if self._pushdown:
+            self._persist(changed=[task]) # Вставляем одну строку в базу данных
+            return
+        if task.id in self._by_id: # Задача с таким ID заменяется новой
+            self._invalidate(self._remove(task.id))
+        self._by_id[task.id] = task
+        self._tasks.append(task) # Добавляем задачу в список
+        for index in self._indexes:
+            index.add(task)
+        self._invalidate(task)
+        self._persist(changed=[task]) # Сохраняем изменения в файл
         
+    @requires_load
+    @write_locked
     def delete_task_by_id(self, task_id: int) -> None:
         """
             Удаляет задачу по ее ID.
@@ -64,9 +541,19 @@ class TaskManager:
             Args:
                 task_id (int): ID задачи для удаления.
         """
-        self.tasks = [task for task in self.tasks if task.id != task_id] # Выбираем задачи без указанного ID
-        self.data_handler.save(self.tasks) # Сохраняем изменения в файл
+        if self._pushdown:
+            self._persist(deleted=[task_id])
+            return
+        self._delete_unarchived([task_id])
+        task = self._remove(task_id)
+        if task is not None:
+            self._invalidate(task)
+            self._persist(deleted=[task_id]) # Сохраняем изменения в файл
+        elif self.data_handler.archive is not None: # Задачи нет в рабочем наборе - она может быть в архиве
+            self.data_handler.archive.delete([task_id])
         
+    @requires_load
+    @write_locked
     def delete_task_by_category(self, category: str) -> None:
         """
             Удаляет задачи по категории.
@@ -74,12 +561,28 @@ class TaskManager:
             Args:
                 category (str): Категория задач для удаления.
         """
-        self.tasks = [task for task in self.tasks if task.category != category] # Фильтруем задачи по категории
-        self.data_handler.save(self.tasks) # Сохраняем изменения в файл
+        if self._pushdown and not self._batch_depth:
+            self.data_handler.delete_category_rows(category) # Один запрос DELETE в базе данных
+            return
+        if self._pushdown:
+            self._persist(deleted=[task.id for task in self.data_handler.query(category=category, exact_category=True)])
+            return
+        deleted = [task.id for task in self._index.by_category(category)] # ID удаляемых задач
+        self._delete_unarchived(deleted) # Копия в архиве может быть в другой категории, если ее изменили
+        for task_id in deleted:
+            self._remove(task_id)
+        if self._query_cache is not None and deleted:
+            self._query_cache.invalidate_category(category) # Сбрасываем только запросы, затронутые категорией
+        self._persist(deleted=deleted) # Сохраняем изменения в файл
+        archive = self.data_handler.archive
+        if archive is not None: # Задачи архива отбираются по его индексу категорий без чтения архива
+            archive.delete(archive.ids_in_category(category))
     
+    @requires_load
+    @read_locked
     def get_task(self, task_id: int) -> Optional[Task]:
         """
-            Получает задачу по ID.
+            Получает задачу по ID. Задача, которой нет в рабочем наборе, ищется в архиве (если он включен).
             
             Args:
                 task_id (int): ID задачи для поиска.
@@ -87,8 +590,15 @@ class TaskManager:
             Returns:
                 Optional[Task]: Задача с указанным ID или None, если задача не найдена.
         """
-        return next((task for task in self.tasks if task.id == task_id), None)
+        if self._pushdown:
+            return self.data_handler.get_row(task_id)
+        task = self._by_id.get(task_id)
+        if task is None and self.data_handler.archive is not None:
+            return self.data_handler.archive.get(task_id) # Точечное чтение по индексу архива
+        return task
     
+    @requires_load
+    @read_locked
     def get_tasks_by_category(self, category: str) -> List[Task]:
         """
             Получает список задач по категории.
@@ -99,11 +609,19 @@ class TaskManager:
             Returns:
                 List[Task]: Список задач, принадлежащих указанной категории.
         """
-        return [task for task in self.tasks if task.category == category]
+        if self._pushdown:
+            return self.data_handler.query(category=category, exact_category=True)
+        if self._query_cache is None:
+            return self._index.by_category(category)
+        return self._cached(QueryCache.category_key(category), lambda: self._index.by_category(category))
     
+    @requires_load
+    @write_locked
     def update_task(self, task_id: int, **kwargs) -> bool:
         """
-            Обновляет данные задачи по ее ID.
+            Обновляет данные задачи по ее ID. Задача из архива возвращается в рабочий набор, а ее копия
+            удаляется из архива при следующей загрузке, после записи задачи в файл данных. До этого
+            используется копия из рабочего набора, поэтому сбой сохранения не теряет задачу.
             
             Args:
                 task_id (int): ID задачи для обновления.
@@ -111,37 +629,585 @@ class TaskManager:
 
             Returns:
                 bool: True, если задача успешно обновлена, иначе False.
+
+            Raises:
+                ValueError: Если срок выполнения не в формате YYYY-MM-DD (задача при этом не изменяется).
         """
+        changes = {} # Новые значения полей проверяются до изменения задачи: при ошибке задача остается прежней
+        for key, value in kwargs.items(): # Отбираем данные задачи в зависимости от переданных ключей
+            if key in ["title", "description", "category"]:
+                changes[key] = value
+            elif key == "due_date":
+                Task.validate_data(value)
+                changes[key] = value
+            elif key == "priority" and (isinstance(value, Priority) or value in Priority.list_values()):
+                changes[key] = Priority(value)
+            elif key == "status" and (isinstance(value, Status) or value in Status.list_values()):
+                changes[key] = Status(value)
         task = self.get_task(task_id)  # Получаем задачу по ID
         if not task: # Если задача не найдена, возвращаем False
             return False
-        for key, value in kwargs.items(): # Обновляем данные задачи в зависимости от переданных ключей
-            if key in ["title", "description", "category", "due_date"]: 
-                setattr(task, key, value)
-            elif key == "priority" and value in Priority.list_values():
-                task.priority = Priority(value)
-            elif key == "status" and value in Status.list_values():
-                task.status = Status(value)
-        self.data_handler.save(self.tasks) # Сохраняем изменения в файл
+        if not self._pushdown and task.id not in self._by_id: # Задача прочитана из архива
+            # Копия в архиве удаляется при следующей загрузке, когда задача уже записана в файл данных:
+            # сохранение может быть отложено или не удаться, и тогда задача осталась бы только в памяти
+            self._unarchived.add(task.id)
+            self._by_id[task.id] = task
+            self._tasks.append(task)
+            for index in self._indexes:
+                index.add(task)
+            self._invalidate(task)
+        before = QueryCache.fields(task) if self._query_cache is not None else None
+        for key, value in changes.items(): # Проверенные значения сеттеры уже не отвергнут
+            setattr(task, key, value)
+        if not self._pushdown:
+            for index in self._indexes: # Переиндексируем задачу по новым значениям полей
+                index.update(task)
+            self._forget_reported(task)
+        if before is not None:
+            self._query_cache.invalidate_update(before, QueryCache.fields(task))
+        self._persist(changed=[task]) # Сохраняем изменения в файл
         return True
     
-    def search_tasks(self, keyword: str = "", category: str = "", status: Optional[Status] = None) -> List[Task]:
+    @requires_load
+    def search_tasks(
+        self,
+        keyword: str = "",
+        category: str = "",
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None
+    ) -> List[Task]:
         """
-            Ищет задачи по ключевому слову, категории и статусу.
+            Ищет задачи по ключевому слову, категории, статусу и приоритету.
+            Фильтры по категории, статусу и приоритету обслуживаются индексами,
+            при наличии полнотекстового индекса он отбирает кандидатов по ключевому слову.
+            Ключевое слово проверяется только у отобранных задач.
 
             Args:
                 keyword (str): Ключевое слово для поиска в названии и описании задачи.
                 category (str): Категория для фильтрации задач.
                 status (Optional[Status]): Статус для фильтрации задач.
+                priority (Optional[Priority]): Приоритет для фильтрации задач.
 
             Returns:
                 List[Task]: Список задач, соответствующих фильтрам.
         """
-        return [
-            task for task in self.tasks
-            if (
-                (keyword.upper() in task.description.upper() or keyword.upper() in task.title.upper())  # Проверка по ключевому слову
-                and (category.upper() == task.category.upper() if category else True)  # Проверка по категории
-                and (status == task.status if status else True)  # Проверка по статусу
-            )
-        ]
\ No newline at end of file
+        if self._pushdown:
+            return self.data_handler.query(keyword, category, status, priority) # Поиск выполняет SQL-запрос
+        if self._query_cache is None or self._searches_archive(status): # Результаты из архива не кэшируются
+            return self._search(keyword, category, status, priority)
+        if self._shared and self.data_handler.changed_on_disk(): # Кэш не должен скрыть изменения других процессов
+            self.refresh()
+        return self._cached(
+            QueryCache.search_key(keyword, category, status, priority),
+            lambda: self._search(keyword, category, status, priority)
+        )
+
+    def _search(
+        self,
+        keyword: str,
+        category: str,
+        status: Optional[Status],
+        priority: Optional[Priority]
+    ) -> List[Task]:
+        """
+            Выполняет поиск задач в памяти (см. search_tasks).
+        """
+        candidates = self._search_candidates(keyword, category, status, priority)
+        if keyword:
+            keyword = keyword.upper() # Кандидаты - снимок, поэтому проверка слова не удерживает блокировку
+            candidates = [
+                task for task in candidates
+                if keyword in task.description.upper() or keyword in task.title.upper()  # Проверка по ключевому слову
+            ]
+        if self._searches_archive(status):
+            candidates.extend(self._search_archive(keyword, category, priority))
+        return candidates
+
+    def _searches_archive(self, status: Optional[Status]) -> bool:
+        """
+            Признак поиска, который читает и архив: архив включен, и запрошены именно выполненные задачи.
+        """
+        return status == Status.DONE and self.data_handler.archive is not None
+
+    def _search_archive(self, keyword: str, category: str, priority: Optional[Priority]) -> Iterator[Task]:
+        """
+            Потоково отбирает задачи архива (все они выполнены) по фильтрам поиска.
+            Задачи, вернувшиеся из архива в рабочий набор, пропускаются: они уже найдены в памяти.
+
+            Args:
+                keyword (str): Ключевое слово.
+                category (str): Категория (без учета регистра).
+                priority (Optional[Priority]): Приоритет.
+
+            Returns:
+                Iterator[Task]: Задачи архива в порядке архивирования.
+        """
+        keyword, category = keyword.upper(), TaskIndex.fold(category)
+        return (
+            task for task in self.data_handler.archive.iter_tasks()
+            if task.id not in self._by_id
+            and (not category or TaskIndex.fold(task.category) == category)
+            and (priority is None or task.priority == priority)
+            and (not keyword or keyword in task.description.upper() or keyword in task.title.upper())
+        )
+
+    @requires_load
+    def iter_search(
+        self,
+        keyword: str = "",
+        category: str = "",
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        sort_by: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Iterator[Task]:
+        """
+            Ленивый вариант search_tasks для постраничного вывода больших списков.
+            Без сортировки задачи проверяются по ключевому слову по мере чтения итератора,
+            а задачи архива (при поиске выполненных задач) распаковываются по мере чтения.
+            С сортировкой и limit отбираются только первые offset + limit задач (частичная сортировка кучей).
+            Для SQLite сортировка, limit и offset выполняются запросом.
+
+            Args:
+                keyword (str): Ключевое слово для поиска в названии и описании задачи.
+                category (str): Категория для фильтрации задач.
+                status (Optional[Status]): Статус для фильтрации задач.
+                priority (Optional[Priority]): Приоритет для фильтрации задач.
+                sort_by (Optional[str]): Ключ сортировки из SORT_KEYS ("due_date", "priority").
+                    По умолчанию задачи выдаются в порядке добавления.
+                offset (int): Количество пропускаемых задач.
+                limit (Optional[int]): Максимальное количество задач (по умолчанию - без ограничения).
+
+            Returns:
+                Iterator[Task]: Итератор по найденным задачам.
+
+            Raises:
+                ValueError: Если ключ сортировки неизвестен.
+        """
+        if sort_by is not None and sort_by not in SORT_KEYS:
+            raise ValueError(f"Неизвестный ключ сортировки: {sort_by}. Допустимые значения: {', '.join(SORT_KEYS)}")
+        if self._pushdown:
+            return iter(self.data_handler.query(keyword, category, status, priority, sort_by=sort_by, offset=offset, limit=limit))
+        tasks = iter(self._search_candidates(keyword, category, status, priority)) # Снимок ссылок на задачи
+        if keyword:
+            keyword = keyword.upper()
+            tasks = (task for task in tasks if keyword in task.description.upper() or keyword in task.title.upper())
+        if self._searches_archive(status):
+            tasks = chain(tasks, self._search_archive(keyword, category, priority))
+        if sort_by is not None:
+            key = SORT_KEYS[sort_by]
+            tasks = iter(sorted(tasks, key=key) if limit is None else heapq.nsmallest(offset + limit, tasks, key=key))
+        return islice(tasks, offset, None if limit is None else offset + limit)
+
+    def _cached(self, key: tuple, compute: Callable[[], List[Task]]) -> List[Task]:
+        """
+            Возвращает результат запроса из кэша или вычисляет и кэширует его.
+
+            Args:
+                key (tuple): Ключ запроса (см. QueryCache.search_key).
+                compute (Callable[[], List[Task]]): Функция, выполняющая запрос.
+
+            Returns:
+                List[Task]: Результат запроса.
+        """
+        result = self._query_cache.get(key)
+        if result is not None:
+            return result
+        generation = self._query_cache.generation # Изменения во время вычисления не дадут закэшировать результат
+        result = compute()
+        self._query_cache.put(key, result, generation)
+        return result
+
+    def _invalidate(self, task: Task) -> None:
+        """
+            Сбрасывает закэшированные запросы, в результат которых входит добавленная или удаленная задача.
+        """
+        if self._query_cache is not None:
+            self._query_cache.invalidate_task(QueryCache.fields(task))
+
+    def query_cache_stats(self) -> Dict[str, int]:
+        """
+            Счетчики кэша запросов.
+
+            Returns:
+                Dict[str, int]: Попадания, промахи, сброшенные записи и размер кэша (пустой словарь, если кэш выключен).
+        """
+        return self._query_cache.stats() if self._query_cache is not None else {}
+
+    @read_locked
+    def _search_candidates(
+        self,
+        keyword: str,
+        category: str,
+        status: Optional[Status],
+        priority: Optional[Priority]
+    ) -> List[Task]:
+        """
+            Отбирает кандидатов для поиска по индексам. Возвращает новый список,
+            поэтому дальнейшая проверка ключевого слова не мешает параллельным изменениям.
+
+            Args:
+                keyword (str): Ключевое слово (для отбора по полнотекстовому индексу).
+                category (str): Категория для фильтрации задач.
+                status (Optional[Status]): Статус для фильтрации задач.
+                priority (Optional[Priority]): Приоритет для фильтрации задач.
+
+            Returns:
+                List[Task]: Задачи-кандидаты в порядке добавления.
+        """
+        candidates = self._index.candidates(category, status, priority) # Пересечение корзин индексов
+        matched = self._text_index.substring(keyword) if keyword and self._text_index else None # Кандидаты по триграммам
+        if matched is not None:
+            if candidates is None:
+                return self._index.ordered(self._by_id[task_id] for task_id in matched)
+            return [task for task in candidates if task.id in matched]
+        return candidates if candidates is not None else list(self._by_id.values()) # Фильтры не заданы - все задачи
+
+    @requires_load
+    @read_locked
+    def get_tasks_due_between(self, start: str, end: str, include_archived: bool = False) -> List[Task]:
+        """
+            Получает задачи со сроком выполнения в диапазоне дат включительно.
+
+            Args:
+                start (str): Начало диапазона в формате YYYY-MM-DD.
+                end (str): Конец диапазона в формате YYYY-MM-DD.
+                include_archived (bool): Добавить задачи архива (по его индексу сроков).
+
+            Returns:
+                List[Task]: Задачи, упорядоченные по сроку выполнения.
+        """
+        if self._pushdown:
+            return self.data_handler.query_due(start, end)
+        tasks = self._index.due_between(start, end)
+        if include_archived and self.data_handler.archive is not None:
+            archived = [task for task in self.data_handler.archive.due_between(start, end) if task.id not in self._by_id]
+            tasks = list(heapq.merge(tasks, archived, key=lambda task: (task.due_date, task.id)))
+        return tasks
+
+    @requires_load
+    @read_locked
+    def get_overdue_tasks(self, today: Optional[str] = None) -> List[Task]:
+        """
+            Получает невыполненные задачи, срок выполнения которых уже прошел.
+
+            Args:
+                today (Optional[str]): Текущая дата в формате YYYY-MM-DD (по умолчанию - сегодня).
+
+            Returns:
+                List[Task]: Просроченные задачи, упорядоченные по сроку выполнения.
+        """
+        today = today or date.today().strftime("%Y-%m-%d")
+        if self._pushdown:
+            return self.data_handler.query_due(end=today, exclude_status=Status.DONE)
+        return self._index.overdue(today)
+
+    @requires_load
+    @read_locked
+    def search_tasks_by_prefix(self, prefix: str) -> List[Task]:
+        """
+            Ищет задачи, в названии или описании которых есть слово, начинающееся с префикса.
+
+            Args:
+                prefix (str): Префикс слова.
+
+            Returns:
+                List[Task]: Найденные задачи в порядке добавления.
+        """
+        if self._text_index is not None:
+            return self._index.ordered(self._by_id[task_id] for task_id in self._text_index.prefix(prefix))
+        prefix = FullTextIndex.fold(prefix)
+        tasks = self.tasks if self._pushdown else self._by_id.values()
+        return [task for task in tasks if FullTextIndex.has_prefix(task, prefix)]
+
+    @requires_load
+    @read_locked
+    def peek_next(self, n: int = 1) -> List[Task]:
+        """
+            Возвращает самые срочные невыполненные задачи: по убыванию приоритета, затем по сроку и ID.
+            Без очереди задач (scheduler) используется частичная сортировка результатов поиска.
+
+            Args:
+                n (int): Количество задач.
+
+            Returns:
+                List[Task]: Задачи в порядке выполнения.
+        """
+        if self._scheduler is not None:
+            return self._scheduler.peek(n)
+        return list(self.iter_search(status=Status.NOT_DONE, sort_by="priority", limit=n))
+
+    @requires_load
+    @write_locked
+    def pop_next(self, status: Status = Status.IN_PROGRESS) -> Optional[Task]:
+        """
+            Забирает самую срочную невыполненную задачу: задача получает новый статус и покидает очередь.
+
+            Args:
+                status (Status): Новый статус задачи ("В работе" или "Выполнена").
+
+            Returns:
+                Optional[Task]: Задача или None, если невыполненных задач нет.
+
+            Raises:
+                ValueError: Если передан статус "Не выполнена".
+        """
+        if status == Status.NOT_DONE:
+            raise ValueError("Задача, взятая из очереди, должна получить статус, отличный от \"Не выполнена\".")
+        tasks = self.peek_next(1)
+        if not tasks:
+            return None
+        self.update_task(tasks[0].id, status=status)
+        return self.get_task(tasks[0].id)
+
+    @requires_load
+    @write_locked
+    def iter_expired(self, today: Optional[str] = None) -> Iterator[Task]:
+        """
+            Выдает невыполненные задачи, срок которых истек к указанной дате. Каждая задача выдается
+            один раз, поэтому при периодическом вызове итератор выдает только задачи, просроченные
+            с прошлого вызова (и снова - задачу, срок которой перенесли).
+
+            Args:
+                today (Optional[str]): Текущая дата в формате YYYY-MM-DD (по умолчанию - сегодня).
+
+            Returns:
+                Iterator[Task]: Задачи, ставшие просроченными, по сроку выполнения.
+        """
+        today = today or date.today().strftime("%Y-%m-%d")
+        if self._scheduler is not None:
+            return iter(self._scheduler.expire(today))
+        expired = [task for task in self.get_overdue_tasks(today) if self._reported_overdue.get(task.id) != task.due_date]
+        self._reported_overdue.update((task.id, task.due_date) for task in expired)
+        return iter(expired)
+
+    def _move_to_archive(self, today: Optional[str] = None) -> int:
+        """
+            Переносит в архив выполненные задачи со сроком раньше даты archive_cutoff.
+            Задачи сначала записываются в архив, а затем удаляются из файла данных: при сбое между
+            этими шагами задача остается в обоих местах, и используется ее копия из рабочего набора.
+
+            Args:
+                today (Optional[str]): Текущая дата в формате YYYY-MM-DD (по умолчанию - сегодня).
+
+            Returns:
+                int: Количество перенесенных задач.
+        """
+        cutoff = self.data_handler.archive_cutoff(today)
+        moved = [task for task in self._index.candidates(status=Status.DONE) if task.due_date < cutoff]
+        if not moved:
+            return 0
+        self.data_handler.archive.append(moved)
+        if len(moved) > len(self._by_id) // 2: # Большую часть задач дешевле проиндексировать заново, чем удалять по одной
+            moved_ids = {task.id for task in moved}
+            self.tasks = [task for task in self._by_id.values() if task.id not in moved_ids]
+        else:
+            for task in moved:
+                self._remove(task.id)
+                self._invalidate(task)
+        self._persist(deleted=[task.id for task in moved])
+        return len(moved)
+
+    @requires_load
+    @write_locked
+    def archive_done(self, today: Optional[str] = None) -> int:
+        """
+            Переносит в архив выполненные задачи, срок которых истек больше archive_after_days дней назад.
+            Вызывается автоматически при загрузке задач, долго работающая программа может вызывать его периодически.
+
+            Args:
+                today (Optional[str]): Текущая дата в формате YYYY-MM-DD (по умолчанию - сегодня).
+
+            Returns:
+                int: Количество перенесенных задач.
+
+            Raises:
+                ValueError: Если архив не включен в обработчике данных.
+        """
+        if self.data_handler.archive is None:
+            raise ValueError("Архив не включен: передайте archive_after_days в DataHandler.")
+        return self._move_to_archive(today)
+
+    @requires_load
+    @write_locked
+    def add_tasks(self, tasks: Iterable[Task]) -> int:
+        """
+            Добавляет несколько задач с однократным сохранением.
+
+            Args:
+                tasks (Iterable[Task]): Задачи для добавления.
+
+            Returns:
+                int: Количество добавленных задач.
+        """
+        count = 0
+        with self.batch():
+            for task in tasks:
+                self.add_task(task)
+                count += 1
+        return count
+
+    @requires_load
+    @write_locked
+    def update_many(self, selector: Union[Callable[[Task], bool], Iterable[int]], **kwargs) -> int:
+        """
+            Обновляет несколько задач с однократным сохранением.
+
+            Args:
+                selector (Union[Callable[[Task], bool], Iterable[int]]): Условие отбора задач или список их ID.
+                **kwargs: Ключи и значения, которые будут обновлены (как в update_task).
+
+            Returns:
+                int: Количество обновленных задач.
+        """
+        if callable(selector):
+            tasks = self.tasks if self._pushdown else self._by_id.values()
+            selector = [task.id for task in tasks if selector(task)] # Отбираем ID до изменения задач
+        with self.batch():
+            return sum(self.update_task(task_id, **kwargs) for task_id in selector)
+
+    @requires_load
+    @write_locked
+    def delete_many(self, task_ids: Iterable[int]) -> int:
+        """
+            Удаляет несколько задач по ID с однократным сохранением.
+
+            Args:
+                task_ids (Iterable[int]): ID задач для удаления.
+
+            Returns:
+                int: Количество удаленных задач.
+        """
+        task_ids, archived = list(task_ids), set()
+        archive = self.data_handler.archive
+        if archive is not None and not self._pushdown: # Задачи архива удаляются одной записью в архив
+            archived = {task_id for task_id in task_ids if task_id not in self._by_id and task_id in archive}
+            archive.delete(archived)
+        count = 0
+        with self.batch():
+            for task_id in task_ids:
+                if self._pushdown or task_id in self._by_id:
+                    self.delete_task_by_id(task_id)
+                    count += 1
+                elif task_id in archived:
+                    count += 1
+        return count
+
+    @requires_load
+    @write_locked
+    def import_tasks(self, file_path: str) -> int:
+        """
+            Импортирует задачи из файла JSON или CSV другой системы.
+            Записи читаются потоково и проходят полную валидацию, задачи получают новые ID.
+
+            Args:
+                file_path (str): Путь к импортируемому файлу.
+
+            Returns:
+                int: Количество импортированных задач.
+        """
+        return self.add_tasks(DataHandler(file_path).import_tasks())
+
+
+class TaskManagerPool:
+    """
+        Пул открытых менеджеров задач (например, по одному на арендатора) с вытеснением давно не используемых.
+        Менеджеры не разделяют состояние, поэтому разные хранилища из пула можно обслуживать параллельно.
+    """
+    def __init__(
+        self,
+        max_size: int = 8,
+        idle_seconds: Optional[float] = None,
+        factory: Callable[[str], TaskManager] = TaskManager
+    ):
+        """
+            Инициализация пула.
+
+            Args:
+                max_size (int): Максимальное количество открытых менеджеров. При превышении закрывается
+                    менеджер, к которому дольше всего не обращались.
+                idle_seconds (Optional[float]): Время простоя в секундах, после которого менеджер закрывается
+                    при следующем обращении к пулу (по умолчанию - не ограничено).
+                factory (Callable[[str], TaskManager]): Функция, открывающая менеджер для файла данных.
+        """
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.factory = factory
+        self._managers: "OrderedDict[str, Tuple[TaskManager, float]]" = OrderedDict() # Путь -> (менеджер, время обращения)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(data_file: str) -> str:
+        """
+            Приводит путь к файлу к ключу пула, чтобы разные записи одного пути давали один менеджер.
+        """
+        return str(Path(data_file).resolve())
+
+    def get(self, data_file: str) -> TaskManager:
+        """
+            Возвращает менеджер для файла данных, открывая его при необходимости.
+
+            Args:
+                data_file (str): Путь к файлу с данными.
+
+            Returns:
+                TaskManager: Менеджер задач для файла.
+        """
+        key = self._key(data_file)
+        with self._lock:
+            entry = self._managers.pop(key, None)
+            manager = entry[0] if entry else self.factory(data_file)
+            self._managers[key] = (manager, time.monotonic()) # Последний использованный - в конце очереди
+            evicted = self._evict()
+        for stale in evicted: # Сохранение изменений выполняется вне блокировки пула
+            stale.close()
+        return manager
+
+    def _evict(self) -> List[TaskManager]:
+        """
+            Убирает из пула простаивающие и лишние менеджеры. Вызывается под блокировкой.
+
+            Returns:
+                List[TaskManager]: Менеджеры, которые нужно закрыть.
+        """
+        evicted = []
+        if self.idle_seconds is not None:
+            deadline = time.monotonic() - self.idle_seconds
+            for key, (manager, used_at) in list(self._managers.items()):
+                if used_at >= deadline:
+                    break # Дальше по очереди только более свежие менеджеры
+                del self._managers[key]
+                evicted.append(manager)
+        while len(self._managers) > self.max_size:
+            evicted.append(self._managers.popitem(last=False)[1][0])
+        return evicted
+
+    def evict_idle(self) -> int:
+        """
+            Закрывает менеджеры, простаивающие дольше idle_seconds.
+
+            Returns:
+                int: Количество закрытых менеджеров.
+        """
+        with self._lock:
+            evicted = self._evict()
+        for stale in evicted:
+            stale.close()
+        return len(evicted)
+
+    def close(self) -> None:
+        """
+            Закрывает все менеджеры пула, сохраняя отложенные изменения.
+        """
+        with self._lock:
+            managers = [manager for manager, _ in self._managers.values()]
+            self._managers.clear()
+        for manager in managers:
+            manager.close()
+
+    def __contains__(self, data_file: str) -> bool:
+        return self._key(data_file) in self._managers
+
+    def __len__(self) -> int:
+        return len(self._managers)
@@ -1,12 +1,16 @@
 import pytest
-from task_manager import Task, TaskManager, Priority, Status
+from pathlib import Path
+from task_manager import Task, TaskManager, TaskManagerPool, Priority, Status
+from data_handler import DataHandler
 
 @pytest.fixture
-def task_manager():
+def task_manager(tmp_path):
     """
-        Фикстура для создания экземпляра TaskManager
+        Фикстура для создания экземпляра TaskManager с отдельным пустым файлом данных
     """
-    return TaskManager()
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    return TaskManager(data_file)
 
 @pytest.fixture
 def sample_task():
@@ -61,6 +65,18 @@ def test_update_task_priority(task_manager, sample_task):
     assert updated_task.priority == Priority.HIGH
 
 
+def test_update_task_invalid_field_keeps_task(task_manager, sample_task):
+    """
+        Тест на обновление с недопустимым сроком: ни одно поле задачи не изменяется, индексы остаются верными
+    """
+    task_manager.add_task(sample_task)
+    with pytest.raises(ValueError):
+        task_manager.update_task(sample_task.id, category="Home", due_date="bad")
+    assert sample_task.category == "Work"
+    assert task_manager.search_tasks(category="Work") == [sample_task]
+    assert task_manager.get_tasks_by_category("Home") == []
+
+
 def test_delete_task_by_category(task_manager, sample_task):
     """
         Тест на удаление задач по категории
@@ -111,3 +127,1089 @@ def test_task_from_dict():
     assert task.due_date == "2024-12-15"
     assert task.priority == Priority.MEDIUM
     assert task.status == Status.NOT_DONE
+
+
+def test_journal_replay(tmp_path):
+    """
+        Тест на воспроизведение журнала изменений поверх снимка
+    """
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    handler = DataHandler(data_file, journal=True)
+    first = Task.from_dict({"id": 1, "title": "Первая", "description": "", "category": "Работа",
+                            "due_date": "2024-12-15", "priority": "Средний", "status": "Не выполнена"})
+    second = Task.from_dict({"id": 2, "title": "Вторая", "description": "", "category": "Дом",
+                             "due_date": "2024-12-16", "priority": "Низкий", "status": "Не выполнена"})
+    handler.persist([first, second], changed=[first, second])
+    first.status = Status.DONE
+    handler.persist([first, second], changed=[first])
+    handler.persist([first], deleted=[2])
+    assert data_file.read_text() == "[]" # Снимок не перезаписывается при каждом изменении
+
+    tasks = DataHandler(data_file, journal=True).load()
+    assert [task.id for task in tasks] == [1]
+    assert tasks[0].status == Status.DONE
+
+
+def test_journal_compaction(tmp_path):
+    """
+        Тест на сжатие журнала в новый снимок
+    """
+    data_file = tmp_path / "data.json"
+    handler = DataHandler(data_file, journal=True, compact_threshold=1)
+    task = Task.from_dict({"id": 5, "title": "Задача", "description": "Описание", "category": "Работа",
+                           "due_date": "2024-12-15", "priority": "Высокий", "status": "Не выполнена"})
+    handler.persist([task], changed=[task])
+    handler.wait_for_compaction()
+    assert not handler.rotated_journal_path.exists()
+    assert [task.id for task in DataHandler(data_file).load()] == [5]
+
+
+def test_id_index_consistency(task_manager):
+    """
+        Тест на согласованность индекса по ID при добавлении, изменении и удалении
+    """
+    tasks = [
+        Task(title=f"Задача {i}", description="", category="Работа", due_date="2024-12-15", priority=Priority.LOW)
+        for i in range(5)
+    ]
+    for task in tasks:
+        task_manager.add_task(task)
+    task_manager.delete_task_by_id(tasks[1].id)
+    task_manager.delete_task_by_id(tasks[3].id)
+    assert task_manager.get_task(tasks[1].id) is None
+    assert task_manager.get_task(tasks[2].id) is tasks[2]
+    assert task_manager.tasks == [tasks[0], tasks[2], tasks[4]]
+
+    assert task_manager.update_task(tasks[4].id, title="Обновлена", status=Status.DONE)
+    assert task_manager.get_task(tasks[4].id).title == "Обновлена"
+    assert task_manager.get_task(tasks[4].id).status == Status.DONE
+    assert not task_manager.update_task(tasks[3].id, title="Удалена")
+    assert [task.id for task in task_manager.data_handler.load()] == [tasks[0].id, tasks[2].id, tasks[4].id]
+
+
+def test_secondary_indexes(task_manager):
+    """
+        Тест на поиск через вторичные индексы и запросы по диапазону дат
+    """
+    work = Task(title="Отчет", description="Квартальный", category="Работа", due_date="2024-12-10", priority=Priority.HIGH)
+    home = Task(title="Уборка", description="", category="Дом", due_date="2024-12-01", priority=Priority.LOW)
+    done = Task(title="Письмо", description="", category="работа", due_date="2024-11-20", priority=Priority.LOW,
+                status=Status.DONE)
+    for task in (work, home, done):
+        task_manager.add_task(task)
+
+    assert task_manager.search_tasks(category="РАБОТА") == [work, done]
+    assert task_manager.search_tasks(category="работа", status=Status.NOT_DONE) == [work]
+    assert task_manager.search_tasks(priority=Priority.LOW, keyword="убор") == [home]
+    assert task_manager.get_tasks_by_category("работа") == [done]
+    assert task_manager.get_tasks_due_between("2024-11-20", "2024-12-01") == [done, home]
+    assert task_manager.get_overdue_tasks("2024-12-05") == [home]
+
+    task_manager.update_task(home.id, category="Работа", due_date="2024-12-31")
+    assert task_manager.search_tasks(category="работа") == [work, home, done]
+    assert task_manager.get_overdue_tasks("2024-12-05") == []
+    task_manager.delete_task_by_category("Работа")
+    assert task_manager.tasks == [done]
+
+
+@pytest.mark.parametrize("file_name", ["data.json", "data.db"])
+def test_category_case_matches_scan(tmp_path, file_name):
+    """
+        Тест на сравнение категорий без учета регистра: индекс и SQLite сравнивают так же, как просмотр через upper()
+    """
+    if file_name.endswith(".json"):
+        (tmp_path / file_name).write_text("[]")
+    manager = TaskManager(tmp_path / file_name)
+    for category in ("Iş", "İş", "Straße", "STRASSE"):
+        manager.create_task(title="", description="", category=category, due_date="2024-12-15", priority="Низкий")
+    for query in ("ış", "iş", "strasse", "ß"):
+        expected = [task.id for task in manager.tasks if query.upper() == task.category.upper()]
+        assert [task.id for task in manager.search_tasks(category=query)] == expected
+def test_full_text_index_matches_scan(tmp_path):
+    """
+        Тест на совпадение результатов поиска с полнотекстовым индексом и без него
+    """
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    indexed = TaskManager(data_file, full_text_index=True)
+    tasks = [
+        Task(title="Изучить FastAPI", description="Пройти документацию", category="Обучение",
+             due_date="2024-11-30", priority=Priority.HIGH),
+        Task(title="Купить ёлку", description="Новогодняя ЁЛКА", category="Дом",
+             due_date="2024-12-20", priority=Priority.LOW),
+        Task(title="Straße", description="", category="Дом", due_date="2024-12-21", priority=Priority.LOW),
+    ]
+    for task in tasks:
+        indexed.add_task(task)
+
+    def scan(keyword):
+        return [task for task in tasks if keyword.upper() in task.title.upper() or keyword.upper() in task.description.upper()]
+
+    for keyword in ("ДОКУМЕНТ", "ёлк", "api", "стра", "STRASSE", "ss", "Ё", "нет такого"):
+        assert indexed.search_tasks(keyword=keyword) == scan(keyword)
+    assert indexed.search_tasks(keyword="ёлка", category="дом") == [tasks[1]]
+    assert indexed.search_tasks_by_prefix("доку") == [tasks[0]]
+
+    indexed.update_task(tasks[0].id, description="Прочитать учебник")
+    assert indexed.search_tasks(keyword="документ") == []
+    assert indexed.search_tasks(keyword="учебник") == [tasks[0]]
+    assert indexed.search_tasks_by_prefix("учеб") == [tasks[0]]
+    indexed.delete_task_by_id(tasks[1].id)
+    assert indexed.search_tasks(keyword="ёлк") == []
+
+
+def test_sqlite_backend(tmp_path):
+    """
+        Тест на хранение задач в SQLite и выполнение запросов в базе данных
+    """
+    manager = TaskManager(tmp_path / "tasks.db")
+    work = Task(title="Отчет", description="Квартальный отчет", category="Работа", due_date="2024-12-10",
+                priority=Priority.HIGH)
+    home = Task(title="Уборка", description="", category="Дом", due_date="2024-12-01", priority=Priority.LOW)
+    manager.add_task(work)
+    manager.add_task(home)
+    manager.update_task(home.id, status=Status.DONE)
+
+    assert [task.id for task in manager.search_tasks(keyword="КВАРТАЛЬН")] == [work.id]
+    assert [task.id for task in manager.search_tasks(category="дом", status=Status.DONE)] == [home.id]
+    assert manager.get_task(home.id).status == Status.DONE
+    assert manager.get_tasks_by_category("работа") == []
+    assert [task.id for task in manager.get_overdue_tasks("2024-12-31")] == [work.id]
+
+    manager.delete_task_by_category("Работа")
+    reopened = TaskManager(tmp_path / "tasks.db")
+    assert [task.id for task in reopened.tasks] == [home.id]
+    assert reopened.get_task(work.id) is None
+
+
+def test_streaming_load(tmp_path):
+    """
+        Тест на потоковое чтение JSON и CSV и фоновую загрузку задач
+    """
+    tasks = [
+        Task.from_dict({"id": i, "title": f"Задача {i}", "description": "Описание [с] {скобками}, и запятыми",
+                        "category": "Работа", "due_date": "2024-12-15", "priority": "Высокий", "status": "Не выполнена"})
+        for i in range(1, 51)
+    ]
+    for name in ("data.json", "data.csv"):
+        handler = DataHandler(tmp_path / name)
+        handler.save(tasks)
+        with handler.file_path.open() as file:
+            if name.endswith(".json"): # Маленькие части проверяют дочитывание элементов на границе буфера
+                assert list(DataHandler.iter_json_array(file, chunk_size=7)) == [task.to_dict() for task in tasks]
+        streamed = list(handler.stream())
+        assert [task.to_dict() for task in streamed] == [task.to_dict() for task in tasks]
+        assert streamed[0].due_datetime.year == 2024
+
+    manager = TaskManager(tmp_path / "data.json", background_load=True)
+    created = manager.create_task(title="Новая", description="", category="Дом", due_date="2024-12-20",
+                                  priority="Низкий", status="Не выполнена")
+    assert created.id == 51
+    assert manager.get_task(50).title == "Задача 50"
+
+
+def test_task_slots(sample_task):
+    """
+        Тест на хранение атрибутов задачи в слотах
+    """
+    assert not hasattr(sample_task, "__dict__") # Задача хранит атрибуты в слотах
+    with pytest.raises(AttributeError):
+        sample_task.extra = 1
+    with pytest.raises(ValueError):
+        sample_task.priority = "Срочный" # Валидация свойств задачи сохраняется
+
+
+def test_bulk_operations_persist_once(task_manager, tmp_path, monkeypatch):
+    """
+        Тест на пакетные операции с однократным сохранением
+    """
+    saves = []
+    original_persist = task_manager.data_handler.persist
+    monkeypatch.setattr(task_manager.data_handler, "persist",
+                        lambda *args, **kwargs: saves.append(1) or original_persist(*args, **kwargs))
+
+    tasks = [
+        Task(title=f"Задача {i}", description="", category="Работа" if i % 2 else "Дом",
+             due_date="2024-12-15", priority=Priority.LOW)
+        for i in range(10)
+    ]
+    assert task_manager.add_tasks(tasks) == 10
+    assert task_manager.update_many(lambda task: task.category == "Дом", status="Выполнена") == 5
+    assert task_manager.delete_many([tasks[0].id, tasks[1].id, -1]) == 2
+    with task_manager.batch():
+        task_manager.add_task(Task(title="В пакете", description="", category="Дом",
+                                       due_date="2024-12-15", priority=Priority.LOW))
+        task_manager.delete_task_by_category("Работа")
+    assert len(saves) == 4
+    assert len(task_manager.data_handler.load()) == 5
+
+    source = tmp_path / "import.csv"
+    DataHandler(source).save(tasks)
+    assert task_manager.import_tasks(source) == 10
+    assert len(saves) == 5
+    assert len({task.id for task in task_manager.tasks}) == 15 # Импортированные задачи получили новые ID
+
+
+def test_write_behind_flush(tmp_path):
+    """
+        Тест на отложенную запись и явный flush
+    """
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    handler = DataHandler(data_file, write_behind_ms=60_000)
+    manager = TaskManager(data_handler=handler)
+    manager.add_task(Task(title="Задача", description="", category="Дом", due_date="2024-12-15", priority=Priority.LOW))
+    assert DataHandler(data_file).load() == [] # Изменение еще не записано
+    manager.flush()
+    assert len(DataHandler(data_file).load()) == 1
+    assert not list(tmp_path.glob("*.tmp")) # Временный файл подменил целевой
+    manager.close()
+
+
+def test_failed_save_removes_temp_file(tmp_path, monkeypatch):
+    """
+        Тест на атомарную запись: при ошибке временный файл удаляется, а файл данных остается прежним
+    """
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    handler = DataHandler(data_file)
+
+    def failing_save(tasks, file_path=None):
+        file_path.write_bytes(b"[{") # Запись обрывается на середине
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(handler, "save_serialized", failing_save)
+    with pytest.raises(OSError):
+        handler.save([])
+    assert not list(tmp_path.glob("*.tmp"))
+    assert data_file.read_text() == "[]"
+
+
+def test_write_behind_retries_failed_flush(tmp_path, monkeypatch, caplog):
+    """
+        Тест на повтор отложенной записи после ошибки и сообщение об ошибке при закрытии
+    """
+    import time
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    handler = DataHandler(data_file, write_behind_ms=10)
+    manager = TaskManager(data_handler=handler)
+    save, failures = handler.save, [2] # Количество следующих записей, которые завершатся ошибкой
+
+    def failing_save(tasks, file_path=None):
+        if failures[0]:
+            failures[0] -= 1
+            raise OSError("No space left on device")
+        save(tasks, file_path)
+
+    monkeypatch.setattr(handler, "save", failing_save)
+    manager.add_task(Task(title="Задача", description="", category="Дом", due_date="2024-12-15", priority=Priority.LOW))
+    for _ in range(200): # Фоновый поток пережил ошибки и повторил запись
+        if len(DataHandler(data_file).load()) == 1:
+            break
+        time.sleep(0.01)
+    assert len(DataHandler(data_file).load()) == 1
+    assert "Отложенная запись" in caplog.text
+
+    failures[0] = 1_000_000 # Диск заполнен до конца работы
+    manager.update_task(1, title="Новое название")
+    with pytest.raises(OSError):
+        manager.close() # Несохраненные изменения не теряются молча
+
+
+@pytest.mark.parametrize("file_name, serializer", [
+    ("data.json", None), ("data.json", "json-compact"), ("data.msgpack", None)
+])
+def test_serializers_roundtrip(tmp_path, sample_task, file_name, serializer):
+    """
+        Тест на сохранение и загрузку задач в разных форматах сериализации
+    """
+    sample_task.id = 1
+    handler = DataHandler(tmp_path / file_name, serializer=serializer)
+    handler.save([sample_task])
+    assert [task.to_dict() for task in handler.load()] == [sample_task.to_dict()]
+    assert [task.to_dict() for task in handler.stream()] == [sample_task.to_dict()]
+
+
+def test_msgpack_fallback_fixed_width():
+    """
+        Тест на разбор чисел фиксированной ширины и обрыва данных реализацией msgpack на Python
+    """
+    from serializers import _msgpack_loads
+    import struct
+    data = bytes((0x93, 0xcc, 0xc8, 0xcd, 0x01, 0x2c, 0xd0, 0x9c))
+    assert _msgpack_loads(data) == [200, 300, -100]
+    assert _msgpack_loads(bytes((0xcb,)) + struct.pack(">d", 1.5)) == 1.5
+    with pytest.raises(ValueError):
+        _msgpack_loads(bytes((0x91, 0xcd, 0x01)))
+    with pytest.raises(ValueError):
+        _msgpack_loads(bytes((0xa5,)) + b"abc")
+
+
+def test_due_date_parsing():
+    """
+        Тест на быстрый разбор даты и сохранение строкового представления
+    """
+    assert Task.validate_data("2024-12-15").day == 15
+    assert Task.validate_data("2024-1-5").month == 1 # Нестрогий формат разбирается как раньше через strptime
+    for value in ("2024-02-30", "15.12.2024", None):
+        with pytest.raises(ValueError):
+            Task.validate_data(value)
+    task = Task(title="", description="", category="", due_date="2024-1-5", priority=Priority.LOW)
+    assert task.due_date == "2024-01-05"
+    record = {"id": 1, "title": "", "description": "", "category": "", "due_date": "2024-13-45",
+              "priority": "Низкий", "status": "Не выполнена"}
+    with pytest.raises(ValueError): # Ленивая загрузка тоже отвергает несуществующую дату
+        Task.from_dict(record, lazy=True)
+    assert Task.from_dict(dict(record, due_date="2024-1-5"), lazy=True).due_date == "2024-01-05"
+
+
+def test_instrumentation(task_manager, sample_task):
+    """
+        Тест на сбор статистики вызовов и восстановление исходных методов
+    """
+    from instrumentation import REGISTRY
+    original = TaskManager.get_task
+    REGISTRY.reset()
+    REGISTRY.enable()
+    calls = []
+    REGISTRY.add_hook(lambda name, seconds, error: calls.append(name))
+    try:
+        task_manager.add_task(sample_task)
+        task_manager.get_task(sample_task.id)
+        task_manager.get_task(sample_task.id)
+        stats = REGISTRY.snapshot()
+        assert stats["TaskManager.get_task"]["calls"] == 2
+        assert stats["TaskManager.get_task"]["histogram"]["+Inf"] == 2
+        assert stats["DataHandler.save"]["bytes_written"] > 0
+        assert "TaskManager.add_task" in calls
+        assert 'taskmanager_calls_total{method="TaskManager.get_task"} 2' in REGISTRY.to_prometheus()
+    finally:
+        REGISTRY.hooks.clear()
+        REGISTRY.disable()
+        REGISTRY.reset()
+    assert TaskManager.get_task is original # Без сбора статистики методы не обернуты
+
+
+def test_independent_managers(tmp_path):
+    """
+        Тест на независимые менеджеры с собственными файлами и счетчиками ID
+    """
+    for name in ("first.json", "second.json"):
+        (tmp_path / name).write_text("[]")
+    first, second = TaskManager(tmp_path / "first.json"), TaskManager(tmp_path / "second.json")
+    assert first is not second
+    for manager in (first, second, first):
+        manager.create_task(title="Задача", description="", category="Дом", due_date="2024-12-15", priority="Низкий")
+    assert [task.id for task in first.tasks] == [1, 2]
+    assert [task.id for task in second.tasks] == [1]
+    assert len(DataHandler(tmp_path / "second.json").load()) == 1
+
+
+def test_manager_pool_eviction(tmp_path):
+    """
+        Тест на вытеснение давно не используемых менеджеров из пула
+    """
+    closed = []
+
+    class Manager(TaskManager):
+        def close(self):
+            closed.append(self)
+            super().close()
+
+    for name in ("a.json", "b.json", "c.json"):
+        (tmp_path / name).write_text("[]")
+    pool = TaskManagerPool(max_size=2, factory=Manager)
+    first = pool.get(tmp_path / "a.json")
+    second = pool.get(tmp_path / "b.json")
+    assert pool.get(tmp_path / "a.json") is first # Повторное обращение возвращает открытый менеджер
+    pool.get(tmp_path / "c.json")
+    assert closed == [second] and len(pool) == 2
+    assert tmp_path / "b.json" not in pool and tmp_path / "a.json" in pool
+    pool.close()
+    assert len(pool) == 0 and len(closed) == 3
+
+
+def test_manager_pool_eviction_saves_pending(tmp_path):
+    """
+        Тест на сохранение изменений, накопленных без auto_persist, при вытеснении менеджера из пула
+    """
+    for name in ("a.json", "b.json"):
+        (tmp_path / name).write_text("[]")
+    pool = TaskManagerPool(max_size=1, factory=lambda data_file: TaskManager(data_file, auto_persist=False))
+    pool.get(tmp_path / "a.json").create_task(title="Задача", description="", category="Дом",
+                                              due_date="2024-12-15", priority="Низкий")
+    assert DataHandler(tmp_path / "a.json").load() == []
+    pool.get(tmp_path / "b.json") # Менеджер файла a.json вытесняется и закрывается
+    assert [task.title for task in DataHandler(tmp_path / "a.json").load()] == ["Задача"]
+
+
+def test_thread_safe_stress(tmp_path):
+    """
+        Нагрузочный тест потокобезопасного режима: параллельные добавления, изменения, удаления и поиски
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    manager = TaskManager(data_file, full_text_index=True, thread_safe=True)
+    errors = []
+
+    def writer(worker):
+        created = []
+        for i in range(40):
+            created.append(manager.create_task(title=f"Задача {worker}-{i}", description="нагрузка",
+                                               category=f"Категория {worker % 3}", due_date="2024-12-15",
+                                               priority="Низкий"))
+            if i % 4 == 0:
+                manager.update_task(created[-1].id, status=Status.DONE)
+            if i % 5 == 0:
+                manager.delete_task_by_id(created.pop(0).id)
+        return created
+
+    def reader():
+        for _ in range(60):
+            try:
+                for task in manager.search_tasks(keyword="нагрузка", status=Status.DONE):
+                    assert task.status == Status.DONE
+                manager.search_tasks(category="Категория 1")
+                manager.get_overdue_tasks("2025-01-01")
+            except Exception as error: # Исключения из потоков собираем для проверки
+                errors.append(error)
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        readers = [pool.submit(reader) for _ in range(4)]
+        writers = [pool.submit(writer, worker) for worker in range(8)]
+        kept = [task for future in writers for task in future.result()]
+        for future in readers:
+            future.result()
+
+    assert not errors
+    ids = [task.id for task in manager.tasks]
+    assert len(ids) == len(set(ids)) == len(kept) == 8 * 32 # ID не повторяются, ни одно изменение не потеряно
+    assert sorted(ids) == sorted(task.id for task in kept)
+    assert sorted(task.id for task in DataHandler(data_file).load()) == sorted(ids)
+
+
+def test_shared_file_merges_external_changes(tmp_path):
+    """
+        Тест на общий файл: изменения другого менеджера принимаются, а не затираются при сохранении
+    """
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    first = TaskManager(data_handler=DataHandler(data_file, shared=True))
+    second = TaskManager(data_handler=DataHandler(data_file, shared=True))
+    fields = dict(description="", category="Дом", due_date="2024-12-15", priority="Низкий")
+    created = first.create_task(title="Первая", **fields)
+    other = second.create_task(title="Вторая", **fields) # Перед сохранением второй менеджер принимает первую задачу
+    assert other.id == created.id + 1
+    assert [task.title for task in first.tasks] == ["Первая", "Вторая"]
+    first.update_task(other.id, status=Status.DONE)
+    assert second.get_task(other.id) is other and other.status == Status.DONE # Задача обновлена на месте
+    second.delete_task_by_id(created.id)
+    assert first.search_tasks(category="дом") == [first.get_task(other.id)]
+    assert [task.id for task in DataHandler(data_file).load()] == [other.id]
+    with pytest.raises(ValueError):
+        DataHandler(data_file, shared=True, write_behind_ms=100)
+
+
+def test_shared_journal_reads_tail(tmp_path, monkeypatch):
+    """
+        Тест на инкрементальное чтение журнала, дописанного другим менеджером
+    """
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    first = TaskManager(data_handler=DataHandler(data_file, journal=True, shared=True))
+    second = TaskManager(data_handler=DataHandler(data_file, journal=True, shared=True))
+    fields = dict(description="", category="Дом", due_date="2024-12-15", priority="Низкий")
+    task = first.create_task(title="Задача", **fields)
+    first.create_task(title="Удаленная", **fields)
+    first.delete_task_by_id(task.id + 1)
+    monkeypatch.setattr(second.data_handler, "load_journaled", lambda: pytest.fail("Журнал перечитан целиком"))
+    assert second.refresh() == 1
+    assert [item.title for item in second.tasks] == ["Задача"]
+    assert second.refresh() == 0
+
+
+def test_shared_file_between_processes(tmp_path):
+    """
+        Тест на одновременную запись в общий файл из нескольких процессов: ни одна задача не теряется
+    """
+    import subprocess
+    import sys
+    from pathlib import Path
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from task_manager import TaskManager\n"
+        "from data_handler import DataHandler\n"
+        "manager = TaskManager(data_handler=DataHandler(sys.argv[2], shared=True))\n"
+        "for i in range(20):\n"
+        "    manager.create_task(title=f'{sys.argv[3]}-{i}', description='', category='Дом',\n"
+        "                        due_date='2024-12-15', priority='Низкий')\n"
+    )
+    root = str(Path(__file__).resolve().parent)
+    processes = [
+        subprocess.Popen([sys.executable, "-c", script, root, str(data_file), str(worker)]) for worker in range(4)
+    ]
+    assert all(process.wait(timeout=60) == 0 for process in processes)
+    tasks = DataHandler(data_file).load()
+    assert len(tasks) == 80
+    assert len({task.id for task in tasks}) == 80
+
+
+def test_async_manager_coalesces_writes(tmp_path, monkeypatch):
+    """
+        Тест на асинхронный менеджер: серия изменений сохраняется одной записью в пуле потоков
+    """
+    import asyncio
+    import threading
+    from async_task_manager import AsyncTaskManager
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    saves = []
+
+    async def scenario():
+        async with AsyncTaskManager(data_file, coalesce_ms=200) as manager:
+            original = manager.manager.data_handler.persist
+            monkeypatch.setattr(manager.manager.data_handler, "persist", lambda *args: (
+                saves.append(threading.current_thread()), original(*args))[1])
+            tasks = await asyncio.gather(*(
+                manager.create_task(title=f"Задача {i}", description="", category="Дом", due_date="2024-12-15",
+                                    priority="Низкий")
+                for i in range(20)
+            ))
+            await asyncio.gather(*(manager.update_task(task.id, status=Status.DONE) for task in tasks[:10]))
+            await manager.delete_task_by_id(tasks[-1].id)
+            assert await manager.get_task(tasks[-1].id) is None # Изменения видны сразу, до записи файла
+            assert len(await manager.search_tasks(status=Status.DONE)) == 10
+            await manager.flush()
+            assert len(saves) == 1
+            assert threading.main_thread() not in saves # Запись выполняется вне цикла событий
+
+    asyncio.run(scenario())
+    tasks = DataHandler(data_file).load()
+    assert len(tasks) == 19
+    assert sum(task.status == Status.DONE for task in tasks) == 10
+
+
+def test_async_manager_write_snapshot(tmp_path, monkeypatch):
+    """
+        Тест на асинхронный менеджер: запись не видит изменений, сделанных во время нее,
+        а изменения, которые не удалось сохранить, сохраняются следующей записью
+    """
+    import asyncio
+    import threading
+    from async_task_manager import AsyncTaskManager
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    writing, changed, written = threading.Event(), threading.Event(), []
+
+    async def scenario():
+        async with AsyncTaskManager(data_file) as manager:
+            handler = manager.manager.data_handler
+            original = handler.persist
+
+            def slow_persist(*args):
+                writing.set()
+                changed.wait(5) # Задача изменяется в цикле событий, пока файл записывается
+                original(*args)
+                written.append(DataHandler(data_file).load()[0].title)
+
+            monkeypatch.setattr(handler, "persist", slow_persist)
+            task = await manager.create_task(title="Старое", description="", category="Дом", due_date="2024-12-15",
+                                             priority="Низкий")
+            await asyncio.get_running_loop().run_in_executor(None, writing.wait, 5)
+            await manager.update_task(task.id, title="Новое")
+            changed.set()
+            await manager.flush()
+            assert written == ["Старое", "Новое"] # Первая запись - снимок до изменения, вторая - само изменение
+
+            def failing_persist(*args):
+                raise OSError("No space left on device")
+
+            monkeypatch.setattr(handler, "persist", failing_persist)
+            await manager.update_task(task.id, status=Status.DONE)
+            with pytest.raises(OSError):
+                await manager.flush()
+            assert manager.manager.has_pending # Изменение не потеряно
+            monkeypatch.setattr(handler, "persist", original)
+
+    asyncio.run(scenario())
+    assert DataHandler(data_file).load()[0].status == Status.DONE
+
+
+def test_async_manager_flush_serializes_writes(tmp_path, monkeypatch):
+    """
+        Тест на асинхронный менеджер: flush() после ошибки записи не пишет файл одновременно с фоновой записью
+    """
+    import asyncio
+    import threading
+    import time
+    from async_task_manager import AsyncTaskManager
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    active, overlaps = [], []
+
+    async def scenario():
+        async with AsyncTaskManager(data_file) as manager:
+            handler = manager.manager.data_handler
+            original = handler.persist
+
+            def failing_persist(*args):
+                raise OSError("No space left on device")
+
+            def slow_persist(*args):
+                overlaps.append(len(active))
+                active.append(threading.get_ident())
+                time.sleep(0.05)
+                original(*args)
+                active.pop()
+
+            monkeypatch.setattr(handler, "persist", failing_persist)
+            task = await manager.create_task(title="Задача", description="", category="Дом", due_date="2024-12-15",
+                                             priority="Низкий")
+            await manager._persisting # Фоновая запись завершилась ошибкой, изменения остались накопленными
+            monkeypatch.setattr(handler, "persist", slow_persist)
+            flushing = asyncio.get_running_loop().create_task(manager.flush())
+            await asyncio.sleep(0.01) # flush() уже пишет накопленные изменения
+            await manager.update_task(task.id, status=Status.DONE) # Запускает новую фоновую запись
+            await flushing
+            await manager.flush()
+
+    asyncio.run(scenario())
+    assert overlaps and not any(overlaps)
+    assert DataHandler(data_file).load()[0].status == Status.DONE
+
+
+def test_sharded_storage(tmp_path, monkeypatch):
+    """
+        Тест на хранилище в шардах: параллельная загрузка и перезапись только измененных шардов
+    """
+    from sharded_storage import ShardedDataHandler
+    directory = tmp_path / "tasks"
+    manager = TaskManager(data_handler=ShardedDataHandler(directory, shard_size=10, workers=1))
+    manager.add_tasks([
+        Task(title=f"Задача {i}", description="", category="Дом", due_date="2024-12-15", priority=Priority.LOW)
+        for i in range(35)
+    ])
+    assert len(list(directory.glob("tasks-*.json"))) == 4 # ID 1-35 по 10 в шарде
+
+    written = []
+    original = DataHandler.save
+    monkeypatch.setattr(DataHandler, "save", lambda self, tasks: (written.append(self.file_path), original(self, tasks)))
+    manager.update_task(12, status=Status.DONE)
+    manager.delete_task_by_id(31)
+    assert [path.name for path in written] == ["tasks-000001.json", "tasks-000003.json"]
+
+    handler = ShardedDataHandler(directory, shard_size=1000, workers=2, parallel_threshold=0) # Разбиение из shards.json
+    loaded = handler.load()
+    handler.close()
+    assert handler.shard_size == 10
+    assert [task.id for task in loaded] == [task_id for task_id in range(1, 36) if task_id != 31]
+    assert loaded[11].status == Status.DONE
+
+
+@pytest.mark.parametrize("file_name", ["data.json", "data.csv"])
+def test_save_reuses_unchanged_records(tmp_path, monkeypatch, file_name):
+    """
+        Тест на сохранение: после изменения одной задачи заново кодируется только ее запись
+    """
+    data_file = tmp_path / file_name
+    handler = DataHandler(data_file)
+    handler.save([])
+    manager = TaskManager(data_handler=handler)
+    manager.add_tasks([
+        Task(title=f"Задача {i}", description="", category="Дом", due_date="2024-12-15", priority=Priority.LOW)
+        for i in range(10)
+    ])
+    encoded = []
+    original = Task.to_dict
+    monkeypatch.setattr(Task, "to_dict", lambda self: (encoded.append(self.id), original(self))[1])
+    manager.update_task(3, title="Новое название")
+    assert encoded == [3]
+    manager.tasks[4].priority = Priority.HIGH # Сеттер делает закодированную запись задачи устаревшей
+    manager.update_task(5, status=Status.DONE)
+    assert encoded == [3, 5]
+    loaded = DataHandler(data_file).load()
+    assert [task.to_dict() for task in loaded] == [task.to_dict() for task in manager.tasks]
+
+
+def test_fragment_changed_during_encoding(sample_task):
+    """
+        Тест на кэш закодированной записи: запись, во время кодирования которой задача изменилась, не используется
+    """
+    def encode(record):
+        sample_task.title = "Новое название" # Изменение из другого потока во время кодирования
+        return record["title"].encode("utf-8")
+
+    assert sample_task.fragment("test", encode) == "Test Task".encode("utf-8")
+    assert sample_task.fragment("test", lambda record: record["title"].encode("utf-8")) == "Новое название".encode("utf-8")
+
+
+@pytest.mark.parametrize("file_name", ["data.json", "data.db"])
+def test_iter_search_pages(tmp_path, file_name):
+    """
+        Тест на ленивый поиск: сортировка по сроку и приоритету, offset и limit
+    """
+    data_file = tmp_path / file_name
+    if file_name.endswith(".json"):
+        data_file.write_text("[]")
+    manager = TaskManager(data_file)
+    priorities = [Priority.LOW, Priority.HIGH, Priority.MEDIUM]
+    manager.add_tasks([
+        Task(title=f"Задача {i}", description="", category="Дом", due_date=f"2024-12-{30 - i:02d}",
+             priority=priorities[i % 3])
+        for i in range(12)
+    ])
+    assert [task.id for task in manager.iter_search(limit=3)] == [1, 2, 3]
+    by_date = [task.id for task in manager.iter_search(sort_by="due_date", offset=2, limit=4)]
+    assert by_date == [10, 9, 8, 7]
+    by_priority = [task.id for task in manager.iter_search(sort_by="priority", limit=5)]
+    assert by_priority == [11, 8, 5, 2, 12]
+    assert [task.id for task in manager.iter_search(keyword="задача 1", sort_by="due_date")] == [12, 11, 2]
+    with pytest.raises(ValueError):
+        manager.iter_search(sort_by="title")
+    manager.close()
+
+
+def test_query_cache_invalidation(tmp_path):
+    """
+        Тест на кэш запросов: повторный поиск берется из кэша, изменения сбрасывают только затронутые запросы
+    """
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    manager = TaskManager(data_file, query_cache_size=8)
+    manager.add_tasks([
+        Task(title=f"Задача {i}", description="", category=["Дом", "Работа"][i % 2], due_date="2024-12-15",
+             priority=Priority.LOW)
+        for i in range(6)
+    ])
+    assert len(manager.search_tasks(category="дом")) == 3
+    assert len(manager.search_tasks(category="ДОМ")) == 3 # Тот же нормализованный ключ
+    assert len(manager.get_tasks_by_category("Работа")) == 3
+    assert len(manager.search_tasks(status=Status.DONE)) == 0
+    assert manager.query_cache_stats()["hits"] == 1
+
+    manager.update_task(2, title="Новое название") # Состав результатов не меняется - кэш не сбрасывается
+    assert manager.query_cache_stats()["size"] == 3
+    manager.update_task(2, status=Status.DONE) # Сбрасывается только поиск по статусу
+    assert manager.query_cache_stats()["size"] == 2
+    assert [task.id for task in manager.search_tasks(status=Status.DONE)] == [2]
+
+    manager.delete_task_by_category("Дом") # Запрос по категории "Работа" остается в кэше
+    assert manager.search_tasks(category="дом") == []
+    assert len(manager.get_tasks_by_category("Работа")) == 3
+    stats = manager.query_cache_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 5
+
+
+@pytest.mark.parametrize("scheduler", [True, False])
+def test_scheduler_queue(tmp_path, scheduler):
+    """
+        Тест на очередь задач: порядок совпадает с сортировкой, изменения переставляют задачи, просрочка выдается один раз
+    """
+    import random
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    manager = TaskManager(data_file, scheduler=scheduler, auto_persist=False)
+    rng = random.Random(7)
+    manager.add_tasks([
+        Task(title=f"Задача {i}", description="", category="Дом", due_date=f"2024-12-{rng.randint(1, 28):02d}",
+             priority=rng.choice(list(Priority)))
+        for i in range(200)
+    ])
+    for task_id in rng.sample(range(1, 201), 60):
+        manager.update_task(task_id, priority=rng.choice(list(Priority)), due_date=f"2024-12-{rng.randint(1, 28):02d}")
+    for task_id in rng.sample(range(1, 201), 30):
+        manager.update_task(task_id, status=Status.DONE)
+    manager.delete_many(rng.sample(range(1, 201), 20))
+
+    def expected(n):
+        open_tasks = [task for task in manager.tasks if task.status == Status.NOT_DONE]
+        return sorted(open_tasks, key=lambda task: (list(Priority).index(task.priority), task.due_date, task.id))[:n]
+
+    assert manager.peek_next(10) == expected(10)
+    first = expected(1)[0]
+    assert manager.pop_next() is first and first.status == Status.IN_PROGRESS
+    assert manager.peek_next(5) == expected(5)
+
+    expired = list(manager.iter_expired("2024-12-10"))
+    assert expired and all(task.due_date < "2024-12-10" and task.status != Status.DONE for task in expired)
+    assert list(manager.iter_expired("2024-12-10")) == [] # Уже выданные задачи не повторяются
+    newly = list(manager.iter_expired("2024-12-11"))
+    assert {task.due_date for task in newly} <= {"2024-12-10"}
+    manager.update_task(expired[0].id, due_date="2024-12-11") # Перенос срока - задача снова попадет в выдачу
+    assert expired[0] in list(manager.iter_expired("2024-12-12"))
+    manager.tasks = list(manager.tasks) # Перестроение индексов не повторяет уже выданные задачи
+    assert list(manager.iter_expired("2024-12-12")) == []
+    manager.update_task(expired[0].id, status=Status.DONE)
+    manager.delete_task_by_id(expired[1].id)
+    reported = manager._scheduler._reported if scheduler else manager._reported_overdue
+    assert expired[0].id not in reported and expired[1].id not in reported # Набор выданных задач не растет
+
+    for task_id in (1001, 1000): # Равные приоритет и срок: первой выдается задача с меньшим ID, а не добавленная раньше
+        task = Task(title="", description="", category="Дом", due_date="2024-11-01", priority=Priority.HIGH)
+        task.id = task_id
+        manager.add_task(task)
+    assert [task.id for task in manager.peek_next(2)] == [1000, 1001]
+
+
+def test_http_server(tmp_path, monkeypatch):
+    """
+        Тест на HTTP API: CRUD, пакет изменений и потоковая выдача по одному keep-alive соединению
+    """
+    import asyncio
+    import json
+    import server
+    from async_task_manager import AsyncTaskManager
+    from urllib.parse import urlencode
+    from load_test import HTTPConnection
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    monkeypatch.setattr(server, "STREAM_CHUNK", 3) # Несколько фрагментов даже на маленьком списке
+    fields = {"title": "Задача", "description": "", "category": "Дом", "due_date": "2024-12-15", "priority": "Низкий"}
+
+    async def scenario():
+        api = server.TaskServer(AsyncTaskManager(data_file), port=0)
+        port = await api.start()
+        connection = HTTPConnection("127.0.0.1", port)
+        status, body = await connection.request("POST", "/tasks", fields)
+        assert status == 201 and json.loads(body)["id"] == 1
+        status, body = await connection.request("POST", "/tasks/bulk", {
+            "create": [dict(fields, title=f"Пакет {i}", priority="Высокий") for i in range(10)],
+            "update": [{"id": 1, "status": "Выполнена"}],
+            "delete": [2],
+        })
+        assert json.loads(body) == {"created": list(range(2, 12)), "updated": 1, "deleted": 1}
+        snapshot = (await connection.request("GET", "/tasks"))[1]
+        for bad in ({"update": [{"id": 4, "priority": "Срочный"}], "delete": [4]},
+                    {"update": [{"id": 4, "title": "Новое"}, {"id": 5, "due_date": "завтра"}], "delete": [4]},
+                    {"update": [{"id": 4, "title": "Новое"}], "delete": [5, "6"]}):
+            status, _ = await connection.request("POST", "/tasks/bulk", dict(bad, create=[fields]))
+            assert status == 400 # Ошибка в любом изменении или удалении отменяет весь пакет
+        assert (await connection.request("GET", "/tasks"))[1] == snapshot
+        status, body = await connection.request("GET", "/tasks?" + urlencode({"priority": "Высокий", "limit": 5, "offset": 2}))
+        assert [task["id"] for task in json.loads(body)] == [5, 6, 7, 8, 9]
+        status, body = await connection.request("GET", "/tasks?" + urlencode({"keyword": "нет такого"}))
+        assert json.loads(body) == []
+        status, body = await connection.request("PATCH", "/tasks/3", {"title": "Новое"})
+        assert json.loads(body)["title"] == "Новое"
+        assert (await connection.request("DELETE", "/tasks/3"))[0] == 204
+        assert (await connection.request("GET", "/tasks/3"))[0] == 404
+        assert (await connection.request("POST", "/tasks", dict(fields, due_date="15.12.2024")))[0] == 400
+        assert (await connection.request("PUT", "/tasks/1"))[0] == 405
+        status, body = await connection.request("POST", "/next")
+        assert json.loads(body)["id"] == 4 and json.loads(body)["status"] == "В работе"
+        await connection.close()
+        await api.close()
+
+    asyncio.run(scenario())
+    tasks = DataHandler(data_file).load()
+    assert len(tasks) == 9
+    assert tasks[0].status == Status.DONE
+
+
+def test_cli_batch(tmp_path, monkeypatch):
+    import io
+    import json
+    import cli
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    persists = []
+    original = DataHandler.persist
+    monkeypatch.setattr(DataHandler, "persist", lambda self, *args, **kwargs: persists.append(1) or original(self, *args, **kwargs))
+    commands = [
+        {"op": "add", "title": "Купить", "description": "", "category": "Дом", "due_date": "2024-12-15", "priority": "Высокий"},
+        {"op": "add", "title": "Отчет", "description": "", "category": "Работа", "due_date": "2024-12-10", "priority": "Низкий"},
+        {"op": "update", "id": 2, "status": "Выполнена"},
+        {"op": "update", "id": 99, "title": "Нет"},
+        {"op": "add", "title": "Без срока", "color": "red"},
+        {"op": "search", "category": "дом"},
+    ]
+    stdin = io.StringIO("\n".join(json.dumps(command, ensure_ascii=False) for command in commands) + "\nне json\n")
+    stdout = io.StringIO()
+    args = cli.build_parser().parse_args(["--data", str(data_file), "--batch"])
+    assert cli.run(args, stdin=stdin, stdout=stdout) == 1
+    results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [result["ok"] for result in results] == [True, True, True, False, False, True, False]
+    assert results[2]["result"]["status"] == "Выполнена"
+    assert [task["id"] for task in results[5]["result"]] == [1]
+    assert len(persists) == 1 # Все изменения пакета сохраняются один раз
+
+    stdout = io.StringIO()
+    args = cli.build_parser().parse_args(["--data", str(data_file), "search", "--status", "Выполнена"])
+    assert cli.run(args, stdout=stdout) == 0
+    assert [json.loads(line)["title"] for line in stdout.getvalue().splitlines()] == ["Отчет"]
+
+
+def test_lazy_load_with_load_cache(tmp_path, monkeypatch):
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    manager = TaskManager(data_handler=DataHandler(data_file, load_cache=True))
+    manager.create_task(title="Отчет", description="Квартальный", category="Работа",
+                        due_date="2024-12-15", priority="Высокий")
+    manager.create_task(title="Хлеб", description="", category="Дом", due_date="2024-12-10", priority="Низкий")
+    manager.update_task(2, status=Status.DONE)
+
+    parsed = []
+    original = DataHandler.iter_records
+    monkeypatch.setattr(DataHandler, "iter_records", lambda self: parsed.append(1) or original(self))
+
+    def open_manager():
+        return TaskManager(data_handler=DataHandler(data_file, load_cache=True), lazy_load=True)
+
+    manager = open_manager()
+    assert not parsed # Конструктор не читает файл
+    assert [task.to_dict() for task in manager.tasks] == [task.to_dict() for task in DataHandler(data_file).load()]
+    assert len(parsed) == 1 and (tmp_path / "data.json.cache").exists()
+
+    manager = open_manager()
+    tasks = manager.search_tasks(keyword="отчет")
+    assert len(parsed) == 1 # Файл не изменился - задачи взяты из кэша без разбора
+    assert tasks[0].priority == Priority.HIGH and tasks[0].due_datetime.day == 15
+    manager.update_task(1, title="Годовой отчет")
+
+    manager = open_manager()
+    assert manager.get_task(1).title == "Годовой отчет" # Кэш устарел после сохранения - файл разобран заново
+    assert len(parsed) == 2
+    assert manager.get_task(2).status == Status.DONE
+
+
+def test_archive_done_tasks(tmp_path, monkeypatch):
+    import archive
+    from datetime import date, timedelta
+    monkeypatch.setattr(archive, "ARCHIVE_CHUNK", 2) # Несколько элементов gzip даже на маленьком архиве
+    day = lambda days_ago: (date.today() - timedelta(days=days_ago)).isoformat()
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    manager = TaskManager(data_handler=DataHandler(data_file))
+    for title, due_date, status in [
+        ("Отчет за январь", day(100), Status.DONE), ("Старая задача", day(90), Status.NOT_DONE),
+        ("Отчет за февраль", day(80), Status.DONE), ("Недавний отчет", day(5), Status.DONE),
+        ("Покупки", day(70), Status.DONE),
+    ]:
+        manager.create_task(title=title, description="", category="Работа", due_date=due_date, priority="Средний", status=status)
+
+    def open_manager():
+        return TaskManager(data_handler=DataHandler(data_file, archive_after_days=30))
+
+    manager = open_manager() # Старые выполненные задачи переносятся в архив при загрузке
+    assert [task.id for task in manager.tasks] == [2, 4]
+    assert len(DataHandler(data_file).load()) == 2
+    assert manager.create_task(title="Новая", description="", category="Дом", due_date=day(0), priority="Низкий").id == 6
+
+    manager = open_manager()
+    assert [task.id for task in manager.search_tasks(status=Status.DONE)] == [4, 1, 3, 5]
+    assert [task.id for task in manager.search_tasks(keyword="отчет")] == [4] # Без статуса "Выполнена" архив не читается
+    assert [task.id for task in manager.iter_search(status=Status.DONE, sort_by="due_date", limit=2)] == [1, 3]
+    assert [task.id for task in manager.get_tasks_due_between(day(95), day(0), include_archived=True)] == [2, 3, 5, 4, 6]
+    assert manager.get_task(3).title == "Отчет за февраль"
+
+    assert manager.update_task(3, status=Status.NOT_DONE) # Задача возвращается из архива в рабочий набор
+    manager.delete_task_by_id(5)
+    (tmp_path / "data.json.archive.jsonl.gz.idx").unlink() # Индекс архива строится заново по файлу архива
+    manager = open_manager()
+    assert [task.id for task in manager.search_tasks(status=Status.DONE)] == [4, 1]
+    assert manager.get_task(3).status == Status.NOT_DONE and manager.get_task(5) is None
+    assert manager.archive_done(today=(date.today() + timedelta(days=60)).isoformat()) == 1 # Задача 4
+    assert [task.id for task in manager.search_tasks(status=Status.DONE)] == [1, 4]
+    assert len(manager.data_handler.archive) == 2 # Задача 3 удалена из архива при возвращении в рабочий набор
+
+    def unexpected(*args):
+        raise AssertionError("Архив прочитан или изменен без необходимости")
+
+    monkeypatch.setattr(archive.TaskArchive, "iter_tasks", unexpected) # Категория удаляется по индексу архива
+    manager.create_task(title="Черновик", description="", category="Дом", due_date=day(0), priority="Низкий")
+    with monkeypatch.context() as patch:
+        patch.setattr(archive.TaskArchive, "delete", unexpected) # Удаление задачи рабочего набора не трогает архив
+        manager.delete_task_by_id(7)
+    manager.delete_task_by_category("Работа")
+    assert len(manager.data_handler.archive) == 0 and [task.id for task in manager.tasks] == [6]
+
+
+def test_benchmark_smoke(tmp_path):
+    """
+        Тест на прогон замеров TaskManager и сериализации на маленьком наборе задач
+    """
+    import benchmark
+    rows = benchmark.bench_manager(40, "json", tmp_path, ops=5, write_ops=2, memory=True)
+    assert {row["benchmark"] for row in rows} >= {"manager.load", "manager.get_task", "manager.delete_task_by_category"}
+    rows = benchmark.bench_serialization(20, tmp_path)
+    assert {row["format"] for row in rows} == set(benchmark.FORMATS)
+    with pytest.raises(RuntimeError):
+        benchmark.import_time("json.decoder, json") # Строки отчета для такого имени нет
+
+
+def test_archive_restore_survives_failed_save(tmp_path, monkeypatch):
+    """
+        Тест на возвращение задачи из архива: при сбое сохранения задача не теряется,
+        а копия в архиве удаляется только после записи задачи в файл данных
+    """
+    from datetime import date, timedelta
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    manager = TaskManager(data_file)
+    for title in ("Архивная", "Вторая архивная"):
+        manager.create_task(title=title, description="", category="Работа", priority="Средний", status=Status.DONE,
+                            due_date=(date.today() - timedelta(days=100)).isoformat())
+
+    def open_manager():
+        return TaskManager(data_handler=DataHandler(data_file, archive_after_days=30))
+
+    manager = open_manager()
+    assert manager.tasks == [] and len(manager.data_handler.archive) == 2
+
+    def failing_persist(*args):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(manager.data_handler, "persist", failing_persist)
+    with pytest.raises(OSError):
+        manager.update_task(1, status=Status.NOT_DONE)
+    assert manager.get_task(1).status == Status.NOT_DONE
+    manager = open_manager() # Задача не записана в файл данных, поэтому осталась в архиве
+    assert manager.get_task(1).status == Status.DONE and len(manager.data_handler.archive) == 2
+
+    assert manager.update_task(1, status=Status.NOT_DONE) and manager.update_task(2, category="Дом")
+    manager.delete_task_by_category("Дом") # Копия в архиве в старой категории тоже удаляется
+    manager = open_manager()
+    assert [task.id for task in manager.tasks] == [1] and manager.get_task(2) is None
+    assert len(manager.data_handler.archive) == 0 # Копия сохраненной задачи удалена из архива при загрузке
+
+
+def test_async_manager_archive_off_loop(tmp_path, monkeypatch):
+    """
+        Тест на асинхронный менеджер с архивом: чтение и изменение архива выполняются вне цикла событий
+    """
+    import asyncio
+    import threading
+    import archive
+    from datetime import date, timedelta
+    from async_task_manager import AsyncTaskManager
+    data_file = tmp_path / "data.json"
+    data_file.write_text("[]")
+    old = (date.today() - timedelta(days=100)).isoformat()
+    TaskManager(data_file).add_tasks([
+        Task(title=f"Отчет {i}", description="", category="Работа", due_date=old, priority=Priority.LOW, status=Status.DONE)
+        for i in range(3)
+    ])
+    threads = []
+    for name in ("get", "iter_tasks", "delete"):
+        original = getattr(archive.TaskArchive, name)
+        monkeypatch.setattr(archive.TaskArchive, name, lambda self, *args, original=original: (
+            threads.append(threading.current_thread()), original(self, *args))[1])
+
+    async def scenario():
+        async with AsyncTaskManager(data_handler=DataHandler(data_file, archive_after_days=30)) as manager:
+            assert (await manager.get_task(1)).title == "Отчет 0"
+            assert len(await manager.search_tasks(status=Status.DONE)) == 3
+            tasks = await manager.iter_search(status=Status.DONE) # Архив распаковывается по мере обхода
+            assert [task.id for task in await manager.next_tasks(tasks, 2)] == [1, 2]
+            assert await manager.update_task(2, status=Status.NOT_DONE)
+            await manager.delete_task_by_id(3)
+
+    asyncio.run(scenario())
+    assert threads and threading.main_thread() not in threads
+    manager = TaskManager(data_handler=DataHandler(data_file, archive_after_days=30))
+    assert [task.id for task in manager.tasks] == [2] and len(manager.data_handler.archive) == 1